@@ -1,5 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks, Header, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+from sqlalchemy.orm import Session, selectinload
 from typing import List, Optional, Dict, Any
 import uuid
 import os
@@ -10,11 +12,23 @@ from ...db.database import get_db
 from ...models.schema import (
     GenerateIdeasResponse, ResearchIdea, ExperimentRun, ExperimentResult,
     ResearchIdeaResponse, ExperimentRunResponse, ResearchIdeaCreate,
-    IdeaStatus, ExperimentStatus, StatusResponse, RunExperimentResponse
+    IdeaStatus, ExperimentStatus, StatusResponse, RunExperimentResponse, SweepCreate,
+    IdeaSearchResponse, ExperimentArtifact, ArtifactListResponse
 )
 from ...services.storage import r2_storage
 from ...services.ai_scientist_wrapper import ai_scientist, AIScientistWrapper
-from ...services.background_tasks import task_manager
+from ...services.background_tasks import task_manager, ACTIVE_STATUSES
+from ...services.interaction_log import InteractionLogReader
+from ...services.resource_scheduler import resource_scheduler
+from ...services.idea_import import idea_importer, detect_format
+from ...services.llm_router import get_all_route_stats
+from ...services.similarity_index import similarity_index, proposal_text
+from ...services.idea_search import search_ideas
+from ...services.artifact_server import serve_artifact
+from ...services.serialization import response_serializer
+from ...services.response_cache import (
+    cached_response, idea_version, experiment_version, idea_key, experiment_key
+)
 from ...core.logging import get_logger
 
 # Configure logging
@@ -82,94 +96,379 @@ async def create_research_idea(
         logger.error(f"Error creating research idea: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/ideas/imports", response_model=Dict[str, Any])
+async def import_research_ideas(
+    file: UploadFile = File(...),
+    generate: bool = Form(False),
+    rate_per_minute: Optional[int] = Form(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk-create research ideas from a JSONL or CSV file.
+
+    Each row needs title, keywords, tldr and abstract. Invalid rows are skipped
+    and reported on the returned batch. With ``generate``, idea generation is
+    queued for every imported idea at ``rate_per_minute``.
+    """
+    try:
+        file_format = detect_format(file.filename, file.content_type)
+        logger.info(f"Importing research ideas from {file.filename} ({file_format})")
+        # Parsing and inserting a large upload blocks, so keep it off the event loop
+        return await run_in_threadpool(
+            idea_importer.import_file, file.file, file_format, db, generate=generate, rate_per_minute=rate_per_minute
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error importing research ideas: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/ideas/imports/{batch_id}", response_model=Dict[str, Any])
+async def get_import_status(batch_id: str, db: Session = Depends(get_db)):
+    """Get the progress of a bulk import and of the generation it queued."""
+    try:
+        return idea_importer.get_status(batch_id, db)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching import batch {batch_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/ideas", response_model=List[ResearchIdeaResponse])
 async def get_all_research_ideas(db: Session = Depends(get_db)):
     """Get all research ideas."""
     try:
         logger.info("Fetching all research ideas")
-        ideas = db.query(ResearchIdea).all()
+        ideas = (
+            db.query(ResearchIdea)
+            .options(selectinload(ResearchIdea.experiments).selectinload(ExperimentRun.results))
+            .all()
+        )
         logger.info(f"Found {len(ideas)} research ideas")
-        return ideas
+        return Response(content=response_serializer.ideas(ideas), media_type="application/json")
     except Exception as e:
         logger.error(f"Error fetching research ideas: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/ideas/search", response_model=IdeaSearchResponse)
+async def search_research_ideas(
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """Full-text search over research ideas and their generated proposals, best matches first."""
+    try:
+        return search_ideas(db, q, limit=limit, offset=offset)
+    except Exception as e:
+        logger.error(f"Error searching research ideas for {q!r}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/ideas/{idea_id}", response_model=ResearchIdeaResponse)
-async def get_research_idea(idea_id: str, db: Session = Depends(get_db)):
-    """Get a specific research idea."""
+async def get_research_idea(idea_id: str, request: Request, db: Session = Depends(get_db)):
+    """Get a specific research idea. Supports conditional requests via ETag and Last-Modified."""
     try:
         logger.info(f"Fetching research idea: {idea_id}")
-        research_idea = db.query(ResearchIdea).filter(ResearchIdea.id == idea_id).first()
-        if not research_idea:
+        current = idea_version(db, idea_id)
+        if current is None:
             logger.warning(f"Research idea not found: {idea_id}")
             raise HTTPException(status_code=404, detail="Research idea not found")
-        return research_idea
+
+        def render() -> bytes:
+            research_idea = (
+                db.query(ResearchIdea)
+                .options(selectinload(ResearchIdea.experiments).selectinload(ExperimentRun.results))
+                .filter(ResearchIdea.id == idea_id)
+                .first()
+            )
+            if not research_idea:
+                raise HTTPException(status_code=404, detail="Research idea not found")
+            return response_serializer.idea(research_idea)
+
+        version, last_modified = current
+        return cached_response(request, "idea", idea_key(idea_id), version, last_modified, render)
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error fetching research idea {idea_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/ideas/{idea_id}/similar", response_model=Dict[str, Any])
+async def get_similar_ideas(
+    idea_id: str,
+    proposal_index: Optional[int] = None,
+    limit: int = 10,
+    threshold: float = 0.0,
+    db: Session = Depends(get_db)
+):
+    """
+    Get the stored proposals most similar to an idea's generated proposals.
+    Ideas without generated proposals are compared by their own title and abstract.
+    """
+    try:
+        research_idea = db.query(ResearchIdea).filter(ResearchIdea.id == idea_id).first()
+        if not research_idea:
+            raise HTTPException(status_code=404, detail="Research idea not found")
+
+        proposals = (research_idea.generated_ideas or {}).get("ideas", [])
+        if proposal_index is not None:
+            if not 0 <= proposal_index < len(proposals):
+                raise HTTPException(status_code=400, detail=f"Proposal index {proposal_index} out of range")
+            indices = [proposal_index]
+        else:
+            indices = list(range(len(proposals)))
+
+        similarity_index.refresh(db)
+        limit = min(max(limit, 1), 100)
+        if indices:
+            texts = [proposal_text(proposals[index]) for index in indices]
+        else:
+            texts = [" ".join([research_idea.title, research_idea.tldr, research_idea.abstract])]
+        # Never report an idea's proposals as similar to themselves
+        own = [(idea_id, index) for index in range(len(proposals))]
+        matches = similarity_index.search(texts, limit=limit, threshold=threshold, exclude=own)
+
+        return {
+            "idea_id": idea_id,
+            "indexed_proposals": len(similarity_index),
+            "results": [
+                {"proposal_index": index, "matches": proposal_matches}
+                for index, proposal_matches in zip(indices or [None], matches)
+            ],
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error finding ideas similar to {idea_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/ideas/{idea_id}/generate", response_model=GenerateIdeasResponse)
-async def generate_research_hypotheses(idea_id: str, db: Session = Depends(get_db)):
-    """Generate research hypotheses for a specific idea as a background task."""
+async def generate_research_hypotheses(
+    idea_id: str,
+    stream: Optional[bool] = None,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: Session = Depends(get_db)
+):
+    """
+    Generate research hypotheses for a specific idea as a background task.
+
+    Repeated requests while generation is running attach to the running task.
+    With ``stream``, model output and tool calls are sent to subscribers of the
+    idea's WebSocket topic as they arrive.
+    """
     try:
         logger.info(f"Starting hypothesis generation for idea: {idea_id}")
-        result = await ai_scientist.generate_ideas(idea_id, db)
+        result = await ai_scientist.generate_ideas(
+            idea_id, db, idempotency_key=idempotency_key, stream=stream
+        )
         logger.info(f"Successfully queued hypothesis generation for idea: {idea_id}")
         return GenerateIdeasResponse(
             status="generating",
             idea_id=idea_id,
             task_id=result.get("task_id")
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating hypotheses for idea {idea_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/ideas/{idea_id}/experiments", response_model=RunExperimentResponse)
-async def run_experiment(idea_id: str, db: Session = Depends(get_db)):
-    """Run an experiment for a specific research idea as a background task."""
+async def run_experiment(
+    idea_id: str,
+    force: bool = False,
+    proposal_index: int = 0,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: Session = Depends(get_db)
+):
+    """
+    Run an experiment for a specific research idea as a background task.
+
+    A completed run with identical inputs is returned instead of starting a
+    new one, unless ``force`` is set. Repeated requests while an experiment
+    for the same proposal is running attach to that run.
+    """
     try:
         logger.info(f"Starting experiment for idea: {idea_id}")
-        result = await ai_scientist.run_experiment(idea_id, db)
+        result = await ai_scientist.run_experiment(
+            idea_id, db, force=force, idempotency_key=idempotency_key, proposal_index=proposal_index
+        )
         logger.info(f"Successfully queued experiment for idea: {idea_id}")
         return RunExperimentResponse(
-            status="pending",
+            status=result.get("status"),
             experiment_id=result.get("experiment_id"),
             idea_id=idea_id,
             task_id=result.get("task_id"),
-            started_at=result.get("started_at")
+            started_at=result.get("started_at"),
+            reused=result.get("reused", False)
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error running experiment for idea {idea_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/ideas/{idea_id}/sweeps", response_model=Dict[str, Any])
+async def run_sweep(idea_id: str, sweep: SweepCreate, db: Session = Depends(get_db)):
+    """Run experiments for all (or the selected) generated proposals of an idea as one batch."""
+    try:
+        logger.info(f"Starting sweep for idea: {idea_id}")
+        return await ai_scientist.run_sweep(
+            idea_id,
+            db,
+            proposals=sweep.proposals,
+            max_concurrency=sweep.max_concurrency,
+            force=sweep.force
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error starting sweep for idea {idea_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/sweeps/{sweep_id}", response_model=Dict[str, Any])
+async def get_sweep_status(sweep_id: str, db: Session = Depends(get_db)):
+    """Get the progress and aggregate results of a sweep."""
+    try:
+        return ai_scientist.get_sweep_status(sweep_id, db)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching sweep {sweep_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/experiments", response_model=List[ExperimentRunResponse])
 async def get_all_experiments(db: Session = Depends(get_db)):
     """Get all experiment runs."""
     try:
         logger.info("Fetching all experiments")
-        experiments = db.query(ExperimentRun).all()
+        experiments = db.query(ExperimentRun).options(selectinload(ExperimentRun.results)).all()
         logger.info(f"Found {len(experiments)} experiments")
-        return experiments
+        return Response(content=response_serializer.experiments(experiments), media_type="application/json")
     except Exception as e:
         logger.error(f"Error fetching experiments: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/experiments/{experiment_id}", response_model=ExperimentRunResponse)
-async def get_experiment_status(experiment_id: str, db: Session = Depends(get_db)):
-    """Get the status of a specific experiment."""
+async def get_experiment_status(experiment_id: str, request: Request, db: Session = Depends(get_db)):
+    """Get the status of a specific experiment. Supports conditional requests via ETag and Last-Modified."""
     try:
         logger.info(f"Fetching experiment status: {experiment_id}")
+        current = experiment_version(db, experiment_id)
+        if current is None:
+            logger.warning(f"Experiment not found: {experiment_id}")
+            raise HTTPException(status_code=404, detail="Experiment not found")
+
+        def render() -> bytes:
+            experiment = (
+                db.query(ExperimentRun)
+                .options(selectinload(ExperimentRun.results))
+                .filter(ExperimentRun.id == experiment_id)
+                .first()
+            )
+            if not experiment:
+                raise HTTPException(status_code=404, detail="Experiment not found")
+            return response_serializer.experiment(experiment)
+
+        version, last_modified = current
+        return cached_response(request, "experiment", experiment_key(experiment_id), version, last_modified, render)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching experiment {experiment_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/experiments/{experiment_id}/interactions", response_model=Dict[str, Any])
+async def get_experiment_interactions(
+    experiment_id: str,
+    stage: Optional[str] = None,
+    offset: int = 0,
+    limit: int = 50,
+    db: Session = Depends(get_db)
+):
+    """Page through the LLM interactions recorded for an experiment."""
+    try:
+        logger.info(f"Fetching interactions for experiment: {experiment_id}")
         experiment = db.query(ExperimentRun).filter(ExperimentRun.id == experiment_id).first()
         if not experiment:
             logger.warning(f"Experiment not found: {experiment_id}")
             raise HTTPException(status_code=404, detail="Experiment not found")
-        return experiment
+
+        reader = InteractionLogReader(experiment.log_folder_path) if experiment.log_folder_path else None
+        if not reader or not reader.exists():
+            raise HTTPException(status_code=404, detail="No interactions recorded for this experiment")
+
+        page = reader.read_page(offset=max(offset, 0), limit=min(max(limit, 1), 500), stage=stage)
+        page["stages"] = reader.stages()
+        return page
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error fetching experiment {experiment_id}: {str(e)}")
+        logger.error(f"Error fetching interactions for experiment {experiment_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/experiments/{experiment_id}/artifacts", response_model=ArtifactListResponse)
+async def list_experiment_artifacts(
+    experiment_id: str,
+    artifact_type: Optional[str] = None,
+    stage: Optional[str] = None,
+    prefix: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """List the files an experiment produced, filtered by type, stage or path prefix."""
+    try:
+        experiment = db.query(ExperimentRun.id).filter(ExperimentRun.id == experiment_id).first()
+        if not experiment:
+            raise HTTPException(status_code=404, detail="Experiment not found")
+
+        query = db.query(ExperimentArtifact).filter(ExperimentArtifact.experiment_id == experiment_id)
+        if artifact_type:
+            query = query.filter(ExperimentArtifact.artifact_type == artifact_type)
+        if stage:
+            query = query.filter(ExperimentArtifact.stage == stage)
+        if prefix:
+            query = query.filter(ExperimentArtifact.path.startswith(prefix, autoescape=True))
+
+        return {
+            "experiment_id": experiment_id,
+            "total": query.count(),
+            "offset": offset,
+            "limit": limit,
+            "artifacts": query.order_by(ExperimentArtifact.path).offset(offset).limit(limit).all(),
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error listing artifacts for experiment {experiment_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.api_route("/experiments/{experiment_id}/artifacts/{path:path}", methods=["GET", "HEAD"])
+async def get_experiment_artifact(experiment_id: str, path: str, request: Request, db: Session = Depends(get_db)):
+    """
+    Download an experiment artifact. Supports Range and If-None-Match requests;
+    artifacts no longer stored locally redirect to a short-lived R2 URL when
+    they were uploaded there.
+    """
+    try:
+        experiment = db.query(ExperimentRun).filter(ExperimentRun.id == experiment_id).first()
+        if not experiment:
+            raise HTTPException(status_code=404, detail="Experiment not found")
+
+        # Only files recorded in the manifest are served
+        artifact = db.query(ExperimentArtifact).filter(
+            ExperimentArtifact.experiment_id == experiment_id,
+            ExperimentArtifact.path == path
+        ).first()
+        if not artifact:
+            raise HTTPException(status_code=404, detail="Artifact not found")
+
+        return serve_artifact(request, experiment, artifact)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error serving artifact {path} of experiment {experiment_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/tasks/{task_id}", response_model=Dict[str, Any])
@@ -186,18 +485,44 @@ async def get_task_status(task_id: str):
         logger.error(f"Error fetching task {task_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/scheduler", response_model=Dict[str, Any])
+async def get_scheduler_status():
+    """Get task lane occupancy and experiment resource reservations."""
+    try:
+        return {
+            "lanes": task_manager.lane_stats(),
+            "resources": resource_scheduler.utilization()
+        }
+    except Exception as e:
+        logger.error(f"Error fetching scheduler status: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/llm/routes", response_model=Dict[str, Any])
+async def get_llm_route_stats():
+    """Get latency percentiles and outcomes per LLM route handled by this worker."""
+    try:
+        return get_all_route_stats()
+    except Exception as e:
+        logger.error(f"Error fetching LLM route stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/tasks/{task_id}/cancel", response_model=StatusResponse)
 async def cancel_task(task_id: str):
-    """Cancel a background task if it's still pending."""
+    """Cancel a background task. Running tasks stop at their next cancellation point."""
     try:
         logger.info(f"Cancelling task: {task_id}")
+        try:
+            was_running = task_manager.get_task_status(task_id)["status"] in ACTIVE_STATUSES
+        except ValueError:
+            # Owned by another worker, which stops it on its next poll
+            was_running = True
         result = task_manager.cancel_task(task_id)
         if result:
             logger.info(f"Successfully cancelled task: {task_id}")
-            return StatusResponse(status="cancelled")
+            return StatusResponse(status="cancelling" if was_running else "cancelled")
         else:
-            logger.warning(f"Task {task_id} could not be cancelled (already running or completed)")
-            return StatusResponse(status="not_cancelled", error_message="Task already running or completed")
+            logger.warning(f"Task {task_id} could not be cancelled (already finished)")
+            return StatusResponse(status="not_cancelled", error_message="Task already finished")
     except ValueError as e:
         logger.error(f"Error cancelling task {task_id}: {str(e)}")
         raise HTTPException(status_code=404, detail=str(e))
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 import json
 
 class Settings(BaseSettings):
@@ -25,6 +25,116 @@ class Settings(BaseSettings):
     R2_ACCESS_KEY_ID: str
     R2_SECRET_ACCESS_KEY: str
 
+    # LLM routing: models tried after the configured one, per-route timeout,
+    # optionally the delay after which a duplicate request is hedged, and how
+    # many timed-out calls a route may leave running before it is skipped
+    LLM_FALLBACK_MODELS: List[str] = []
+    LLM_ROUTE_TIMEOUT_SECONDS: Optional[float] = 300
+    LLM_HEDGE_AFTER_SECONDS: Optional[float] = None
+    LLM_REVIEW_TIMEOUT_SECONDS: Optional[float] = 1800
+    LLM_ROUTER_MAX_WORKERS: int = 16
+    LLM_ROUTER_MAX_ABANDONED_PER_ROUTE: int = 4
+
+    # Ideation: JSON-mode responses where supported, repair attempts for
+    # unparseable responses and the token budget of the previous-ideas section.
+    # JSON mode is opt-in: the upstream prompts describe the ACTION/ARGUMENTS
+    # text format, which the JSON instructions then have to override.
+    IDEATION_STRUCTURED_OUTPUT: bool = False
+    IDEATION_PARSE_REPAIRS: int = 2
+    IDEATION_PREV_IDEAS_MAX_TOKENS: int = 4000
+    IDEATION_PREV_IDEAS_KEEP_RECENT: int = 5
+
+    # Live ideation output for WebSocket subscribers, written as frames of at
+    # most IDEATION_STREAM_FRAME_CHARS characters or FRAME_INTERVAL seconds
+    IDEATION_STREAMING: bool = False
+    IDEATION_STREAM_DIR: str = "ideation_streams"
+    IDEATION_STREAM_FRAME_CHARS: int = 256
+    IDEATION_STREAM_FRAME_INTERVAL_SECONDS: float = 0.1
+    IDEATION_STREAM_POLL_SECONDS: float = 0.1
+    # Finished streams are removed this long after their last frame
+    IDEATION_STREAM_RETENTION_SECONDS: int = 300
+
+    # Near-duplicate detection over generated proposals
+    SIMILARITY_DIMENSIONS: int = 512
+    SIMILARITY_REFRESH_SECONDS: float = 30
+    IDEA_DUPLICATE_THRESHOLD: float = 0.9
+    IDEA_DUPLICATE_ACTION: str = "flag"  # flag: record near-duplicates, reject: ask the model for a different idea
+
+    # Background task lanes (maximum concurrent tasks per lane)
+    IDEATION_LANE_WORKERS: int = 4
+    EXPERIMENT_LANE_WORKERS: int = 4
+    REVIEW_LANE_WORKERS: int = 2
+
+    # Background task registry
+    TASK_RESULTS_DIR: str = "task_results"
+    TASK_RETENTION_SECONDS: int = 3600
+    TASK_REAPER_INTERVAL_SECONDS: int = 300
+    TASK_MAX_FINISHED: int = 1000
+    # Cancellation requests shared by all workers, polled by the worker owning the task
+    TASK_CANCEL_DIR: str = "task_cancel"
+    TASK_CANCEL_POLL_SECONDS: float = 1.0
+
+    # Per-idea single-flight registry and idempotency keys (shared by all workers)
+    SINGLE_FLIGHT_DIR: str = "single_flight"
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+
+    # Experiment resource scheduler (totals default to the node's capacity)
+    SCHEDULER_STATE_DIR: str = "scheduler"
+    SCHEDULER_TOTAL_CPUS: Optional[int] = None
+    SCHEDULER_TOTAL_MEMORY_MB: Optional[int] = None
+    SCHEDULER_CPUS_PER_WORKER: float = 1.0
+    SCHEDULER_MEMORY_MB_PER_WORKER: int = 2048
+    SCHEDULER_PIN_CPUS: bool = False
+
+    # Bulk idea import: rows per executemany batch and default pace of queued generation
+    BULK_IMPORT_BATCH_SIZE: int = 500
+    BULK_GENERATE_RATE_PER_MINUTE: int = 10
+
+    # Default number of a sweep's experiment runs allowed to execute at once
+    SWEEP_MAX_CONCURRENCY: int = 2
+
+    # Per-run limits for experiment process trees (None means unlimited).
+    # RUN_CGROUP_ROOT must be a delegated cgroup v2 directory to enforce
+    # memory, CPU and process limits for the whole tree. RUN_DISK_LIMIT_MB
+    # bounds the run directory and is checked every few seconds.
+    RUN_MEMORY_LIMIT_MB: Optional[int] = None
+    RUN_CPU_TIME_LIMIT_SECONDS: Optional[int] = None
+    RUN_MAX_OPEN_FILES: Optional[int] = 4096
+    RUN_MAX_FILE_SIZE_MB: Optional[int] = None
+    RUN_MAX_PROCESSES: Optional[int] = None
+    RUN_DISK_LIMIT_MB: Optional[int] = None
+    RUN_CGROUP_ROOT: Optional[str] = None
+
+    # How BFTS executes node scripts: "subprocess" (a fresh interpreter per
+    # node, as upstream) or "forkserver" (forked from a preloaded server)
+    BFTS_EXEC_BACKEND: str = "subprocess"
+
+    # How each run gets its own view of the task data when copy_data is set:
+    # "reflink" (copy-on-write) or "copy"; unset tries them in that order.
+    # Filesystems without reflinks (ext4, overlayfs) fall back to a full copy
+    # per run, which is logged as a warning from WORKSPACE_COPY_WARN_MB on.
+    WORKSPACE_STRATEGY: Optional[str] = None
+    WORKSPACE_COPY_WARN_MB: int = 1024
+
+    # Preprocessed task data shared between runs, keyed by content hash
+    DATA_CACHE_DIR: str = "data_cache"
+    DATA_CACHE_MAX_MB: Optional[int] = 20480
+    DATA_CACHE_MIRROR_TO_R2: bool = False
+
+    # Artifact serving. With an nginx internal location aliasing the
+    # experiments directory, local files are sent by nginx via X-Accel-Redirect;
+    # files not on this node redirect to presigned R2 URLs.
+    ARTIFACT_ACCEL_REDIRECT_PREFIX: Optional[str] = None
+    ARTIFACT_PRESIGN_EXPIRES_SECONDS: int = 300
+    # Artifact types uploaded to R2 when a run completes (empty disables uploads)
+    ARTIFACT_UPLOAD_TYPES: List[str] = []
+
+    # Serialized idea and experiment responses kept per worker process; entries
+    # are revalidated against the database version on every read (0 disables)
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1024
+    # Serialized finished experiment runs reused when rendering ideas and run lists (0 disables)
+    SERIALIZED_RUNS_CACHE_MAX_ENTRIES: int = 4096
+
     class Config:
         env_file = ".env"
 
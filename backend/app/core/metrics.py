@@ -0,0 +1,156 @@
+import os
+import time
+from typing import Optional
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    CONTENT_TYPE_LATEST,
+    multiprocess,
+    REGISTRY,
+)
+
+# When running under several uvicorn workers, PROMETHEUS_MULTIPROC_DIR must point
+# at a directory shared by all of them (and be emptied before they start) so each
+# scrape aggregates every worker's samples instead of whichever one answered.
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+STAGE_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200, 14400, 28800, float("inf"))
+LLM_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, float("inf"))
+STORAGE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, float("inf"))
+
+# Background tasks
+TASKS = Gauge(
+    "ai_scientist_tasks",
+    "Background tasks by lane and status",
+    ["lane", "status"],
+    multiprocess_mode="livesum",
+)
+
+# Experiment pipeline
+STAGE_DURATION = Histogram(
+    "ai_scientist_stage_duration_seconds",
+    "Duration of experiment pipeline stages",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+
+# LLM usage
+LLM_LATENCY = Histogram(
+    "ai_scientist_llm_call_latency_seconds",
+    "Approximate latency of LLM calls",
+    ["model"],
+    buckets=LLM_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "ai_scientist_llm_tokens",
+    "LLM tokens consumed",
+    ["model", "type"],
+)
+
+LLM_ROUTE_LATENCY = Histogram(
+    "ai_scientist_llm_route_latency_seconds",
+    "Latency of routed LLM requests by model and outcome",
+    ["model", "outcome"],
+    buckets=LLM_BUCKETS,
+)
+LLM_PARSE_FAILURES = Counter(
+    "ai_scientist_llm_parse_failures",
+    "Unparseable ideation responses by model and outcome (failed, repaired, abandoned)",
+    ["model", "outcome"],
+)
+PROMPT_TOKENS_SAVED = Counter(
+    "ai_scientist_prompt_tokens_saved",
+    "Prompt tokens removed by budgeted prompt construction",
+    ["section"],
+)
+
+# Experiment resource scheduler (node-wide values, identical in every worker)
+SCHEDULER_RESOURCES = Gauge(
+    "ai_scientist_scheduler_resources",
+    "Experiment resource capacity and reservations",
+    ["resource", "state"],
+    multiprocess_mode="mostrecent",
+)
+
+# Run workspaces
+WORKSPACE_PROVISION_SECONDS = Histogram(
+    "ai_scientist_workspace_provision_seconds",
+    "Time to provision a run's data workspace",
+    ["strategy"],
+    buckets=STORAGE_BUCKETS,
+)
+
+# Preprocessed data cache
+DATA_CACHE_REQUESTS = Counter(
+    "ai_scientist_data_cache_requests",
+    "Preprocessed data cache lookups by result (hit, remote_hit, miss)",
+    ["result"],
+)
+DATA_CACHE_BYTES = Gauge(
+    "ai_scientist_data_cache_bytes",
+    "Size of the local preprocessed data cache",
+    multiprocess_mode="mostrecent",
+)
+
+# Object storage
+STORAGE_LATENCY = Histogram(
+    "ai_scientist_storage_operation_seconds",
+    "Latency of R2/S3 operations",
+    ["operation"],
+    buckets=STORAGE_BUCKETS,
+)
+
+# Database connection pool
+DB_POOL_CONNECTIONS = Gauge(
+    "ai_scientist_db_pool_connections",
+    "Database pool connections by state",
+    ["state"],
+    multiprocess_mode="livesum",
+)
+
+# Conditional GET / read-through response cache
+RESPONSE_CACHE_REQUESTS = Counter(
+    "ai_scientist_response_cache_requests",
+    "Cached resource reads by resource and result (hit, miss, not_modified)",
+    ["resource", "result"],
+)
+
+# WebSockets
+WEBSOCKET_CONNECTIONS = Gauge(
+    "ai_scientist_websocket_connections",
+    "Open WebSocket connections",
+    multiprocess_mode="livesum",
+)
+
+
+class StageTimer:
+    """Records the duration of sequential pipeline stages into STAGE_DURATION"""
+
+    def __init__(self):
+        self.stage: Optional[str] = None
+        self._started_at: Optional[float] = None
+
+    def start(self, stage: Optional[str]) -> None:
+        """Finish the current stage (if any) and start timing ``stage``"""
+        now = time.monotonic()
+        if self.stage is not None and self._started_at is not None:
+            STAGE_DURATION.labels(stage=self.stage).observe(now - self._started_at)
+        self.stage = stage
+        self._started_at = now if stage is not None else None
+
+    def stop(self) -> None:
+        self.start(None)
+
+
+def render_metrics() -> bytes:
+    """Render all metrics, aggregated across worker processes when configured"""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -14,6 +14,24 @@ SQLALCHEMY_DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{PO
 engine = create_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+from ..core.metrics import DB_POOL_CONNECTIONS
+
+@event.listens_for(engine, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    DB_POOL_CONNECTIONS.labels(state="open").inc()
+
+@event.listens_for(engine, "close")
+def _on_close(dbapi_connection, connection_record):
+    DB_POOL_CONNECTIONS.labels(state="open").dec()
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_CONNECTIONS.labels(state="checked_out").inc()
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    DB_POOL_CONNECTIONS.labels(state="checked_out").dec()
+
 # Import Base from schema to ensure all models are registered
 from ..models.schema import Base
 
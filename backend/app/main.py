@@ -1,6 +1,7 @@
 import os
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
@@ -12,6 +13,9 @@ from .models.schema import ResearchIdea, ExperimentRun, ExperimentResult
 from .core.logging import get_logger
 from app.api import websockets
 from app.core.config import settings
+from app.core.metrics import render_metrics, CONTENT_TYPE_LATEST
+from app.services.background_tasks import task_manager
+from app.services.idea_import import idea_importer
 
 # Initialize database tables
 Base.metadata.create_all(bind=engine)
@@ -25,7 +29,8 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
-    openapi_url="/api/openapi.json"
+    openapi_url="/api/openapi.json",
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS
@@ -45,10 +50,16 @@ app.include_router(websockets.router, tags=["websockets"])
 @app.on_event("startup")
 async def startup_event():
     logger.info("Starting up AI Scientist Paper Generator API")
+    task_manager.start_reaper()
+    task_manager.start_cancel_watcher()
+    idea_importer.start_pacer()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down AI Scientist Paper Generator API")
+    task_manager.stop_reaper()
+    task_manager.stop_cancel_watcher()
+    idea_importer.stop_pacer()
 
 @app.get("/")
 async def root():
@@ -56,4 +67,8 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"} 
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/metrics")
+async def metrics():
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST) 
\ No newline at end of file
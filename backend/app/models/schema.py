@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, Boolean, ForeignKey, Integer, JSON
+from sqlalchemy import Column, String, Text, DateTime, Boolean, ForeignKey, Integer, BigInteger, Float, JSON, DDL, event, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -22,6 +22,7 @@ class ExperimentStatus(str, Enum):
     RUNNING = "running"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 class ResearchIdea(Base):
     """Model for storing research ideas and their metadata."""
@@ -42,6 +43,39 @@ class ResearchIdea(Base):
 
     # Relationships
     experiments = relationship("ExperimentRun", back_populates="research_idea", cascade="all, delete-orphan")
+    sweeps = relationship("ExperimentSweep", back_populates="research_idea", cascade="all, delete-orphan")
+
+# Full-text search over ideas. The index lives outside the mapped columns so the
+# model stays portable: Postgres gets a generated, weighted tsvector with a GIN
+# index, SQLite an FTS5 table kept in sync by triggers.
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(keywords, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(tldr, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(abstract, '')), 'C') || "
+    "setweight(jsonb_to_tsvector('english', coalesce(generated_ideas, '{}'::jsonb), '[\"string\"]'), 'D')"
+)
+
+SQLITE_FTS_COLUMNS = "new.id, new.title, new.keywords, new.tldr, new.abstract, coalesce(new.generated_ideas, '')"
+
+for _statement in [
+    f"ALTER TABLE research_ideas ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({SEARCH_VECTOR_SQL}) STORED",
+    "CREATE INDEX ix_research_ideas_search_vector ON research_ideas USING gin (search_vector)",
+]:
+    event.listen(ResearchIdea.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+
+for _statement in [
+    "CREATE VIRTUAL TABLE research_ideas_fts USING fts5("
+    "idea_id UNINDEXED, title, keywords, tldr, abstract, proposals)",
+    "CREATE TRIGGER research_ideas_fts_insert AFTER INSERT ON research_ideas BEGIN "
+    f"INSERT INTO research_ideas_fts VALUES ({SQLITE_FTS_COLUMNS}); END",
+    "CREATE TRIGGER research_ideas_fts_update AFTER UPDATE ON research_ideas BEGIN "
+    "DELETE FROM research_ideas_fts WHERE idea_id = old.id; "
+    f"INSERT INTO research_ideas_fts VALUES ({SQLITE_FTS_COLUMNS}); END",
+    "CREATE TRIGGER research_ideas_fts_delete AFTER DELETE ON research_ideas BEGIN "
+    "DELETE FROM research_ideas_fts WHERE idea_id = old.id; END",
+]:
+    event.listen(ResearchIdea.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
 
 class ExperimentRun(Base):
     """Model for tracking experiment runs and their results."""
@@ -55,13 +89,78 @@ class ExperimentRun(Base):
     results_url = Column(String, nullable=True)
     started_at = Column(DateTime, server_default=func.now())
     completed_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     is_successful = Column(Boolean, nullable=True)
     error_message = Column(Text, nullable=True)
     experiment_config = Column(JSON, nullable=True)  # JSON string of experiment configuration
+    token_usage = Column(JSON, nullable=True)  # Per-model token, cost and latency summary
+    total_cost = Column(Float, nullable=True)
+    llm_calls = Column(Integer, nullable=True)
+    llm_latency_seconds = Column(Float, nullable=True)
+    peak_rss_bytes = Column(BigInteger, nullable=True)
+    cpu_seconds = Column(Float, nullable=True)
+    disk_bytes = Column(BigInteger, nullable=True)
+    fingerprint = Column(String(64), nullable=True, index=True)  # Hash of idea, code, settings and pipeline version
+    proposal_index = Column(Integer, nullable=False, default=0, server_default="0")  # Index into generated_ideas["ideas"]
 
     # Relationships
     research_idea = relationship("ResearchIdea", back_populates="experiments")
     results = relationship("ExperimentResult", back_populates="experiment", cascade="all, delete-orphan")
+    artifacts = relationship(
+        "ExperimentArtifact", back_populates="experiment", cascade="all, delete-orphan", passive_deletes=True
+    )
+
+class ExperimentArtifact(Base):
+    """Model for one file produced by an experiment run, recorded as pipeline stages write it."""
+    __tablename__ = "experiment_artifacts"
+    __table_args__ = (UniqueConstraint("experiment_id", "path", name="uq_experiment_artifacts_path"),)
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    experiment_id = Column(String, ForeignKey("experiment_runs.id", ondelete="CASCADE"), nullable=False, index=True)
+    path = Column(String, nullable=False)  # Relative to the experiment directory
+    size_bytes = Column(BigInteger, nullable=False)
+    sha256 = Column(String(64), nullable=False)
+    artifact_type = Column(String, nullable=False)  # pdf, html, image, log, json, code, text, archive, other
+    stage = Column(String, nullable=False)  # Pipeline stage that wrote or last changed the file
+    uploaded = Column(Boolean, nullable=False, default=False, server_default="false")  # Copied to R2
+    created_at = Column(DateTime, server_default=func.now())
+
+    # Relationships
+    experiment = relationship("ExperimentRun", back_populates="artifacts")
+
+class ExperimentSweep(Base):
+    """Model for a batch of experiment runs over several generated proposals of an idea."""
+    __tablename__ = "experiment_sweeps"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    research_idea_id = Column(String, ForeignKey("research_ideas.id", ondelete="CASCADE"), nullable=False)
+    proposals = Column(JSON, nullable=False)  # Indices into generated_ideas["ideas"]
+    max_concurrency = Column(Integer, nullable=False)
+    experiment_ids = Column(JSON, nullable=False)  # Experiment runs belonging to the sweep
+    created_at = Column(DateTime, server_default=func.now())
+
+    # Relationships
+    research_idea = relationship("ResearchIdea", back_populates="sweeps")
+
+class IdeaImportBatch(Base):
+    """Model for tracking a bulk import of research ideas and their queued generation."""
+    __tablename__ = "idea_import_batches"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    status = Column(String, nullable=False, default="importing")  # importing, generating, completed, failed
+    file_format = Column(String, nullable=False)  # jsonl or csv
+    total_rows = Column(Integer, nullable=False, default=0)
+    imported_rows = Column(Integer, nullable=False, default=0)
+    failed_rows = Column(Integer, nullable=False, default=0)
+    errors = Column(JSON, nullable=True)  # First rejected rows with their validation errors
+    idea_ids = Column(JSON, nullable=True)
+    generate = Column(Boolean, nullable=False, default=False)
+    generation_queued = Column(Integer, nullable=False, default=0)
+    generate_interval_seconds = Column(Float, nullable=True)
+    next_generation_at = Column(DateTime, nullable=True)  # When the next idea is due to be queued
+    error_message = Column(Text, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    completed_at = Column(DateTime, nullable=True)
 
 class ExperimentResult(Base):
     """Model for storing detailed experiment results and metrics."""
@@ -77,6 +176,26 @@ class ExperimentResult(Base):
     # Relationships
     experiment = relationship("ExperimentRun", back_populates="results")
 
+# Deleting a run or result bumps its parent's updated_at, so the parent's
+# Last-Modified moves forward even though no remaining row changed. Triggers
+# also cover bulk and cascading deletes that bypass the ORM.
+TOUCH_ON_DELETE = [
+    (ExperimentRun.__table__, "experiment_runs_touch_idea", "research_ideas", "research_idea_id"),
+    (ExperimentResult.__table__, "experiment_results_touch_run", "experiment_runs", "experiment_id"),
+]
+
+for _table, _name, _parent, _column in TOUCH_ON_DELETE:
+    for _statement in [
+        f"CREATE FUNCTION {_name}() RETURNS trigger AS $$ BEGIN "
+        f"UPDATE {_parent} SET updated_at = now() WHERE id = OLD.{_column}; RETURN NULL; END $$ LANGUAGE plpgsql",
+        f"CREATE TRIGGER {_name} AFTER DELETE ON {_table.name} FOR EACH ROW EXECUTE FUNCTION {_name}()",
+    ]:
+        event.listen(_table, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+    event.listen(_table, "after_create", DDL(
+        f"CREATE TRIGGER {_name} AFTER DELETE ON {_table.name} BEGIN "
+        f"UPDATE {_parent} SET updated_at = strftime('%%Y-%%m-%%d %%H:%%M:%%f', 'now') WHERE id = old.{_column}; END"
+    ).execute_if(dialect="sqlite"))
+
 # Base Models
 class ExperimentResultBase(BaseModel):
     id: str
@@ -98,14 +217,45 @@ class ExperimentRunBase(BaseModel):
     results_url: Optional[str] = None
     started_at: datetime
     completed_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
     is_successful: Optional[bool] = None
     error_message: Optional[str] = None
     experiment_config: Optional[Dict[str, Any]] = None
+    token_usage: Optional[Dict[str, Any]] = None
+    total_cost: Optional[float] = None
+    llm_calls: Optional[int] = None
+    llm_latency_seconds: Optional[float] = None
+    peak_rss_bytes: Optional[int] = None
+    cpu_seconds: Optional[float] = None
+    disk_bytes: Optional[int] = None
+    fingerprint: Optional[str] = None
+    proposal_index: int = 0
     results: List[ExperimentResultBase] = []
 
     class Config:
         from_attributes = True
 
+class ExperimentArtifactResponse(BaseModel):
+    id: str
+    experiment_id: str
+    path: str
+    size_bytes: int
+    sha256: str
+    artifact_type: str
+    stage: str
+    uploaded: bool = False
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class ArtifactListResponse(BaseModel):
+    experiment_id: str
+    total: int
+    offset: int
+    limit: int
+    artifacts: List[ExperimentArtifactResponse]
+
 class ResearchIdeaBase(BaseModel):
     id: str
     title: str
@@ -140,6 +290,18 @@ class ResearchIdeaResponse(ResearchIdeaBase):
 class ExperimentRunResponse(ExperimentRunBase):
     pass
 
+class IdeaSearchHit(BaseModel):
+    idea: ResearchIdeaResponse
+    rank: float
+    snippet: Optional[str] = None
+
+class IdeaSearchResponse(BaseModel):
+    query: str
+    total: int
+    offset: int
+    limit: int
+    results: List[IdeaSearchHit]
+
 class ExperimentResultResponse(ExperimentResultBase):
     pass
 
@@ -150,9 +312,17 @@ class StatusResponse(BaseModel):
 
 class GenerateIdeasResponse(StatusResponse):
     idea_id: str
+    task_id: Optional[str] = None
     generated_ideas: Dict[str, Any] = {}
 
+class SweepCreate(BaseModel):
+    proposals: Optional[List[int]] = None  # All generated proposals when omitted
+    max_concurrency: Optional[int] = None
+    force: bool = False
+
 class RunExperimentResponse(StatusResponse):
     experiment_id: str
     idea_id: str
-    started_at: datetime 
\ No newline at end of file
+    task_id: Optional[str] = None
+    started_at: datetime
+    reused: bool = False 
\ No newline at end of file
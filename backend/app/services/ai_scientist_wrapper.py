@@ -1,7 +1,10 @@
 import os
 import json
+import hashlib
 import logging
 import asyncio
+import shutil
+import yaml
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, Any, List, Optional
@@ -9,27 +12,50 @@ from typing import Dict, Any, List, Optional
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
-from ..models.schema import ResearchIdea, ExperimentRun, ExperimentResult, IdeaStatus, ExperimentStatus
+from ..models.schema import (
+    ResearchIdea, ExperimentRun, ExperimentResult, ExperimentArtifact, ExperimentSweep, IdeaStatus, ExperimentStatus
+)
+from ..models.settings import AIScientistSettings
 from ..db.database import get_db
 from .storage import r2_storage
-from .background_tasks import task_manager
+from .background_tasks import (
+    task_manager, current_cancel_token, TaskCancelled, INTERACTIVE_PRIORITY, BATCH_PRIORITY
+)
+from .experiment_process import run_bfts_process
+from .resource_scheduler import resource_scheduler
+from .run_limits import directory_size
+from .workspace import provision_workspace
+from .artifact_manifest import ArtifactManifest
+from .artifact_server import artifact_url
+from .data_cache import data_cache, ENTRY_METADATA
+from .single_flight import single_flight
+from .llm_router import get_router
+from .similarity_index import similarity_index, proposal_text
+from .ideation_stream import ideation_streams, IdeaStream
 from .settings_service import settings_service
+from .token_accounting import track_run, RunTokenTracker
+from ..core.config import settings as app_settings
 from ..core.logging import get_logger
+from ..core.metrics import StageTimer
 
 # Import AI Scientist modules
 from .AI_Scientist_v2.ai_scientist.perform_ideation_temp_free import generate_temp_free_idea
 from .AI_Scientist_v2.ai_scientist.llm import create_client
-from .AI_Scientist_v2.ai_scientist.treesearch.perform_experiments_bfts_with_agentmanager import perform_experiments_bfts
 from .AI_Scientist_v2.ai_scientist.treesearch.bfts_utils import idea_to_markdown, edit_bfts_config_file
+from .AI_Scientist_v2.ai_scientist.treesearch.utils import preproc_data
 from .AI_Scientist_v2.ai_scientist.perform_plotting import aggregate_plots
 from .AI_Scientist_v2.ai_scientist.perform_writeup import perform_writeup
 from .AI_Scientist_v2.ai_scientist.perform_icbinb_writeup import perform_writeup as perform_icbinb_writeup, gather_citations
 from .AI_Scientist_v2.ai_scientist.perform_llm_review import perform_review, load_paper
 from .AI_Scientist_v2.ai_scientist.perform_vlm_review import perform_imgs_cap_ref_review
-from .AI_Scientist_v2.ai_scientist.utils.token_tracker import token_tracker
 
 from .idea_generator import _generate_temp_free_idea
 
+# Bump when pipeline changes should invalidate previously completed runs
+PIPELINE_VERSION = "1"
+
+FINISHED_EXPERIMENT_STATUSES = (ExperimentStatus.COMPLETED, ExperimentStatus.FAILED, ExperimentStatus.CANCELLED)
+
 logger = get_logger("ai_scientist_wrapper")
 
 class AIScientistWrapper:
@@ -44,36 +70,79 @@ class AIScientistWrapper:
         os.makedirs(self.ideas_dir, exist_ok=True)
         os.makedirs(self.experiments_dir, exist_ok=True)
 
-    async def generate_ideas(self, idea_id: str, db: Session) -> Dict[str, Any]:
+    async def generate_ideas(
+        self,
+        idea_id: str,
+        db: Session,
+        idempotency_key: Optional[str] = None,
+        stream: Optional[bool] = None,
+        priority: int = INTERACTIVE_PRIORITY,
+    ) -> Dict[str, Any]:
         """
         Start generating research ideas as a background task.
         Updates the status in the database and returns immediately.
+
+        Only one generation runs per idea across all worker processes; further
+        requests attach to the in-flight task. Requests repeating an
+        ``idempotency_key`` get the original response back. With ``stream``,
+        model output and tool calls are published to the idea's WebSocket topic.
+        Bulk callers pass ``BATCH_PRIORITY`` so interactive requests go first.
         """
+        if stream is None:
+            stream = app_settings.IDEATION_STREAMING
+        flight_key = f"generate:{idea_id}"
         try:
-            # Get the research idea from database
-            research_idea = db.query(ResearchIdea).filter(ResearchIdea.id == idea_id).first()
-            if not research_idea:
-                raise HTTPException(status_code=404, detail="Research idea not found")
+            with single_flight.lock(flight_key):
+                if idempotency_key:
+                    previous_response = single_flight.get_response(f"{flight_key}:{idempotency_key}")
+                    if previous_response:
+                        return previous_response
 
-            # Update status to generating
-            research_idea.status = IdeaStatus.GENERATING
-            db.commit()
-            
-            # Start background task
-            task_id = task_manager.create_task(
-                self._generate_ideas_task,
-                idea_id=idea_id
-            )
-            
-            logger.info(f"Started idea generation task {task_id} for idea {idea_id}")
-            
-            return {
-                "status": "generating",
-                "idea_id": idea_id,
-                "task_id": task_id,
-                "message": "Idea generation started in the background"
-            }
+                # Get the research idea from database
+                research_idea = db.query(ResearchIdea).filter(ResearchIdea.id == idea_id).first()
+                if not research_idea:
+                    raise HTTPException(status_code=404, detail="Research idea not found")
+
+                in_flight = single_flight.in_flight(flight_key)
+                if in_flight:
+                    logger.info(f"Attaching to in-flight idea generation {in_flight['task_id']} for idea {idea_id}")
+                    response = {
+                        "status": "generating",
+                        "idea_id": idea_id,
+                        "task_id": in_flight["task_id"],
+                        "message": "Idea generation already in progress"
+                    }
+                else:
+                    # Update status to generating
+                    research_idea.status = IdeaStatus.GENERATING
+                    db.commit()
+
+                    # Start background task
+                    task_id = task_manager.create_task(
+                        self._generate_ideas_task,
+                        lane="ideation",
+                        priority=priority,
+                        on_cancelled=lambda: single_flight.finish(flight_key),
+                        idea_id=idea_id,
+                        stream=stream
+                    )
+                    single_flight.begin(flight_key, {"task_id": task_id})
+
+                    logger.info(f"Started idea generation task {task_id} for idea {idea_id}")
 
+                    response = {
+                        "status": "generating",
+                        "idea_id": idea_id,
+                        "task_id": task_id,
+                        "message": "Idea generation started in the background"
+                    }
+
+                if idempotency_key:
+                    single_flight.save_response(f"{flight_key}:{idempotency_key}", response)
+                return response
+
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error starting idea generation: {str(e)}")
             
@@ -85,11 +154,33 @@ class AIScientistWrapper:
                 
             raise HTTPException(status_code=500, detail=str(e))
 
-    def _generate_ideas_task(self, idea_id: str) -> Dict[str, Any]:
+    def _generate_ideas_task(self, idea_id: str, stream: bool = False) -> Dict[str, Any]:
         """
         Background task to generate research ideas.
         This runs in a separate thread.
         """
+        idea_stream = ideation_streams.open(idea_id) if stream else None
+        status, error = "completed", None
+        try:
+            with track_run(f"ideation-{idea_id}") as tracker:
+                return self._generate_ideas_pipeline(idea_id, tracker, idea_stream)
+        except TaskCancelled:
+            status = "cancelled"
+            raise
+        except Exception as e:
+            status, error = "failed", str(e)
+            raise
+        finally:
+            if idea_stream:
+                idea_stream.close(status, error)
+                # Finished streams of earlier runs are no longer tailed by anyone
+                ideation_streams.prune()
+            single_flight.finish(f"generate:{idea_id}")
+
+    def _generate_ideas_pipeline(
+        self, idea_id: str, tracker: RunTokenTracker, stream: Optional[IdeaStream] = None
+    ) -> Dict[str, Any]:
+        """Generate research ideas with LLM usage recorded on the given tracker."""
         try:
             # Get a new database session for this thread
             db = next(get_db())
@@ -101,9 +192,21 @@ class AIScientistWrapper:
 
             logger.info(f"Generating ideas for {idea_id}: {research_idea.title}")
             
-            # Create LLM client
-            client, model = create_client(settings_service.get_settings().agent.code.model)
+            # Create LLM client; calls are routed with fallback to the configured models
+            llm_router = get_router(settings_service.get_settings().agent.code.model)
+            client, model = create_client(llm_router.primary_model)
             
+            previous_ideas = (research_idea.generated_ideas or {}).get("ideas", [])
+            near_duplicates = (research_idea.generated_ideas or {}).get("metadata", {}).get("near_duplicates", {})
+            similarity_index.refresh(db)
+
+            def reject_duplicates(proposal: Dict[str, Any]) -> Optional[str]:
+                matches = similarity_index.find_duplicates(proposal, app_settings.IDEA_DUPLICATE_THRESHOLD)
+                if not matches:
+                    return None
+                titles = "; ".join(f"{match['title']} (similarity {match['similarity']})" for match in matches)
+                return f"This idea is a near-duplicate of existing ideas: {titles}. Propose a substantially different idea."
+
             # Generate ideas
             ideas = _generate_temp_free_idea(
                 client=client,
@@ -111,8 +214,22 @@ class AIScientistWrapper:
                 workshop_description=research_idea.abstract,
                 max_num_generations=1,
                 num_reflections=3,
-                previous_ideas=research_idea.generated_ideas.get("ideas", [])
+                previous_ideas=previous_ideas,
+                llm_router=llm_router,
+                duplicate_check=reject_duplicates if app_settings.IDEA_DUPLICATE_ACTION == "reject" else None,
+                stream=stream
             )
+
+            # Flag new proposals that closely match any stored one
+            new_indices = range(len(previous_ideas), len(ideas))
+            matches = similarity_index.search(
+                [proposal_text(ideas[index]) for index in new_indices],
+                limit=5,
+                threshold=app_settings.IDEA_DUPLICATE_THRESHOLD,
+            )
+            for index, proposal_matches in zip(new_indices, matches):
+                if proposal_matches:
+                    near_duplicates[str(index)] = proposal_matches
             
             # Save results to database
             research_idea.status = IdeaStatus.GENERATED
@@ -121,17 +238,21 @@ class AIScientistWrapper:
                 "metadata": {
                     "generated_at": datetime.now().isoformat(),
                     "num_ideas": len(ideas),
-                    "model": model
+                    "model": model,
+                    "token_usage": tracker.get_totals(),
+                    "near_duplicates": near_duplicates
                 }
             }
             db.commit()
+            similarity_index.update_idea(idea_id, ideas, research_idea.updated_at)
             
             logger.info(f"Successfully generated {len(ideas)} ideas for {idea_id}")
             
+            # The generated ideas live on the research idea row; keep the task result small
             return {
                 "idea_id": idea_id,
                 "status": "completed",
-                "generated_ideas": research_idea.generated_ideas
+                "num_ideas": len(ideas)
             }
             
         except Exception as e:
@@ -150,38 +271,277 @@ class AIScientistWrapper:
             
             raise
 
-    async def run_experiment(self, idea_id: str, db: Session) -> Dict[str, Any]:
+    async def run_experiment(
+        self,
+        idea_id: str,
+        db: Session,
+        force: bool = False,
+        idempotency_key: Optional[str] = None,
+        proposal_index: int = 0,
+    ) -> Dict[str, Any]:
         """
-        Start running an experiment as a background task.
+        Start running an experiment on one generated proposal as a background task.
         Updates the status in the database and returns immediately.
+
+        If a completed run with the same fingerprint (proposal, code, settings and
+        pipeline version) exists, it is returned instead unless ``force`` is set.
+        Only one experiment runs per proposal across all worker processes; further
+        requests attach to the in-flight run. Requests repeating an
+        ``idempotency_key`` get the original response back.
+        """
+        flight_key = self._experiment_flight_key(idea_id, proposal_index)
+        try:
+            with single_flight.lock(flight_key):
+                if idempotency_key:
+                    previous_response = single_flight.get_response(f"{flight_key}:{idempotency_key}")
+                    if previous_response:
+                        return previous_response
+
+                # Get the research idea from database
+                research_idea = db.query(ResearchIdea).filter(ResearchIdea.id == idea_id).first()
+                if not research_idea:
+                    raise HTTPException(status_code=404, detail="Research idea not found")
+
+                response = self._submit_experiment(research_idea, db, proposal_index, force, flight_key)
+
+                if idempotency_key:
+                    single_flight.save_response(f"{flight_key}:{idempotency_key}", response)
+                return response
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error starting experiment: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    async def run_sweep(
+        self,
+        idea_id: str,
+        db: Session,
+        proposals: Optional[List[int]] = None,
+        max_concurrency: Optional[int] = None,
+        force: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Start experiments for several generated proposals of an idea as one batch.
+
+        At most ``max_concurrency`` of the sweep's runs execute at once; the rest
+        stay queued in the experiment lane without taking a worker. Proposals
+        with a matching completed or in-flight run reuse it instead of starting another.
         """
         try:
-            # Get the research idea from database
             research_idea = db.query(ResearchIdea).filter(ResearchIdea.id == idea_id).first()
             if not research_idea:
                 raise HTTPException(status_code=404, detail="Research idea not found")
 
+            ideas = (research_idea.generated_ideas or {}).get("ideas", [])
+            if not ideas:
+                raise HTTPException(status_code=400, detail="No ideas found. Generate ideas first")
+            if proposals is None:
+                proposals = list(range(len(ideas)))
+            proposals = sorted(set(proposals))
+            invalid = [index for index in proposals if not 0 <= index < len(ideas)]
+            if invalid or not proposals:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Proposals must be between 0 and {len(ideas) - 1}, got {invalid or proposals}"
+                )
+
+            sweep = ExperimentSweep(
+                research_idea_id=idea_id,
+                proposals=proposals,
+                max_concurrency=max(max_concurrency or app_settings.SWEEP_MAX_CONCURRENCY, 1),
+                experiment_ids=[]
+            )
+            db.add(sweep)
+            db.commit()
+            db.refresh(sweep)
+
+            experiments = []
+            for proposal_index in proposals:
+                flight_key = self._experiment_flight_key(idea_id, proposal_index)
+                with single_flight.lock(flight_key):
+                    response = self._submit_experiment(
+                        research_idea, db, proposal_index, force, flight_key, sweep=sweep
+                    )
+                experiments.append({
+                    "proposal_index": proposal_index,
+                    "experiment_id": response["experiment_id"],
+                    "task_id": response["task_id"],
+                    "status": response["status"],
+                    "reused": response.get("reused", False)
+                })
+
+            sweep.experiment_ids = [experiment["experiment_id"] for experiment in experiments]
+            db.commit()
+
+            logger.info(f"Started sweep {sweep.id} over {len(proposals)} proposals of idea {idea_id}")
+
+            return {
+                "sweep_id": sweep.id,
+                "idea_id": idea_id,
+                "max_concurrency": sweep.max_concurrency,
+                "experiments": experiments
+            }
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error starting sweep: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    def get_sweep_status(self, sweep_id: str, db: Session) -> Dict[str, Any]:
+        """Progress of a sweep and aggregate results of its finished runs."""
+        sweep = db.query(ExperimentSweep).filter(ExperimentSweep.id == sweep_id).first()
+        if not sweep:
+            raise HTTPException(status_code=404, detail="Sweep not found")
+
+        runs = db.query(ExperimentRun).filter(ExperimentRun.id.in_(sweep.experiment_ids or [])).all()
+        ideas = (sweep.research_idea.generated_ideas or {}).get("ideas", [])
+
+        counts: Dict[str, int] = {}
+        for run in runs:
+            counts[run.status] = counts.get(run.status, 0) + 1
+        finished = [run for run in runs if run.status in FINISHED_EXPERIMENT_STATUSES]
+        completed = [run for run in runs if run.status == ExperimentStatus.COMPLETED]
+
+        return {
+            "sweep_id": sweep.id,
+            "idea_id": sweep.research_idea_id,
+            "max_concurrency": sweep.max_concurrency,
+            "created_at": sweep.created_at,
+            "total": len(runs),
+            "finished": len(finished),
+            "progress": len(finished) / len(runs) if runs else 0.0,
+            "status_counts": counts,
+            "results": {
+                "completed": len(completed),
+                "successful": sum(1 for run in completed if run.is_successful),
+                "total_cost": sum(run.total_cost or 0.0 for run in runs),
+                "llm_calls": sum(run.llm_calls or 0 for run in runs),
+                "cpu_seconds": sum(run.cpu_seconds or 0.0 for run in runs)
+            },
+            "experiments": [
+                {
+                    "proposal_index": run.proposal_index,
+                    "title": ideas[run.proposal_index].get("Title") if run.proposal_index < len(ideas) else None,
+                    "experiment_id": run.id,
+                    "status": run.status,
+                    "is_successful": run.is_successful,
+                    "total_cost": run.total_cost,
+                    "results_url": run.results_url,
+                    "error_message": run.error_message
+                }
+                for run in sorted(runs, key=lambda run: run.proposal_index)
+            ]
+        }
+
+    @staticmethod
+    def _experiment_flight_key(idea_id: str, proposal_index: int) -> str:
+        return f"experiment:{idea_id}:{proposal_index}"
+
+    def _submit_experiment(
+        self,
+        research_idea: ResearchIdea,
+        db: Session,
+        proposal_index: int,
+        force: bool,
+        flight_key: str,
+        sweep: Optional[ExperimentSweep] = None,
+    ) -> Dict[str, Any]:
+        """Attach to the proposal's in-flight run or start one; call while holding its flight lock."""
+        ideas = (research_idea.generated_ideas or {}).get("ideas", [])
+        if ideas and not 0 <= proposal_index < len(ideas):
+            raise HTTPException(
+                status_code=400, detail=f"Proposal index must be between 0 and {len(ideas) - 1}"
+            )
+
+        in_flight = single_flight.in_flight(flight_key)
+        if in_flight:
+            logger.info(f"Attaching to in-flight experiment {in_flight['experiment_id']} for idea {research_idea.id}")
+            return {
+                "status": "pending",
+                "experiment_id": in_flight["experiment_id"],
+                "idea_id": research_idea.id,
+                "task_id": in_flight["task_id"],
+                "message": "Experiment already in progress",
+                "started_at": in_flight["experiment_started_at"]
+            }
+        return self._start_experiment(research_idea, db, proposal_index, force, flight_key, sweep)
+
+    def _start_experiment(
+        self,
+        research_idea: ResearchIdea,
+        db: Session,
+        proposal_index: int,
+        force: bool,
+        flight_key: str,
+        sweep: Optional[ExperimentSweep] = None,
+    ) -> Dict[str, Any]:
+        """Reuse a matching completed run or create a run and queue its task."""
+        idea_id = research_idea.id
+        fingerprint = self._run_fingerprint(research_idea, settings_service.get_settings(), proposal_index)
+        if fingerprint and not force:
+            previous_run = db.query(ExperimentRun).filter(
+                ExperimentRun.fingerprint == fingerprint,
+                ExperimentRun.status == ExperimentStatus.COMPLETED
+            ).order_by(ExperimentRun.completed_at.desc()).first()
+            if previous_run:
+                logger.info(f"Reusing completed experiment {previous_run.id} for idea {idea_id}")
+                return {
+                    "status": previous_run.status,
+                    "experiment_id": previous_run.id,
+                    "idea_id": idea_id,
+                    "task_id": None,
+                    "message": "Identical experiment already completed; pass force to run it again",
+                    "started_at": previous_run.started_at,
+                    "reused": True
+                }
+
+        try:
             # Create experiment run record
             experiment_run = ExperimentRun(
                 research_idea_id=idea_id,
-                status=ExperimentStatus.PENDING
+                status=ExperimentStatus.PENDING,
+                fingerprint=fingerprint,
+                proposal_index=proposal_index
             )
             db.add(experiment_run)
             db.commit()
             db.refresh(experiment_run)
-            
+            experiment_id = experiment_run.id
+
+            def on_cancelled():
+                self._mark_experiment_cancelled(experiment_id)
+                single_flight.finish(flight_key)
+
+            # Sweep runs queue behind runs a user started directly
+            priority = BATCH_PRIORITY if sweep else INTERACTIVE_PRIORITY
+
             # Start background task
             task_id = task_manager.create_task(
                 self._run_experiment_task,
+                lane="experiment",
+                priority=priority,
+                on_cancelled=on_cancelled,
+                group=sweep.id if sweep else None,
+                group_limit=sweep.max_concurrency if sweep else None,
                 idea_id=idea_id,
-                experiment_id=experiment_run.id
+                experiment_id=experiment_id,
+                flight_key=flight_key,
+                review_priority=priority
             )
-            
-            logger.info(f"Started experiment task {task_id} for idea {idea_id}")
-            
+            single_flight.begin(flight_key, {
+                "task_id": task_id,
+                "experiment_id": experiment_id,
+                "experiment_started_at": experiment_run.started_at
+            })
+
+            logger.info(f"Started experiment task {task_id} for idea {idea_id} proposal {proposal_index}")
+
             return {
                 "status": "pending",
-                "experiment_id": experiment_run.id,
+                "experiment_id": experiment_id,
                 "idea_id": idea_id,
                 "task_id": task_id,
                 "message": "Experiment started in the background",
@@ -189,21 +549,340 @@ class AIScientistWrapper:
             }
 
         except Exception as e:
-            logger.error(f"Error starting experiment: {str(e)}")
-            
             # Update status to failed if experiment_run was created
             if 'experiment_run' in locals() and experiment_run:
                 experiment_run.status = ExperimentStatus.FAILED
                 experiment_run.error_message = str(e)
                 db.commit()
-                
-            raise HTTPException(status_code=500, detail=str(e))
+            raise
+
+    def _load_idea_code(self, research_idea: ResearchIdea) -> Optional[str]:
+        """Read the idea's uploaded code file, if it has one."""
+        if not research_idea.code_file_path:
+            return None
+        code_path = self.ideas_dir / research_idea.id / f"{research_idea.id}.py"
+        # TODO: Download code file from R2 if needed
+        if not code_path.exists():
+            return None
+        with open(code_path, "r") as f:
+            return f.read()
 
-    def _run_experiment_task(self, idea_id: str, experiment_id: str) -> Dict[str, Any]:
+    def _run_fingerprint(
+        self, research_idea: ResearchIdea, ai_settings: AIScientistSettings, proposal_index: int = 0
+    ) -> Optional[str]:
         """
-        Background task to run an experiment.
-        This runs in a separate thread.
+        Hash everything that determines an experiment's outcome.
+
+        Returns:
+            Hex digest, or None if the idea has no such generated proposal yet
+        """
+        ideas = (research_idea.generated_ideas or {}).get("ideas", [])
+        if not 0 <= proposal_index < len(ideas):
+            return None
+        payload = {
+            "idea": ideas[proposal_index],
+            "code": self._load_idea_code(research_idea),
+            "settings": ai_settings.model_dump(),
+            "pipeline_version": PIPELINE_VERSION,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _run_experiment_task(
+        self,
+        idea_id: str,
+        experiment_id: str,
+        flight_key: Optional[str] = None,
+        review_priority: int = INTERACTIVE_PRIORITY,
+    ) -> Dict[str, Any]:
+        """
+        Background task to run an experiment up to its writeup.
+        This runs in a separate thread; the review is queued on the review lane.
+        """
+        flight_key = flight_key or self._experiment_flight_key(idea_id, 0)
+        stage_timer = StageTimer()
+        request = resource_scheduler.estimate(settings_service.get_settings())
+        review_task_id = None
+        try:
+            # Wait (reported as waiting_for_resources) until the node has room for this run's workers;
+            # sweep runs over the sweep's budget are held back in the lane queue
+            task_manager.set_current_task_status("waiting_for_resources")
+            with resource_scheduler.reserve(
+                experiment_id, request, current_cancel_token()
+            ) as reservation, track_run(experiment_id) as tracker:
+                task_manager.set_current_task_status("running")
+                handoff = self._run_experiment_pipeline(
+                    idea_id, experiment_id, tracker, stage_timer, reservation.get("cpuset"), reservation.get("cpus")
+                )
+            try:
+                review_task_id = self._queue_review(idea_id, experiment_id, flight_key, review_priority, handoff)
+            except Exception as e:
+                logger.error(f"Error queueing review of experiment {experiment_id}: {str(e)}")
+                self._mark_experiment_failed(
+                    experiment_id, e, tracker, handoff["resource_usage"], Path(handoff["experiment_dir"])
+                )
+                raise
+            return {
+                "experiment_id": experiment_id,
+                "idea_id": idea_id,
+                "status": "reviewing",
+                "review_task_id": review_task_id
+            }
+        except TaskCancelled:
+            # Cancelled while waiting for resources; the pipeline handles later cancellations
+            if 'tracker' not in locals():
+                self._mark_experiment_cancelled(experiment_id)
+            raise
+        finally:
+            stage_timer.stop()
+            data_cache.release(experiment_id)
+            if review_task_id is None:
+                single_flight.finish(flight_key)
+
+    def _queue_review(
+        self, idea_id: str, experiment_id: str, flight_key: str, priority: int, handoff: Dict[str, Any]
+    ) -> str:
+        """
+        Queue the review and finalization of a run on the review lane.
+
+        Reviewing only waits on LLM calls, so the run gives back its node
+        resources and experiment lane slot instead of holding them meanwhile.
+        The proposal's in-flight entry moves to the review task.
+        """
+        experiment_dir = Path(handoff["experiment_dir"])
+
+        def on_cancelled():
+            tracker = RunTokenTracker(experiment_id)
+            tracker.merge_counts(handoff["token_counts"])
+            self._mark_experiment_cancelled(experiment_id, tracker, experiment_dir)
+            single_flight.finish(flight_key)
+
+        # Held while registering, so a review finishing right away cannot clear the entry first
+        with single_flight.lock(flight_key):
+            in_flight = single_flight.in_flight(flight_key) or {}
+            task_id = task_manager.create_task(
+                self._run_review_task,
+                lane="review",
+                priority=priority,
+                on_cancelled=on_cancelled,
+                idea_id=idea_id,
+                experiment_id=experiment_id,
+                flight_key=flight_key,
+                handoff=handoff
+            )
+            single_flight.begin(flight_key, {
+                "task_id": task_id,
+                "experiment_id": experiment_id,
+                "experiment_started_at": in_flight.get("experiment_started_at")
+            })
+        logger.info(f"Queued review task {task_id} for experiment {experiment_id}")
+        return task_id
+
+    def _run_review_task(
+        self, idea_id: str, experiment_id: str, flight_key: str, handoff: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Background task to review and finalize an experiment.
+        This runs in a separate thread on the review lane.
         """
+        stage_timer = StageTimer()
+        try:
+            with track_run(experiment_id, output_dir=Path(handoff["experiment_dir"])) as tracker:
+                # Usage of the earlier stages, so the run's totals cover the whole pipeline
+                tracker.merge_counts(handoff["token_counts"])
+                return self._run_review_pipeline(idea_id, experiment_id, tracker, stage_timer, handoff)
+        finally:
+            stage_timer.stop()
+            single_flight.finish(flight_key)
+
+    def _enter_stage(
+        self,
+        tracker: RunTokenTracker,
+        stage_timer: StageTimer,
+        stage: Optional[str],
+        manifest: Optional[ArtifactManifest] = None,
+        db: Optional[Session] = None,
+    ) -> None:
+        """
+        Mark the start of a pipeline stage for token accounting and stage metrics.
+        Stage boundaries are also where cancellation requests take effect and
+        where files written by the previous stage are added to the artifact manifest.
+        """
+        current_cancel_token().raise_if_cancelled()
+        if manifest is not None:
+            manifest.update(stage_timer.stage or "setup", db)
+        tracker.set_stage(stage)
+        stage_timer.start(stage)
+
+    def _provision_run_data(
+        self, ai_settings: AIScientistSettings, config_path: str, experiment_dir: Path, experiment_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Give the run an isolated view of the task data and point its BFTS config at it.
+
+        Preprocessed data comes from the shared content-addressed cache, so
+        identical data is only preprocessed once. BFTS then only symlinks from
+        the run's view instead of copying or preprocessing the dataset itself,
+        so the data is cloned (or copied) once per run. Cache entries are
+        shared by every run, so runs always get their own view of them, even
+        without ``copy_data``; the entry is pinned until that view exists.
+
+        Returns:
+            Cache lookup and provisioning details, or None if there was nothing to provision
+        """
+        data_dir = Path(ai_settings.data_dir)
+        if not (ai_settings.copy_data or ai_settings.preprocess_data) or not data_dir.is_dir():
+            return None
+
+        workspace_info: Dict[str, Any] = {}
+        config_updates: Dict[str, Any] = {}
+
+        if ai_settings.preprocess_data:
+            data_dir, workspace_info["data_cache"] = data_cache.get_or_build(
+                data_dir, preproc_data, config={"preprocess_data": True}, pin=experiment_id
+            )
+            config_updates["preprocess_data"] = False
+
+        workspace_info.update(provision_workspace(
+            data_dir, experiment_dir / "data", strategy=app_settings.WORKSPACE_STRATEGY,
+            exclude=ENTRY_METADATA if ai_settings.preprocess_data else (),
+        ))
+        config_updates["data_dir"] = str((experiment_dir / "data").resolve())
+        config_updates["copy_data"] = False
+        # The run has its own copy now
+        data_cache.release(experiment_id)
+
+        with open(config_path, "r") as f:
+            config = yaml.safe_load(f)
+        config.update(config_updates)
+        with open(config_path, "w") as f:
+            yaml.dump(config, f, default_flow_style=False)
+
+        return workspace_info
+
+    def _upload_artifacts(
+        self, manifest: ArtifactManifest, experiment_dir: Path, r2_key_base: str, db: Session
+    ) -> None:
+        """Upload the artifact types in ARTIFACT_UPLOAD_TYPES below the run's R2 prefix and mark them uploaded."""
+        paths = [
+            path for path, entry in manifest.entries.items()
+            if entry["artifact_type"] in app_settings.ARTIFACT_UPLOAD_TYPES
+        ]
+        if not paths:
+            return
+
+        uploaded: List[str] = []
+
+        async def upload_all():
+            for path in paths:
+                await r2_storage.upload_file(str(experiment_dir / path), f"{r2_key_base}/{path}")
+                uploaded.append(path)
+
+        try:
+            asyncio.run(upload_all())
+            logger.info(f"Uploaded {len(paths)} artifacts to {r2_key_base}")
+        except Exception as e:
+            # The files remain servable from the local run directory
+            logger.warning(f"Failed to upload artifacts to {r2_key_base}: {str(e)}")
+
+        # Only uploaded artifacts may be redirected to R2 once the run directory is gone
+        for start in range(0, len(uploaded), 500):
+            db.query(ExperimentArtifact).filter(
+                ExperimentArtifact.experiment_id == manifest.experiment_id,
+                ExperimentArtifact.path.in_(uploaded[start:start + 500]),
+            ).update({"uploaded": True}, synchronize_session=False)
+
+    def _record_token_usage(self, experiment_run: ExperimentRun, tracker: RunTokenTracker) -> None:
+        """Copy the run's token, cost and latency totals onto the experiment row."""
+        totals = tracker.get_totals()
+        experiment_run.token_usage = tracker.get_summary()
+        experiment_run.total_cost = totals["total_cost"]
+        experiment_run.llm_calls = totals["llm_calls"]
+        experiment_run.llm_latency_seconds = totals["llm_latency_seconds"]
+
+    def _record_resource_usage(
+        self, experiment_run: ExperimentRun, resource_usage: Dict[str, Any], experiment_dir: Optional[Path]
+    ) -> None:
+        """Copy the run's peak memory, CPU time and disk usage onto the experiment row."""
+        experiment_run.peak_rss_bytes = resource_usage.get("peak_rss_bytes")
+        experiment_run.cpu_seconds = resource_usage.get("cpu_seconds")
+        if experiment_dir and experiment_dir.exists():
+            experiment_run.disk_bytes = directory_size(experiment_dir)
+
+    def _mark_experiment_cancelled(
+        self, experiment_id: str, tracker: Optional[RunTokenTracker] = None, experiment_dir: Optional[Path] = None
+    ) -> None:
+        """Record a cancelled experiment and remove its partial artifacts."""
+        try:
+            db = next(get_db())
+            experiment_run = db.query(ExperimentRun).filter(ExperimentRun.id == experiment_id).first()
+            if experiment_run:
+                experiment_run.status = ExperimentStatus.CANCELLED
+                experiment_run.error_message = "Experiment was cancelled"
+                experiment_run.completed_at = datetime.now()
+                experiment_run.is_successful = False
+                if experiment_dir:
+                    experiment_run.log_folder_path = None
+                    # Drop the manifest with the files, in the same transaction as the status
+                    db.query(ExperimentArtifact).filter(
+                        ExperimentArtifact.experiment_id == experiment_id
+                    ).delete(synchronize_session=False)
+                if tracker:
+                    self._record_token_usage(experiment_run, tracker)
+                db.commit()
+        except Exception as db_error:
+            logger.error(f"Failed to update database: {str(db_error)}")
+
+        if experiment_dir and experiment_dir.exists():
+            shutil.rmtree(experiment_dir, ignore_errors=True)
+            logger.info(f"Removed partial artifacts of cancelled experiment {experiment_id}")
+
+    def _mark_experiment_failed(
+        self,
+        experiment_id: str,
+        error: Exception,
+        tracker: RunTokenTracker,
+        resource_usage: Dict[str, Any],
+        experiment_dir: Optional[Path] = None,
+        manifest: Optional[ArtifactManifest] = None,
+        stage: Optional[str] = None,
+    ) -> None:
+        """Record a failed experiment, keeping what the failed stage produced for inspection."""
+        try:
+            db = next(get_db())
+            if manifest is not None:
+                try:
+                    manifest.update(stage or "setup", db)
+                except Exception as manifest_error:
+                    db.rollback()
+                    logger.warning(f"Failed to record artifacts of experiment {experiment_id}: {str(manifest_error)}")
+            experiment_run = db.query(ExperimentRun).filter(ExperimentRun.id == experiment_id).first()
+            if experiment_run:
+                experiment_run.status = ExperimentStatus.FAILED
+                experiment_run.error_message = str(error)
+                experiment_run.completed_at = datetime.now()
+                experiment_run.is_successful = False
+                self._record_token_usage(experiment_run, tracker)
+                self._record_resource_usage(experiment_run, resource_usage, experiment_dir)
+                db.commit()
+        except Exception as db_error:
+            logger.error(f"Failed to update database: {str(db_error)}")
+
+    def _run_experiment_pipeline(
+        self,
+        idea_id: str,
+        experiment_id: str,
+        tracker: RunTokenTracker,
+        stage_timer: StageTimer,
+        cpuset: Optional[List[int]] = None,
+        cpus: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run the experiment pipeline up to the writeup with LLM usage recorded on the given tracker.
+
+        Returns:
+            What the review task needs to finish the run
+        """
+        resource_usage: Dict[str, Any] = {}
         try:
             # Get a new database session for this thread
             db = next(get_db())
@@ -226,22 +905,19 @@ class AIScientistWrapper:
             # Get idea JSON file
             idea_dir = self.ideas_dir / idea_id
             os.makedirs(idea_dir, exist_ok=True)
-            idea_json_path = idea_dir / f"{idea_id}.json"
+            proposal_index = experiment_run.proposal_index or 0
+            proposal_suffix = f"_{proposal_index}" if proposal_index else ""
+            idea_json_path = idea_dir / f"{idea_id}{proposal_suffix}.json"
             
             # Get code file if available
-            code_path = None
-            code = None
-            if research_idea.code_file_path:
-                code_path = idea_dir / f"{idea_id}.py"
-                # TODO: Download code file from R2 if needed
-                if code_path.exists():
-                    with open(code_path, "r") as f:
-                        code = f.read()
+            code = self._load_idea_code(research_idea)
             
             # Create experiment directory
             timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            experiment_dir = self.experiments_dir / f"{timestamp}_{idea_id}"
+            experiment_dir = self.experiments_dir / f"{timestamp}_{idea_id}{proposal_suffix}"
             os.makedirs(experiment_dir, exist_ok=True)
+            tracker.set_output_dir(experiment_dir)
+            manifest = ArtifactManifest(experiment_id, experiment_dir)
             
             # Save reference to log folder
             experiment_run.log_folder_path = str(experiment_dir)
@@ -252,14 +928,17 @@ class AIScientistWrapper:
             
             if not ideas:
                 raise Exception("No ideas found. Generate ideas first")
+            if proposal_index >= len(ideas):
+                raise Exception(f"Proposal {proposal_index} not found; only {len(ideas)} ideas were generated")
+            proposal = ideas[proposal_index]
 
             # Add code to idea json if it exists
             if code is not None:
-                ideas[0]["Code"] = code
+                proposal["Code"] = code
 
             # Create ideas JSON file from ideas
             with open(idea_json_path, "w") as f:
-                json.dump(ideas[0], f, indent=4)
+                json.dump(proposal, f, indent=4)
             
             # Get settings
             settings = settings_service.get_settings()
@@ -271,14 +950,27 @@ class AIScientistWrapper:
                 str(experiment_dir),
                 str(idea_json_path)
             )
+            workspace_info = self._provision_run_data(settings, idea_config_path, experiment_dir, experiment_id)
+            if workspace_info:
+                experiment_run.experiment_config = {
+                    **(experiment_run.experiment_config or {}),
+                    "workspace": workspace_info,
+                }
+                db.commit()
             
-            # Run experiments
-            perform_experiments_bfts(idea_config_path)
+            # Run experiments in a separate process group so cancellation can stop them
+            self._enter_stage(tracker, stage_timer, "bfts", manifest, db)
+            run_bfts_process(
+                idea_config_path, experiment_id, experiment_dir, tracker, current_cancel_token(),
+                cpuset=cpuset, cpus=cpus, resource_usage=resource_usage
+            )
             
             # Aggregate plots
+            self._enter_stage(tracker, stage_timer, "plots", manifest, db)
             aggregate_plots(base_folder=str(experiment_dir), model=settings.agent.code.model)
             
             # Gather citations
+            self._enter_stage(tracker, stage_timer, "citations", manifest, db)
             citations_text = gather_citations(
                 str(experiment_dir),
                 num_cite_rounds=10,
@@ -286,6 +978,7 @@ class AIScientistWrapper:
             )
             
             # Generate writeup
+            self._enter_stage(tracker, stage_timer, "writeup", manifest, db)
             writeup_success = perform_icbinb_writeup(
                 base_folder=str(experiment_dir),
                 big_model=settings.report.model,
@@ -296,17 +989,70 @@ class AIScientistWrapper:
             if not writeup_success:
                 logger.warning(f"Failed to generate writeup for experiment {experiment_id}")
             
+            # Record the writeup's files; the review task picks the manifest up from here
+            current_cancel_token().raise_if_cancelled()
+            manifest.update(stage_timer.stage, db)
+            return {
+                "experiment_dir": str(experiment_dir),
+                "review_model": settings.agent.code.model,
+                "resource_usage": resource_usage,
+                "token_counts": tracker.export_counts()
+            }
+            
+        except TaskCancelled:
+            logger.info(f"Experiment {experiment_id} for idea {idea_id} was cancelled")
+            self._mark_experiment_cancelled(
+                experiment_id, tracker, experiment_dir if 'experiment_dir' in locals() else None
+            )
+            raise
+            
+        except Exception as e:
+            logger.error(f"Error running experiment: {str(e)}")
+            self._mark_experiment_failed(
+                experiment_id, e, tracker, resource_usage,
+                experiment_dir if 'experiment_dir' in locals() else None,
+                manifest if 'manifest' in locals() else None,
+                stage_timer.stage
+            )
+            raise
+
+    def _run_review_pipeline(
+        self,
+        idea_id: str,
+        experiment_id: str,
+        tracker: RunTokenTracker,
+        stage_timer: StageTimer,
+        handoff: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Review the run's paper, then record and upload its results."""
+        experiment_dir = Path(handoff["experiment_dir"])
+        resource_usage = handoff["resource_usage"]
+        try:
+            db = next(get_db())
+            experiment_run = db.query(ExperimentRun).filter(ExperimentRun.id == experiment_id).first()
+            if not experiment_run:
+                raise Exception("Experiment run not found")
+            manifest = ArtifactManifest.load(experiment_id, experiment_dir, db)
+            
             # Perform review if we have a PDF
-            pdf_path = None
-            for pdf_file in experiment_dir.glob("*.pdf"):
-                pdf_path = pdf_file
-                break
+            self._enter_stage(tracker, stage_timer, "review")
+            pdf_files = manifest.find("pdf", top_level=True)
+            pdf_path = experiment_dir / pdf_files[0] if pdf_files else None
                 
             if pdf_path and pdf_path.exists():
                 paper_content = load_paper(str(pdf_path))
-                client, model = create_client(settings.agent.code.model)
-                review_text = perform_review(paper_content, model, client)
-                review_img_cap_ref = perform_imgs_cap_ref_review(client, model, str(pdf_path))
+                # Each review is routed as a whole, falling back to the next model on failure
+                llm_router = get_router(handoff["review_model"])
+                review_text = llm_router.run(
+                    lambda client, model: perform_review(paper_content, model, client),
+                    timeout_seconds=app_settings.LLM_REVIEW_TIMEOUT_SECONDS,
+                    hedge=False
+                )
+                review_img_cap_ref = llm_router.run(
+                    lambda client, model: perform_imgs_cap_ref_review(client, model, str(pdf_path)),
+                    timeout_seconds=app_settings.LLM_REVIEW_TIMEOUT_SECONDS,
+                    hedge=False
+                )
                 
                 # Save reviews
                 with open(experiment_dir / "review_text.txt", "w") as f:
@@ -314,34 +1060,30 @@ class AIScientistWrapper:
                 with open(experiment_dir / "review_img_cap_ref.json", "w") as f:
                     json.dump(review_img_cap_ref, f, indent=4)
             
-            # Save token tracker data
+            # Save token tracker data for this run only; interactions are
+            # already streamed to the compressed interaction log
+            self._enter_stage(tracker, stage_timer, None, manifest, db)
             with open(experiment_dir / "token_tracker.json", "w") as f:
-                json.dump(token_tracker.get_summary(), f)
-            with open(experiment_dir / "token_tracker_interactions.json", "w") as f:
-                json.dump(token_tracker.get_interactions(), f)
-            
-            # Upload results to R2
-            r2_key_base = f"experiments/{idea_id}/{experiment_id}"
-            results_url = f"{r2_storage.endpoint_url}/{r2_storage.bucket_name}/{r2_key_base}"
+                json.dump(tracker.get_summary(), f)
+            manifest.update("finalize", db)
             
-            # Find HTML file
-            html_path = None
-            for html_file in experiment_dir.glob("**/unified_tree_viz.html"):
-                html_path = html_file
-                break
+            # Upload the configured artifact types to R2; the artifacts endpoint
+            # serves every file either way, redirecting to R2 once it is uploaded
+            self._upload_artifacts(manifest, experiment_dir, f"experiments/{idea_id}/{experiment_id}", db)
+            results_url = artifact_url(experiment_id)
+            html_files = manifest.find(name="unified_tree_viz.html")
             
             # Update experiment status
             experiment_run.status = ExperimentStatus.COMPLETED
             experiment_run.completed_at = datetime.now()
             experiment_run.is_successful = True
             experiment_run.results_url = results_url
-            if html_path:
-                experiment_run.html_file_path = f"{r2_key_base}/{html_path.relative_to(experiment_dir)}"
+            self._record_token_usage(experiment_run, tracker)
+            self._record_resource_usage(experiment_run, resource_usage, experiment_dir)
+            if html_files:
+                experiment_run.html_file_path = artifact_url(experiment_id, html_files[0])
             db.commit()
             
-            # TODO: Upload all files to R2 storage
-            # This should be done in small batches to avoid overloading the system
-            
             logger.info(f"Successfully completed experiment {experiment_id} for idea {idea_id}")
             
             return {
@@ -352,22 +1094,17 @@ class AIScientistWrapper:
                 "html_file_path": experiment_run.html_file_path
             }
             
-        except Exception as e:
-            logger.error(f"Error running experiment: {str(e)}")
-            
-            # Update status to failed
-            try:
-                db = next(get_db())
-                experiment_run = db.query(ExperimentRun).filter(ExperimentRun.id == experiment_id).first()
-                if experiment_run:
-                    experiment_run.status = ExperimentStatus.FAILED
-                    experiment_run.error_message = str(e)
-                    experiment_run.completed_at = datetime.now()
-                    experiment_run.is_successful = False
-                    db.commit()
-            except Exception as db_error:
-                logger.error(f"Failed to update database: {str(db_error)}")
+        except TaskCancelled:
+            logger.info(f"Review of experiment {experiment_id} for idea {idea_id} was cancelled")
+            self._mark_experiment_cancelled(experiment_id, tracker, experiment_dir)
+            raise
             
+        except Exception as e:
+            logger.error(f"Error reviewing experiment: {str(e)}")
+            self._mark_experiment_failed(
+                experiment_id, e, tracker, resource_usage, experiment_dir,
+                manifest if 'manifest' in locals() else None, stage_timer.stage
+            )
             raise
 
     async def get_task_status(self, task_id: str) -> Dict[str, Any]:
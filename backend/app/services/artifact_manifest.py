@@ -0,0 +1,179 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..core.logging import get_logger
+from ..models.schema import ExperimentArtifact
+
+logger = get_logger("artifact_manifest")
+
+# Top-level directories holding run inputs rather than outputs
+EXCLUDED_DIRS = {"data"}
+
+ARTIFACT_TYPES = {
+    ".pdf": "pdf",
+    ".html": "html",
+    ".htm": "html",
+    ".png": "image",
+    ".jpg": "image",
+    ".jpeg": "image",
+    ".svg": "image",
+    ".gif": "image",
+    ".log": "log",
+    ".json": "json",
+    ".jsonl": "json",
+    ".gz": "archive",
+    ".zip": "archive",
+    ".tar": "archive",
+    ".npy": "data",
+    ".npz": "data",
+    ".pkl": "data",
+    ".py": "code",
+    ".tex": "text",
+    ".bib": "text",
+    ".txt": "text",
+    ".md": "text",
+    ".yaml": "text",
+}
+
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def artifact_type(path: str) -> str:
+    return ARTIFACT_TYPES.get(os.path.splitext(path)[1].lower(), "other")
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactManifest:
+    """
+    Incrementally maintained list of the files an experiment run has produced.
+
+    ``update`` is called at every stage boundary: it walks the experiment
+    directory once, hashes only files that are new or whose size or mtime
+    changed, attributes them to the stage that just finished and writes the
+    changes to ``experiment_artifacts``. Later lookups use the manifest
+    instead of globbing the directory again.
+    """
+
+    def __init__(self, experiment_id: str, experiment_dir: Path):
+        self.experiment_id = experiment_id
+        self.experiment_dir = Path(experiment_dir)
+        # Relative path -> entry, with the stat signature used to detect changes
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._signatures: Dict[str, Tuple[int, int]] = {}
+
+    @classmethod
+    def load(cls, experiment_id: str, experiment_dir: Path, db: Session) -> "ArtifactManifest":
+        """Manifest recorded by an earlier task of the run, to keep updating it"""
+        manifest = cls(experiment_id, experiment_dir)
+        found = manifest._scan()
+        rows = db.query(ExperimentArtifact).filter(ExperimentArtifact.experiment_id == experiment_id).all()
+        for row in rows:
+            manifest.entries[row.path] = {
+                "experiment_id": experiment_id,
+                "path": row.path,
+                "size_bytes": row.size_bytes,
+                "sha256": row.sha256,
+                "artifact_type": row.artifact_type,
+                "stage": row.stage,
+            }
+            # Files unchanged since they were recorded are not hashed again
+            if row.path in found and found[row.path][0] == row.size_bytes:
+                manifest._signatures[row.path] = found[row.path]
+        return manifest
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """Size and mtime of every regular file below the experiment directory"""
+        found: Dict[str, Tuple[int, int]] = {}
+        stack = [(str(self.experiment_dir), "")]
+        while stack:
+            current, prefix = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        relative = f"{prefix}{entry.name}"
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if not (prefix == "" and entry.name in EXCLUDED_DIRS):
+                                    stack.append((entry.path, f"{relative}/"))
+                            elif entry.is_file(follow_symlinks=False):
+                                stat = entry.stat(follow_symlinks=False)
+                                found[relative] = (stat.st_size, stat.st_mtime_ns)
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        return found
+
+    def update(self, stage: str, db: Session) -> int:
+        """
+        Record files written or changed since the last update under ``stage``.
+
+        Returns:
+            Number of new, changed or removed artifacts
+        """
+        found = self._scan()
+        changed: List[Dict[str, Any]] = []
+        for path, signature in found.items():
+            if self._signatures.get(path) == signature:
+                continue
+            try:
+                sha256 = file_sha256(self.experiment_dir / path)
+            except OSError:
+                # Removed between the scan and hashing; picked up next time if it reappears
+                continue
+            self._signatures[path] = signature
+            previous = self.entries.get(path)
+            if previous and previous["sha256"] == sha256:
+                continue
+            entry = {
+                "experiment_id": self.experiment_id,
+                "path": path,
+                "size_bytes": signature[0],
+                "sha256": sha256,
+                "artifact_type": artifact_type(path),
+                "stage": stage,
+            }
+            self.entries[path] = entry
+            changed.append(entry)
+        removed = [path for path in self.entries if path not in found]
+        for path in removed:
+            del self.entries[path]
+            self._signatures.pop(path, None)
+
+        stale = [entry["path"] for entry in changed] + removed
+        for start in range(0, len(stale), 500):
+            db.query(ExperimentArtifact).filter(
+                ExperimentArtifact.experiment_id == self.experiment_id,
+                ExperimentArtifact.path.in_(stale[start:start + 500]),
+            ).delete(synchronize_session=False)
+        for start in range(0, len(changed), 500):
+            db.execute(insert(ExperimentArtifact), changed[start:start + 500])
+        db.commit()
+
+        if stale:
+            logger.info(
+                f"Recorded {len(changed)} artifacts ({len(removed)} removed) for experiment "
+                f"{self.experiment_id} after stage {stage}"
+            )
+        return len(stale)
+
+    def find(self, artifact_type: Optional[str] = None, name: Optional[str] = None, top_level: bool = False) -> List[str]:
+        """Relative paths of recorded artifacts matching the given type and/or file name"""
+        return sorted(
+            path for path, entry in self.entries.items()
+            if (artifact_type is None or entry["artifact_type"] == artifact_type)
+            and (name is None or os.path.basename(path) == name)
+            and (not top_level or "/" not in path)
+        )
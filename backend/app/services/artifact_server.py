@@ -0,0 +1,151 @@
+import mimetypes
+import os
+import re
+from pathlib import Path
+from typing import AsyncIterator, Optional, Tuple
+from urllib.parse import quote
+
+import aiofiles
+from fastapi import HTTPException, Request
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
+
+from ..core.config import settings
+from ..core.logging import get_logger
+from ..models.schema import ExperimentArtifact, ExperimentRun
+from .storage import r2_storage
+
+logger = get_logger("artifact_server")
+
+STREAM_CHUNK_BYTES = 256 * 1024
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def artifact_key(experiment: ExperimentRun, path: str) -> str:
+    """R2 key of an artifact, below the run's results prefix"""
+    return f"experiments/{experiment.research_idea_id}/{experiment.id}/{path}"
+
+
+def artifact_url(experiment_id: str, path: Optional[str] = None) -> str:
+    """API URL serving an artifact of a run, or listing all of them without ``path``"""
+    url = f"{settings.API_V1_STR}/research/experiments/{experiment_id}/artifacts"
+    return f"{url}/{quote(path)}" if path else url
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive byte range requested by a ``Range`` header.
+
+    Returns:
+        ``(start, end)``, or None to serve the whole file (no header, or
+        several ranges, which a full response also satisfies)
+
+    Raises:
+        HTTPException: 416 if the range lies outside the file
+    """
+    if not header or "," in header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    start, end = match.groups()
+    if start:
+        first = int(start)
+        last = min(int(end), size - 1) if end else size - 1
+    else:
+        # Suffix range: the last N bytes
+        first = max(size - int(end), 0)
+        last = size - 1
+    if first > last or first >= size:
+        raise HTTPException(
+            status_code=416, detail="Requested range not satisfiable", headers={"Content-Range": f"bytes */{size}"}
+        )
+    return first, last
+
+
+async def _read_range(path: Path, start: int, length: int) -> AsyncIterator[bytes]:
+    async with aiofiles.open(path, "rb") as f:
+        await f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = await f.read(min(STREAM_CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _local_path(experiment: ExperimentRun, artifact: ExperimentArtifact) -> Optional[Path]:
+    """The artifact's file in the run directory, if it is still on this node"""
+    if not experiment.log_folder_path:
+        return None
+    run_dir = Path(experiment.log_folder_path).resolve()
+    path = (run_dir / artifact.path).resolve()
+    # The manifest only holds relative paths, but never serve outside the run directory
+    if run_dir not in path.parents or not path.is_file():
+        return None
+    return path
+
+
+def serve_artifact(request: Request, experiment: ExperimentRun, artifact: ExperimentArtifact) -> Response:
+    """
+    Response delivering one artifact of an experiment.
+
+    Local files are handed to nginx with ``X-Accel-Redirect`` when
+    ``ARTIFACT_ACCEL_REDIRECT_PREFIX`` is set, so they are sent with sendfile
+    without passing through Python; otherwise they are streamed in chunks with
+    single-range support. Either way the manifest hash is the ETag. Files no
+    longer on this node redirect to a short-lived presigned R2 URL if they were
+    uploaded, and are otherwise gone.
+
+    Raises:
+        HTTPException: 404 if the file is neither on this node nor in R2
+    """
+    etag = f'"{artifact.sha256}"'
+    content_type = mimetypes.guess_type(artifact.path)[0] or "application/octet-stream"
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        # Content is addressed by hash, so clients may cache it
+        "Cache-Control": "private, max-age=3600",
+        "Content-Disposition": f"inline; filename*=UTF-8''{quote(os.path.basename(artifact.path))}",
+    }
+
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    path = _local_path(experiment, artifact)
+    if path is None:
+        if not artifact.uploaded:
+            raise HTTPException(status_code=404, detail="Artifact is no longer available")
+        url = r2_storage.presigned_url(
+            artifact_key(experiment, artifact.path), settings.ARTIFACT_PRESIGN_EXPIRES_SECONDS
+        )
+        return RedirectResponse(url, status_code=307, headers={"Cache-Control": "no-store"})
+
+    if settings.ARTIFACT_ACCEL_REDIRECT_PREFIX:
+        # nginx serves the file (Range, sendfile) from its internal location
+        relative = path.relative_to(Path(experiment.log_folder_path).resolve().parent)
+        headers["X-Accel-Redirect"] = settings.ARTIFACT_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + quote(str(relative))
+        return Response(headers=headers, media_type=content_type)
+
+    size = path.stat().st_size
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if not if_range or if_range == etag:
+        byte_range = parse_range(request.headers.get("range"), size)
+
+    status_code = 200
+    start, length = 0, size
+    if byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(length)
+
+    if request.method == "HEAD":
+        return Response(status_code=status_code, headers=headers, media_type=content_type)
+    return StreamingResponse(
+        _read_range(path, start, length), status_code=status_code, headers=headers, media_type=content_type
+    )
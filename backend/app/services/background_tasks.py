@@ -1,88 +1,438 @@
 import asyncio
 import logging
 import functools
+import heapq
+import itertools
+import json
+import os
 import threading
 import time
+from collections import OrderedDict, defaultdict
 from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, Any, Callable, Awaitable, List, Optional
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Any, Callable, Awaitable, List, Optional, Set, Tuple
 import uuid
 
+from ..core.config import settings
 from ..core.logging import get_logger
+from ..core.metrics import TASKS
 
 logger = get_logger("background_tasks")
 
+DEFAULT_LANE = "experiment"
+
+# Priorities within a lane: work a user is waiting on starts ahead of bulk imports and sweeps
+INTERACTIVE_PRIORITY = 10
+BATCH_PRIORITY = 0
+
+# Statuses of a task that holds a lane worker: executing, or blocked on node capacity
+ACTIVE_STATUSES = ("running", "waiting_for_resources")
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task once cancellation has been requested"""
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation signal for a running task.
+
+    Tasks poll ``raise_if_cancelled`` at safe points; work that cannot poll
+    (e.g. a child process) registers an ``on_cancel`` callback to be stopped.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error running cancellation callback: {str(e)}")
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Register a callback to run on cancellation (immediately if already cancelled)
+
+        Returns:
+            A function that unregisters the callback
+        """
+        with self._lock:
+            already_cancelled = self._event.is_set()
+            if not already_cancelled:
+                self._callbacks.append(callback)
+        if already_cancelled:
+            callback()
+
+        def unregister():
+            with self._lock:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+        return unregister
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise TaskCancelled("Task was cancelled")
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to ``timeout`` seconds, waking early on cancellation; True if cancelled"""
+        return self._event.wait(timeout)
+
+
+# Token of the task executing in the current thread
+_current_cancel_token: ContextVar[Optional[CancellationToken]] = ContextVar("current_cancel_token", default=None)
+
+
+# Id of the task executing in the current thread
+_current_task_id: ContextVar[Optional[str]] = ContextVar("current_task_id", default=None)
+
+
+def current_cancel_token() -> CancellationToken:
+    """Cancellation token of the running task, or a token that is never cancelled"""
+    return _current_cancel_token.get() or CancellationToken()
+
+
+class TaskResultStore:
+    """Keeps task results on disk so the in-memory registry only holds a reference"""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def put(self, task_id: str, result: Any) -> Optional[str]:
+        if result is None:
+            return None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{task_id}.json"
+        with open(path, "w") as f:
+            json.dump(result, f, default=str)
+        return str(path)
+
+    def get(self, ref: Optional[str]) -> Any:
+        if not ref or not os.path.exists(ref):
+            return None
+        with open(ref, "r") as f:
+            return json.load(f)
+
+    def delete(self, ref: Optional[str]) -> None:
+        if ref and os.path.exists(ref):
+            os.remove(ref)
+
+
+class SharedCancellations:
+    """
+    Cancellation requests visible to every worker process.
+
+    A task is only known to the worker that created it, so each worker
+    records the tasks it owns and a cancel request received by any other
+    worker is left as a flag file for the owner to pick up.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def _owner(self, task_id: str) -> Path:
+        return self.directory / f"{task_id}.owner"
+
+    def _flag(self, task_id: str) -> Path:
+        return self.directory / f"{task_id}.cancel"
+
+    def register(self, task_id: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._owner(task_id).write_text(str(os.getpid()))
+
+    def unregister(self, task_id: str) -> None:
+        self._owner(task_id).unlink(missing_ok=True)
+        self.clear(task_id)
+
+    def clear(self, task_id: str) -> None:
+        self._flag(task_id).unlink(missing_ok=True)
+
+    def request(self, task_id: str) -> bool:
+        """Ask the owning worker to cancel the task; False if no live worker owns it"""
+        try:
+            pid = int(self._owner(task_id).read_text() or 0)
+        except (OSError, ValueError):
+            return False
+        if not _pid_alive(pid):
+            self.unregister(task_id)
+            return False
+        self._flag(task_id).touch()
+        return True
+
+    def requested(self) -> List[str]:
+        """Task ids with a pending cancel request; requests for finished tasks are dropped"""
+        if not self.directory.is_dir():
+            return []
+        task_ids = []
+        for flag in self.directory.glob("*.cancel"):
+            task_id = flag.name[:-len(".cancel")]
+            if self._owner(task_id).exists():
+                task_ids.append(task_id)
+            else:
+                self.clear(task_id)
+        return task_ids
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return pid > 0
+
+
+class TaskLane:
+    """A named execution lane with its own concurrency limit and priority queue"""
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-task")
+        # Heap of (-priority, sequence, task_id): higher priority first, FIFO within a priority
+        self.queue: List[Tuple[int, int, str]] = []
+        self.running = 0
+
+
 class BackgroundTaskManager:
     """Manages background tasks for long-running operations"""
     
-    def __init__(self):
+    FINISHED_STATUSES = ("completed", "failed", "cancelled")
+    
+    def __init__(
+        self,
+        lanes: Optional[Dict[str, int]] = None,
+        results_dir: Optional[str] = None,
+        cancel_dir: Optional[str] = None,
+    ):
+        if lanes is None:
+            lanes = {
+                "ideation": settings.IDEATION_LANE_WORKERS,
+                "experiment": settings.EXPERIMENT_LANE_WORKERS,
+                "review": settings.REVIEW_LANE_WORKERS,
+            }
         self.tasks: Dict[str, Dict[str, Any]] = {}
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.lanes: Dict[str, TaskLane] = {name: TaskLane(name, workers) for name, workers in lanes.items()}
+        self._runners: Dict[str, Callable[[], Any]] = {}
+        self._cancel_tokens: Dict[str, CancellationToken] = {}
+        self._cancel_callbacks: Dict[str, Callable[[], None]] = {}
+        self._sequence = itertools.count()
         self._lock = threading.RLock()
+        # Running tasks per concurrency group (e.g. the runs of a sweep)
+        self._group_running: Dict[str, int] = defaultdict(int)
+        # Task ids per status, and finished task ids in completion order for reaping
+        self._by_status: Dict[str, Set[str]] = defaultdict(set)
+        self._finished: "OrderedDict[str, float]" = OrderedDict()
+        self.results = TaskResultStore(results_dir or settings.TASK_RESULTS_DIR)
+        self.cancellations = SharedCancellations(cancel_dir or settings.TASK_CANCEL_DIR)
+        self._reaper: Optional[threading.Thread] = None
+        self._reaper_stop = threading.Event()
+        self._cancel_watcher: Optional[threading.Thread] = None
+        self._cancel_watcher_stop = threading.Event()
+    
+    def _set_status(self, task_id: str, status: str) -> None:
+        """Update a task's status and the task-state gauge; caller must hold the lock"""
+        task = self.tasks[task_id]
+        previous = task["status"]
+        task["status"] = status
+        if previous:
+            self._by_status[previous].discard(task_id)
+            TASKS.labels(lane=task["lane"], status=previous).dec()
+        self._by_status[status].add(task_id)
+        TASKS.labels(lane=task["lane"], status=status).inc()
+    
+    def _finish(self, task_id: str, status: str, **fields: Any) -> None:
+        """Move a task to a final status and queue it for reaping; caller must hold the lock"""
+        completed_at = time.time()
+        self._set_status(task_id, status)
+        self.tasks[task_id]["completed_at"] = completed_at
+        self.tasks[task_id].update(fields)
+        self._finished[task_id] = completed_at
+        self.cancellations.unregister(task_id)
     
-    def create_task(self, func: Callable, *args, **kwargs) -> str:
+    def create_task(
+        self,
+        func: Callable,
+        *args,
+        lane: str = DEFAULT_LANE,
+        priority: int = 0,
+        on_cancelled: Optional[Callable[[], None]] = None,
+        group: Optional[str] = None,
+        group_limit: Optional[int] = None,
+        **kwargs
+    ) -> str:
         """
         Create a new background task
         
+        The function can call ``current_cancel_token()`` to cooperate with
+        cancellation; raising ``TaskCancelled`` marks the task as cancelled.
+        
         Args:
             func: Function to execute in the background
             *args: Positional arguments for the function
+            lane: Execution lane the task is queued on
+            priority: Tasks with a higher priority start first within their lane
+            on_cancelled: Called if the task is cancelled before it starts
+            group: Concurrency group the task belongs to
+            group_limit: Tasks of ``group`` allowed to run at once; further ones
+                stay queued, without taking a lane worker, until one finishes
             **kwargs: Keyword arguments for the function
             
         Returns:
             task_id: Unique identifier for the task
         """
-        task_id = str(uuid.uuid4())
+        if lane not in self.lanes:
+            raise ValueError(f"Unknown task lane {lane}")
         
-        with self._lock:
-            self.tasks[task_id] = {
-                "id": task_id,
-                "status": "pending",
-                "created_at": time.time(),
-                "started_at": None,
-                "completed_at": None,
-                "result": None,
-                "error": None
-            }
+        task_id = str(uuid.uuid4())
+        cancel_token = CancellationToken()
         
         # Wrap function to update task status
         def wrapped_func():
+            context_token = _current_cancel_token.set(cancel_token)
+            task_id_token = _current_task_id.set(task_id)
             try:
                 with self._lock:
-                    if task_id not in self.tasks:
+                    if self.tasks.get(task_id, {}).get("status") != "pending":
                         logger.warning(f"Task {task_id} was cancelled before starting")
                         return
                     
-                    self.tasks[task_id]["status"] = "running"
+                    self._set_status(task_id, "running")
                     self.tasks[task_id]["started_at"] = time.time()
                 
-                logger.info(f"Starting background task {task_id}")
+                logger.info(f"Starting background task {task_id} on lane {lane}")
                 result = func(*args, **kwargs)
+                result_ref = self.results.put(task_id, result)
                 
                 with self._lock:
                     if task_id in self.tasks:
-                        self.tasks[task_id]["status"] = "completed"
-                        self.tasks[task_id]["completed_at"] = time.time()
-                        self.tasks[task_id]["result"] = result
+                        self._finish(task_id, "completed", result_ref=result_ref)
                 
                 logger.info(f"Background task {task_id} completed successfully")
                 return result
             
+            except TaskCancelled:
+                logger.info(f"Background task {task_id} stopped after cancellation")
+                
+                with self._lock:
+                    if task_id in self.tasks:
+                        self._finish(task_id, "cancelled")
+            
             except Exception as e:
                 logger.error(f"Background task {task_id} failed: {str(e)}")
                 
                 with self._lock:
                     if task_id in self.tasks:
-                        self.tasks[task_id]["status"] = "failed"
-                        self.tasks[task_id]["completed_at"] = time.time()
-                        self.tasks[task_id]["error"] = str(e)
+                        self._finish(task_id, "failed", error=str(e))
                 
                 raise
+            
+            finally:
+                _current_cancel_token.reset(context_token)
+                _current_task_id.reset(task_id_token)
+                with self._lock:
+                    self._cancel_tokens.pop(task_id, None)
+                    self.lanes[lane].running -= 1
+                    if group:
+                        self._group_running[group] -= 1
+                        if self._group_running[group] <= 0:
+                            del self._group_running[group]
+                    self._dispatch(self.lanes[lane])
         
-        # Submit task to executor
-        future = self.executor.submit(wrapped_func)
+        with self._lock:
+            self.tasks[task_id] = {
+                "id": task_id,
+                "status": None,
+                "lane": lane,
+                "priority": priority,
+                "group": group,
+                "group_limit": group_limit,
+                "cancel_requested": False,
+                "created_at": time.time(),
+                "started_at": None,
+                "completed_at": None,
+                "result_ref": None,
+                "error": None
+            }
+            self._set_status(task_id, "pending")
+            self.cancellations.register(task_id)
+            self._runners[task_id] = wrapped_func
+            self._cancel_tokens[task_id] = cancel_token
+            if on_cancelled:
+                self._cancel_callbacks[task_id] = on_cancelled
+            heapq.heappush(self.lanes[lane].queue, (-priority, next(self._sequence), task_id))
+            self._dispatch(self.lanes[lane])
         
         return task_id
     
+    def _dispatch(self, lane: TaskLane) -> None:
+        """
+        Start queued tasks while the lane has free capacity; caller must hold the lock.
+        Tasks whose group is at its limit are skipped and stay queued.
+        """
+        held_back = []
+        while lane.queue and lane.running < lane.max_workers:
+            entry = heapq.heappop(lane.queue)
+            task_id = entry[2]
+            task = self.tasks.get(task_id, {})
+            if task_id not in self._runners or task.get("status") != "pending":
+                self._runners.pop(task_id, None)
+                self._cancel_callbacks.pop(task_id, None)
+                continue
+            group, group_limit = task.get("group"), task.get("group_limit")
+            if group and group_limit and self._group_running[group] >= group_limit:
+                held_back.append(entry)
+                continue
+            runner = self._runners.pop(task_id)
+            self._cancel_callbacks.pop(task_id, None)
+            if group:
+                self._group_running[group] += 1
+            lane.running += 1
+            lane.executor.submit(runner)
+        for entry in held_back:
+            heapq.heappush(lane.queue, entry)
+    
+    def _queue_position(self, task_id: str) -> Optional[int]:
+        """1-based position of a pending task within its lane; caller must hold the lock"""
+        task = self.tasks[task_id]
+        if task["status"] != "pending":
+            return None
+        position = 0
+        for _, _, queued_id in sorted(self.lanes[task["lane"]].queue):
+            if self.tasks.get(queued_id, {}).get("status") != "pending":
+                continue
+            position += 1
+            if queued_id == task_id:
+                return position
+        return None
+    
+    def set_current_task_status(self, status: str) -> None:
+        """
+        Report whether the task executing in this thread is "running" or
+        "waiting_for_resources", e.g. while it waits for node capacity.
+        """
+        task_id = _current_task_id.get()
+        if not task_id:
+            return
+        with self._lock:
+            task = self.tasks.get(task_id)
+            if task and task["status"] in ACTIVE_STATUSES and task["status"] != status:
+                self._set_status(task_id, status)
+    
     def get_task_status(self, task_id: str) -> Dict[str, Any]:
         """
         Get the status of a task
@@ -91,35 +441,81 @@ class BackgroundTaskManager:
             task_id: Task identifier
             
         Returns:
-            Task status information
+            Task status information, including the queue position of pending
+            tasks and the result of completed ones
         """
         with self._lock:
             if task_id not in self.tasks:
                 raise ValueError(f"Task {task_id} not found")
             
-            return self.tasks[task_id].copy()
+            status = self.tasks[task_id].copy()
+            status["queue_position"] = self._queue_position(task_id)
+        
+        status["result"] = self.results.get(status.pop("result_ref"))
+        return status
     
     def cancel_task(self, task_id: str) -> bool:
         """
-        Cancel a task if it's still pending
+        Cancel a task
+        
+        Pending tasks are cancelled immediately. Running tasks are signalled
+        through their cancellation token and become "cancelled" once they stop.
+        Tasks owned by another worker are flagged for that worker, which
+        cancels them the same way on its next poll.
         
         Args:
             task_id: Task identifier
             
         Returns:
-            True if task was cancelled, False otherwise
+            True if the task was cancelled or cancellation was requested, False otherwise
         """
         with self._lock:
             if task_id not in self.tasks:
+                if self.cancellations.request(task_id):
+                    logger.info(f"Cancellation requested for task {task_id} of another worker")
+                    return True
                 raise ValueError(f"Task {task_id} not found")
             
-            if self.tasks[task_id]["status"] == "pending":
-                self.tasks[task_id]["status"] = "cancelled"
-                self.tasks[task_id]["completed_at"] = time.time()
+            status = self.tasks[task_id]["status"]
+            cancel_token = None
+            on_cancelled = None
+            if status == "pending":
+                self._finish(task_id, "cancelled")
+                self._runners.pop(task_id, None)
+                self._cancel_tokens.pop(task_id, None)
+                on_cancelled = self._cancel_callbacks.pop(task_id, None)
                 logger.info(f"Task {task_id} cancelled")
-                return True
-            
-            return False
+            elif status in ACTIVE_STATUSES:
+                self.tasks[task_id]["cancel_requested"] = True
+                cancel_token = self._cancel_tokens.get(task_id)
+                logger.info(f"Cancellation requested for running task {task_id}")
+            else:
+                return False
+        
+        # Run callbacks outside the lock; they may block or touch the database
+        if cancel_token:
+            cancel_token.cancel()
+        if on_cancelled:
+            try:
+                on_cancelled()
+            except Exception as e:
+                logger.error(f"Error handling cancellation of task {task_id}: {str(e)}")
+        return True
+    
+    def lane_stats(self) -> Dict[str, Dict[str, int]]:
+        """Concurrency limit, running and queued task counts per lane"""
+        with self._lock:
+            return {
+                name: {
+                    "max_workers": lane.max_workers,
+                    "running": lane.running,
+                    "queued": sum(
+                        1 for _, _, task_id in lane.queue
+                        if self.tasks.get(task_id, {}).get("status") == "pending"
+                    ),
+                }
+                for name, lane in self.lanes.items()
+            }
     
     def list_tasks(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
         """
@@ -129,40 +525,127 @@ class BackgroundTaskManager:
             status: Filter tasks by status
             
         Returns:
-            List of task info dictionaries
+            List of task info dictionaries (results are only referenced, not loaded)
         """
         with self._lock:
             if status:
-                return [task.copy() for task in self.tasks.values() if task["status"] == status]
+                return [self.tasks[task_id].copy() for task_id in self._by_status.get(status, ())]
             return [task.copy() for task in self.tasks.values()]
     
-    def cleanup_completed_tasks(self, max_age_seconds: int = 3600) -> int:
+    def cleanup_completed_tasks(self, max_age_seconds: int = 3600, max_finished: Optional[int] = None) -> int:
         """
         Remove completed, failed, or cancelled tasks older than max_age_seconds
         
         Args:
             max_age_seconds: Maximum age in seconds
+            max_finished: Also remove the oldest finished tasks beyond this count
             
         Returns:
             Number of tasks removed
         """
         current_time = time.time()
-        removable_statuses = ["completed", "failed", "cancelled"]
-        task_ids_to_remove = []
+        removed_refs = []
         
         with self._lock:
-            for task_id, task in self.tasks.items():
-                if task["status"] in removable_statuses:
-                    if task["completed_at"] and (current_time - task["completed_at"]) > max_age_seconds:
-                        task_ids_to_remove.append(task_id)
+            # Finished tasks are kept in completion order, so only expired ones are visited
+            while self._finished:
+                task_id, completed_at = next(iter(self._finished.items()))
+                expired = (current_time - completed_at) > max_age_seconds
+                over_limit = max_finished is not None and len(self._finished) > max_finished
+                if not (expired or over_limit):
+                    break
+                
+                self._finished.popitem(last=False)
+                task = self.tasks.pop(task_id, None)
+                if task is None:
+                    continue
+                self._by_status[task["status"]].discard(task_id)
+                TASKS.labels(lane=task["lane"], status=task["status"]).dec()
+                removed_refs.append(task["result_ref"])
+        
+        for ref in removed_refs:
+            try:
+                self.results.delete(ref)
+            except Exception as e:
+                logger.error(f"Error deleting task result {ref}: {str(e)}")
         
-            for task_id in task_ids_to_remove:
-                del self.tasks[task_id]
+        if removed_refs:
+            logger.info(f"Cleaned up {len(removed_refs)} old tasks")
         
-        if task_ids_to_remove:
-            logger.info(f"Cleaned up {len(task_ids_to_remove)} old tasks")
+        return len(removed_refs)
+    
+    def start_reaper(
+        self,
+        interval_seconds: Optional[int] = None,
+        max_age_seconds: Optional[int] = None,
+        max_finished: Optional[int] = None,
+    ) -> None:
+        """Periodically remove finished tasks in a daemon thread"""
+        interval_seconds = interval_seconds or settings.TASK_REAPER_INTERVAL_SECONDS
+        max_age_seconds = max_age_seconds or settings.TASK_RETENTION_SECONDS
+        max_finished = max_finished or settings.TASK_MAX_FINISHED
         
-        return len(task_ids_to_remove)
+        with self._lock:
+            if self._reaper and self._reaper.is_alive():
+                return
+            self._reaper_stop.clear()
+            
+            def reap():
+                while not self._reaper_stop.wait(interval_seconds):
+                    try:
+                        self.cleanup_completed_tasks(max_age_seconds, max_finished)
+                    except Exception as e:
+                        logger.error(f"Error reaping finished tasks: {str(e)}")
+            
+            self._reaper = threading.Thread(target=reap, name="task-reaper", daemon=True)
+            self._reaper.start()
+        logger.info(f"Task reaper started (interval {interval_seconds}s, retention {max_age_seconds}s)")
+    
+    def stop_reaper(self) -> None:
+        self._reaper_stop.set()
+    
+    def poll_cancellations(self) -> int:
+        """
+        Cancel this worker's tasks that another worker was asked to cancel
+        
+        Returns:
+            Number of tasks cancelled
+        """
+        cancelled = 0
+        for task_id in self.cancellations.requested():
+            with self._lock:
+                owned = task_id in self.tasks
+            if not owned:
+                continue
+            self.cancellations.clear(task_id)
+            try:
+                if self.cancel_task(task_id):
+                    cancelled += 1
+            except Exception as e:
+                logger.error(f"Error cancelling task {task_id}: {str(e)}")
+        return cancelled
+    
+    def start_cancel_watcher(self, interval_seconds: Optional[float] = None) -> None:
+        """Poll for cancel requests made through other workers in a daemon thread"""
+        interval_seconds = interval_seconds or settings.TASK_CANCEL_POLL_SECONDS
+        
+        with self._lock:
+            if self._cancel_watcher and self._cancel_watcher.is_alive():
+                return
+            self._cancel_watcher_stop.clear()
+            
+            def watch():
+                while not self._cancel_watcher_stop.wait(interval_seconds):
+                    try:
+                        self.poll_cancellations()
+                    except Exception as e:
+                        logger.error(f"Error polling task cancellations: {str(e)}")
+            
+            self._cancel_watcher = threading.Thread(target=watch, name="task-cancel-watcher", daemon=True)
+            self._cancel_watcher.start()
+    
+    def stop_cancel_watcher(self) -> None:
+        self._cancel_watcher_stop.set()
 
 
 # Create singleton instance
@@ -0,0 +1,318 @@
+import asyncio
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Any, Optional, Tuple
+
+from ..core.config import settings
+from ..core.logging import get_logger
+from ..core.metrics import DATA_CACHE_REQUESTS, DATA_CACHE_BYTES
+from .run_limits import directory_size
+from .storage import r2_storage
+
+logger = get_logger("data_cache")
+
+# Bump when the preprocessing applied to cached data changes
+PREPROCESS_VERSION = 1
+
+_CHUNK_SIZE = 1024 * 1024
+
+# Bookkeeping files kept in each entry next to the preprocessed data
+ENTRY_METADATA = (".last_used", ".pins", ".content_hash")
+
+
+def hash_directory(path: Path) -> str:
+    """Content hash of every file below ``path``, including relative paths"""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            digest.update(os.path.relpath(file_path, path).encode())
+            digest.update(b"\0")
+            if os.path.islink(file_path):
+                digest.update(os.readlink(file_path).encode())
+                continue
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+            digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def manifest_digest(path: Path) -> str:
+    """Hash of the relative path, size and mtime of every file below ``path``, without reading them"""
+    digest = hashlib.sha256()
+    digest.update(str(Path(path).resolve()).encode())
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            stat = os.lstat(file_path)
+            digest.update(f"{os.path.relpath(file_path, path)}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode())
+    return digest.hexdigest()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class PreprocessedDataCache:
+    """
+    Content-addressed store of preprocessed task data shared by all runs on a node.
+
+    Entries are keyed by a hash of the raw data and the preprocessing config,
+    so identical ``data_dir`` contents are only preprocessed once. The content
+    hash of a directory is remembered against its file manifest, so the data
+    is only re-read when a file was added, removed, resized or modified. Entries are
+    evicted least-recently-used first once the cache grows beyond ``max_bytes``,
+    except while a run has them pinned, and can be mirrored to R2 so other
+    nodes skip preprocessing too. Remembered manifests go with the last entry
+    built from their content.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: Optional[int] = None, mirror_to_r2: bool = False):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.mirror_to_r2 = mirror_to_r2
+
+    def _content_hash(self, data_dir: Path) -> str:
+        """Content hash of ``data_dir``, reused while its manifest is unchanged"""
+        manifests = self.cache_dir / ".manifests"
+        known = manifests / manifest_digest(data_dir)
+        try:
+            return known.read_text().strip()
+        except OSError:
+            pass
+        content_hash = hash_directory(data_dir)
+        manifests.mkdir(parents=True, exist_ok=True)
+        # Written atomically so a concurrent reader never sees a partial hash
+        fd, tmp = tempfile.mkstemp(dir=manifests)
+        with os.fdopen(fd, "w") as f:
+            f.write(content_hash)
+        os.replace(tmp, known)
+        return content_hash
+
+    def _key(self, content_hash: str, config: Dict[str, Any]) -> str:
+        digest = hashlib.sha256()
+        digest.update(content_hash.encode())
+        digest.update(json.dumps({**config, "version": PREPROCESS_VERSION}, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def key(self, data_dir: Path, config: Dict[str, Any]) -> str:
+        return self._key(self._content_hash(data_dir), config)
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key
+
+    def _r2_key(self, key: str) -> str:
+        return f"data_cache/{key}.tar.gz"
+
+    @contextmanager
+    def _lock(self, name: str):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.cache_dir / f".{name}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _touch(self, entry: Path) -> None:
+        (entry / ".last_used").touch()
+
+    def _pin(self, entry: Path, run_id: str) -> None:
+        """Record that ``run_id`` uses the entry; call while holding the entry's lock"""
+        pins = entry / ".pins"
+        pins.mkdir(exist_ok=True)
+        (pins / run_id).write_text(str(os.getpid()))
+
+    def _pinned(self, entry: Path) -> bool:
+        """Whether a live process has a run using the entry; drops pins of dead processes"""
+        pins = entry / ".pins"
+        if not pins.is_dir():
+            return False
+        pinned = False
+        for pin in pins.iterdir():
+            try:
+                pid = int(pin.read_text() or 0)
+            except (OSError, ValueError):
+                pid = 0
+            if pid and _pid_alive(pid):
+                pinned = True
+            else:
+                pin.unlink(missing_ok=True)
+        return pinned
+
+    def release(self, run_id: str) -> None:
+        """Unpin every entry ``run_id`` pinned, making them evictable again"""
+        if not self.cache_dir.is_dir():
+            return
+        for entry in self.cache_dir.iterdir():
+            if entry.is_dir() and not entry.name.startswith("."):
+                (entry / ".pins" / run_id).unlink(missing_ok=True)
+
+    def get_or_build(
+        self,
+        data_dir: Path,
+        build: Callable[[Path], None],
+        config: Optional[Dict[str, Any]] = None,
+        pin: Optional[str] = None,
+    ) -> Tuple[Path, Dict[str, Any]]:
+        """
+        Return the preprocessed copy of ``data_dir``, building it with ``build`` on a miss.
+
+        ``build`` receives a scratch copy of the raw data and preprocesses it in place.
+        Cached entries are shared and must be treated as read-only. With ``pin``
+        (a run id) the entry is not evicted until ``release(pin)`` is called.
+
+        Returns:
+            The entry's directory and a summary of the lookup
+        """
+        started_at = time.monotonic()
+        content_hash = self._content_hash(Path(data_dir))
+        key = self._key(content_hash, config or {})
+        entry = self._entry_path(key)
+
+        with self._lock(key):
+            if entry.is_dir():
+                result = "hit"
+            elif self.mirror_to_r2 and self._download(key, entry):
+                result = "remote_hit"
+            else:
+                result = "miss"
+                self._build(Path(data_dir), entry, build)
+                if self.mirror_to_r2:
+                    self._upload(key, entry)
+            self._touch(entry)
+            # Keeps the manifests of the raw data alive as long as the entry
+            (entry / ".content_hash").write_text(content_hash)
+            if pin:
+                self._pin(entry, pin)
+
+        DATA_CACHE_REQUESTS.labels(result=result).inc()
+        self.evict(keep=key)
+        logger.info(f"Preprocessed data cache {result} for {data_dir} ({key[:12]})")
+
+        return entry, {
+            "key": key,
+            "result": result,
+            "seconds": time.monotonic() - started_at,
+        }
+
+    def _build(self, data_dir: Path, entry: Path, build: Callable[[Path], None]) -> None:
+        scratch = Path(tempfile.mkdtemp(prefix=".build-", dir=self.cache_dir))
+        try:
+            shutil.copytree(data_dir, scratch, dirs_exist_ok=True, symlinks=True)
+            build(scratch)
+            os.rename(scratch, entry)
+        except Exception:
+            shutil.rmtree(scratch, ignore_errors=True)
+            raise
+
+    def _download(self, key: str, entry: Path) -> bool:
+        archive = self.cache_dir / f".{key}.tar.gz"
+        try:
+            if not r2_storage.download_file(self._r2_key(key), str(archive)):
+                return False
+            scratch = Path(tempfile.mkdtemp(prefix=".fetch-", dir=self.cache_dir))
+            with tarfile.open(archive, "r:gz") as tar:
+                tar.extractall(scratch, filter="data")
+            os.rename(scratch, entry)
+            return True
+        except Exception as e:
+            logger.warning(f"Could not fetch cached data {key} from R2: {str(e)}")
+            return False
+        finally:
+            archive.unlink(missing_ok=True)
+
+    def _upload(self, key: str, entry: Path) -> None:
+        archive = self.cache_dir / f".{key}.tar.gz"
+        try:
+            with tarfile.open(archive, "w:gz") as tar:
+                tar.add(entry, arcname=".")
+            asyncio.run(r2_storage.upload_file(str(archive), self._r2_key(key)))
+        except Exception as e:
+            # The local entry is still usable; only other nodes miss out
+            logger.warning(f"Could not mirror cached data {key} to R2: {str(e)}")
+        finally:
+            archive.unlink(missing_ok=True)
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """
+        Remove least recently used entries until the cache fits in ``max_bytes``.
+
+        Returns:
+            Number of bytes freed
+        """
+        if not self.cache_dir.is_dir():
+            return 0
+
+        with self._lock("evict"):
+            entries = []
+            for entry in self.cache_dir.iterdir():
+                if not entry.is_dir() or entry.name.startswith("."):
+                    continue
+                marker = entry / ".last_used"
+                last_used = marker.stat().st_mtime if marker.exists() else 0
+                entries.append((last_used, entry, directory_size(entry)))
+
+            total = sum(size for _, _, size in entries)
+            freed = 0
+            if self.max_bytes:
+                for _, entry, size in sorted(entries, key=lambda e: e[0]):
+                    if total - freed <= self.max_bytes:
+                        break
+                    if entry.name == keep:
+                        continue
+                    with self._lock(entry.name):
+                        # Runs read pinned entries in place
+                        if self._pinned(entry):
+                            continue
+                        shutil.rmtree(entry, ignore_errors=True)
+                    freed += size
+                    logger.info(f"Evicted preprocessed data {entry.name[:12]} ({size} bytes)")
+
+            self._evict_manifests()
+            DATA_CACHE_BYTES.set(total - freed)
+            return freed
+
+    def _evict_manifests(self) -> None:
+        """Drop remembered manifests whose content no remaining entry was built from; call under the evict lock"""
+        manifests = self.cache_dir / ".manifests"
+        if not manifests.is_dir():
+            return
+        live = set()
+        for entry in self.cache_dir.iterdir():
+            if entry.is_dir() and not entry.name.startswith("."):
+                try:
+                    live.add((entry / ".content_hash").read_text().strip())
+                except OSError:
+                    continue
+        for known in manifests.iterdir():
+            try:
+                if known.read_text().strip() not in live:
+                    known.unlink()
+            except OSError:
+                continue
+
+
+# Create singleton instance
+data_cache = PreprocessedDataCache(
+    cache_dir=settings.DATA_CACHE_DIR,
+    max_bytes=settings.DATA_CACHE_MAX_MB * 1024 * 1024 if settings.DATA_CACHE_MAX_MB else None,
+    mirror_to_r2=settings.DATA_CACHE_MIRROR_TO_R2,
+)
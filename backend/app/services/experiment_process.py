@@ -0,0 +1,212 @@
+import json
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from .background_tasks import CancellationToken
+from .token_accounting import RunTokenTracker
+from .run_limits import MB, RunCgroup, configured_limits, apply_rlimits, directory_size, process_usage
+from ..core.config import settings
+from ..core.logging import get_logger
+
+logger = get_logger("experiment_process")
+
+# Spawned rather than forked: the API process is multi-threaded
+_mp_context = multiprocessing.get_context("spawn")
+
+BFTS_USAGE_FILE_NAME = "bfts_usage.json"
+
+# How often the parent checks the run's CPU time and disk use against their budgets
+LIMIT_POLL_SECONDS = 5.0
+
+
+def _bfts_process_main(
+    config_path: str,
+    run_id: str,
+    output_dir: str,
+    cpuset: Optional[List[int]],
+    limits: Dict[str, Optional[int]],
+    cgroup_path: Optional[str],
+    exec_backend: str = "subprocess",
+) -> None:
+    """Entry point of the BFTS child process"""
+    # Lead a new process group so the whole tree can be signalled at once
+    os.setsid()
+    # Everything below is inherited by the processes BFTS spawns
+    if cgroup_path:
+        RunCgroup(Path(cgroup_path)).attach(os.getpid())
+    apply_rlimits(limits, in_cgroup=cgroup_path is not None)
+    if cpuset:
+        os.sched_setaffinity(0, cpuset)
+
+    from .token_accounting import track_run
+    from .AI_Scientist_v2.ai_scientist.treesearch.perform_experiments_bfts_with_agentmanager import perform_experiments_bfts
+
+    if exec_backend == "forkserver":
+        use_fork_server_interpreter()
+
+    with track_run(run_id, Path(output_dir)) as tracker:
+        tracker.set_stage("bfts")
+        try:
+            perform_experiments_bfts(config_path)
+        finally:
+            tracker.flush()
+            with open(Path(output_dir) / BFTS_USAGE_FILE_NAME, "w") as f:
+                json.dump({"tokens": tracker.export_counts(), "resources": process_usage()}, f)
+
+
+def use_fork_server_interpreter() -> None:
+    """Make BFTS execute node scripts through the preloaded fork server"""
+    from .fork_interpreter import ForkServerInterpreter
+    from .AI_Scientist_v2.ai_scientist.treesearch import interpreter, parallel_agent
+
+    # parallel_agent binds the class at import time, so patch both names
+    interpreter.Interpreter = ForkServerInterpreter
+    parallel_agent.Interpreter = ForkServerInterpreter
+
+
+def _signal_tree(pid: int, sig: int) -> None:
+    """Signal the process group led by ``pid``, or the child alone before it leads one"""
+    try:
+        os.killpg(pid, sig)
+    except ProcessLookupError:
+        # The child is still starting up and has not left our process group yet
+        os.kill(pid, sig)
+
+
+def terminate_process_group(
+    process: multiprocessing.process.BaseProcess,
+    grace_period: float = 10.0,
+    cgroup: Optional[RunCgroup] = None,
+) -> None:
+    """
+    Send SIGTERM to a child's process group, then SIGKILL whatever is left after the grace period.
+
+    The child only leads its own group once it has called ``os.setsid()``; a
+    cancel that arrives earlier signals the child directly instead. The run's
+    cgroup, if any, is killed along with the group.
+    """
+    pid = process.pid
+
+    def _terminate():
+        try:
+            _signal_tree(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+        except Exception as e:
+            logger.error(f"Error terminating process group {pid}: {str(e)}")
+
+        # Give the tree a chance to exit cleanly, then make sure no stragglers survive
+        time.sleep(grace_period)
+        try:
+            _signal_tree(pid, signal.SIGKILL)
+            logger.warning(f"Killed process group {pid} after {grace_period}s grace period")
+        except ProcessLookupError:
+            pass
+        except Exception as e:
+            logger.error(f"Error killing process group {pid}: {str(e)}")
+        if cgroup:
+            cgroup.kill()
+
+    threading.Thread(target=_terminate, name=f"terminate-{pid}", daemon=True).start()
+
+
+def run_bfts_process(
+    config_path: str,
+    run_id: str,
+    output_dir: Path,
+    tracker: RunTokenTracker,
+    cancel_token: CancellationToken,
+    cpuset: Optional[List[int]] = None,
+    cpus: Optional[int] = None,
+    resource_usage: Optional[Dict[str, Any]] = None,
+    grace_period: float = 10.0,
+) -> None:
+    """
+    Run the BFTS stage in its own process group and wait for it.
+
+    Cancelling ``cancel_token`` terminates the child and every process it
+    spawned. LLM usage recorded by the child is merged into ``tracker``.
+    If ``cpuset`` is given, the process tree is pinned to those CPUs.
+
+    The tree runs under the configured per-run limits (a cgroup where one can
+    be created, rlimits otherwise); with a cgroup, ``cpus`` caps its CPU
+    bandwidth and the CPU time limit applies to the whole tree. The disk limit
+    covers everything below ``output_dir`` and is checked while the run is
+    going, so a run may briefly overshoot it before it is killed. Its peak RSS
+    and CPU seconds are written into ``resource_usage`` even when the stage
+    fails. ``BFTS_EXEC_BACKEND`` selects how node scripts are executed.
+    """
+    cancel_token.raise_if_cancelled()
+
+    limits = {**configured_limits(), "cpus": cpus}
+    cgroup = RunCgroup.create(run_id, limits)
+    # RLIMIT_CPU and RLIMIT_FSIZE only bound single processes and files; these budgets cover the whole tree
+    cpu_limit = limits.get("cpu_seconds") if cgroup else None
+    disk_limit = limits.get("disk_bytes")
+    exceeded_limit = None
+    try:
+        process = _mp_context.Process(
+            target=_bfts_process_main,
+            args=(
+                config_path, run_id, str(output_dir), cpuset, limits,
+                str(cgroup.path) if cgroup else None, settings.BFTS_EXEC_BACKEND,
+            ),
+            name=f"bfts-{run_id}",
+        )
+        process.start()
+        logger.info(f"Started BFTS process {process.pid} for run {run_id}")
+
+        unregister = cancel_token.on_cancel(lambda: terminate_process_group(process, grace_period, cgroup))
+        try:
+            if cpu_limit or disk_limit:
+                while process.is_alive():
+                    process.join(LIMIT_POLL_SECONDS)
+                    if not process.is_alive():
+                        break
+                    if cpu_limit and (cgroup.cpu_seconds() or 0) > cpu_limit:
+                        exceeded_limit = f"its CPU time limit of {cpu_limit}s"
+                    elif disk_limit and directory_size(output_dir) > disk_limit:
+                        exceeded_limit = f"its disk limit of {disk_limit // MB} MB"
+                    if exceeded_limit:
+                        logger.warning(f"BFTS process tree of run {run_id} exceeded {exceeded_limit}")
+                        if cgroup:
+                            cgroup.kill()
+                        else:
+                            _signal_tree(process.pid, signal.SIGKILL)
+                        process.join()
+            else:
+                process.join()
+        finally:
+            unregister()
+
+        usage_path = Path(output_dir) / BFTS_USAGE_FILE_NAME
+        usage = {}
+        if usage_path.exists():
+            with open(usage_path, "r") as f:
+                usage = json.load(f)
+            tracker.merge_counts(usage.get("tokens", {}))
+        if resource_usage is not None:
+            resource_usage.update(usage.get("resources", {}))
+    finally:
+        if cgroup:
+            # The cgroup also covers processes that were killed before reporting
+            if resource_usage is not None:
+                resource_usage.update(cgroup.usage())
+            cgroup.remove()
+    # The child appended to the interaction log; pick up its index position
+    tracker.set_output_dir(output_dir)
+
+    cancel_token.raise_if_cancelled()
+    if exceeded_limit:
+        raise RuntimeError(f"BFTS process tree exceeded {exceeded_limit}")
+    if process.exitcode != 0:
+        if process.exitcode in (-signal.SIGKILL, -signal.SIGXCPU, -signal.SIGXFSZ):
+            raise RuntimeError(
+                f"BFTS process was stopped by a resource limit (exit code {process.exitcode})"
+            )
+        raise RuntimeError(f"BFTS process exited with code {process.exitcode}")
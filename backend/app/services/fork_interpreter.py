@@ -0,0 +1,181 @@
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import humanize
+
+from ..core.logging import get_logger
+from .AI_Scientist_v2.ai_scientist.treesearch.interpreter import ExecutionResult, exception_summary
+
+logger = get_logger("fork_interpreter")
+
+# Heavy modules node scripts typically import; missing ones are skipped by the server
+DEFAULT_PRELOAD = ["numpy", "pandas", "sklearn", "scipy", "matplotlib", "torch"]
+
+_mp_context = multiprocessing.get_context("forkserver")
+
+
+class _QueueWriter:
+    """File-like object that forwards everything written to a queue"""
+
+    def __init__(self, output_queue):
+        self.output_queue = output_queue
+
+    def write(self, text: str) -> int:
+        self.output_queue.put(text)
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+
+def _run_script(
+    code: str,
+    working_dir: str,
+    agent_file_name: str,
+    format_tb_ipython: bool,
+    env_vars: Dict[str, str],
+    output_queue,
+    result_queue,
+) -> None:
+    """Entry point of the forked child that executes one node script"""
+    # Stays in the run's process group so cancelling the run also stops it
+    os.chdir(working_dir)
+    os.environ.update(env_vars)
+    sys.path.insert(0, working_dir)
+    sys.stdout = sys.stderr = _QueueWriter(output_queue)
+
+    with open(agent_file_name, "w") as f:
+        f.write(code)
+
+    result = (None, None, None)
+    try:
+        exec(compile(code, agent_file_name, "exec"), {"__name__": "__main__"})
+    except BaseException as e:
+        tb_str, exc_type, exc_info, exc_stack = exception_summary(
+            e, Path(working_dir), agent_file_name, format_tb_ipython
+        )
+        output_queue.put(tb_str)
+        result = (exc_type, exc_info, exc_stack)
+    finally:
+        sys.stdout.flush()
+        result_queue.put(result)
+
+
+class ForkServerInterpreter:
+    """
+    Drop-in replacement for the BFTS ``Interpreter`` that forks each node
+    script from a preloaded fork server instead of a fresh interpreter.
+
+    numpy, torch and friends are imported once by the server, so each script
+    only pays for ``fork``. Every ``run`` gets an isolated child; no state is
+    kept between scripts, which matches how BFTS calls the interpreter
+    (``reset_session=True``). Timeouts, output capture and traceback
+    formatting follow the upstream interpreter.
+    """
+
+    def __init__(
+        self,
+        working_dir,
+        timeout: int = 3600,
+        format_tb_ipython: bool = False,
+        agent_file_name: str = "runfile.py",
+        env_vars: Optional[Dict[str, str]] = None,
+        preload: Optional[List[str]] = None,
+    ):
+        self.working_dir = Path(working_dir).resolve()
+        assert self.working_dir.exists(), f"Working directory {self.working_dir} does not exist"
+        self.timeout = timeout
+        self.format_tb_ipython = format_tb_ipython
+        self.agent_file_name = agent_file_name
+        self.env_vars = env_vars or {}
+        self.process = None
+        # The server starts on first use and keeps its preload list for its lifetime
+        _mp_context.set_forkserver_preload(preload if preload is not None else DEFAULT_PRELOAD)
+
+    def cleanup_session(self) -> None:
+        if self.process is None:
+            return
+        self._kill(self.process)
+        self.process = None
+
+    def _kill(self, process, grace_period: float = 2.0) -> None:
+        if not process.is_alive():
+            process.join()
+            return
+        # Interrupt first so the script can flush, then kill it
+        try:
+            os.kill(process.pid, signal.SIGINT)
+        except ProcessLookupError:
+            pass
+        process.join(grace_period)
+        if process.is_alive():
+            process.kill()
+        process.join()
+
+    @staticmethod
+    def _drain(output_queue, output: List[str]) -> None:
+        while True:
+            try:
+                output.append(output_queue.get_nowait())
+            except queue.Empty:
+                return
+
+    def run(self, code: str, reset_session: bool = True) -> ExecutionResult:
+        """
+        Execute ``code`` as the agent file in a child forked from the fork server.
+
+        Returns:
+            ExecutionResult with the captured output and exception details
+        """
+        self.cleanup_session()
+        output_queue, result_queue = _mp_context.Queue(), _mp_context.Queue()
+        self.process = _mp_context.Process(
+            target=_run_script,
+            args=(
+                code, str(self.working_dir), self.agent_file_name, self.format_tb_ipython,
+                self.env_vars, output_queue, result_queue,
+            ),
+        )
+
+        started_at = time.time()
+        self.process.start()
+        output: List[str] = []
+        result = None
+        while result is None:
+            self._drain(output_queue, output)
+            try:
+                result = result_queue.get(timeout=1)
+            except queue.Empty:
+                if not self.process.is_alive():
+                    # Died without reporting (e.g. killed by a signal or os._exit)
+                    self._drain(output_queue, output)
+                    output.append(f"Process exited unexpectedly with code {self.process.exitcode}")
+                    result = ("ProcessExitError", {"exitcode": self.process.exitcode}, None)
+                elif time.time() - started_at > self.timeout:
+                    logger.warning(f"Node script exceeded the {self.timeout}s time limit, killing it")
+                    self._kill(self.process)
+                    output.append(
+                        f"TimeoutError: Execution exceeded the time limit of {humanize.naturaldelta(self.timeout)}"
+                    )
+                    result = ("TimeoutError", {}, [])
+        exec_time = time.time() - started_at
+
+        self.process.join(timeout=5)
+        self._drain(output_queue, output)
+        self.cleanup_session()
+
+        exc_type, exc_info, exc_stack = result
+        output.append(
+            f"Execution time: {humanize.naturaldelta(exec_time)} seconds "
+            f"(time limit is {humanize.naturaldelta(self.timeout)})."
+        )
+        return ExecutionResult(output, exec_time, exc_type, exc_info, exc_stack)
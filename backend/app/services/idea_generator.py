@@ -6,7 +6,7 @@ import os
 import os.path as osp
 import re
 import traceback
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional
 
 import sys
 import boto3
@@ -15,6 +15,19 @@ from requests import Session
 
 from app.models.schema import ResearchIdea
 from ..core.config import settings
+from ..core.metrics import LLM_PARSE_FAILURES
+from .llm_router import LLMRouter
+from .prompt_budget import build_prev_ideas_section, normalize_ideas
+from .structured_output import (
+    REPAIR_PROMPT,
+    format_instructions,
+    get_streamed_response,
+    get_structured_response,
+    parse_action_response,
+    supports_streaming,
+    supports_structured_output,
+)
+from .ideation_stream import IdeaStream
 
 sys.path.append(osp.join(osp.dirname(__file__), ".."))
 from app.services.AI_Scientist_v2.ai_scientist.llm import (
@@ -28,27 +41,102 @@ from app.services.AI_Scientist_v2.ai_scientist.tools.base_tool import BaseTool
 from app.services.AI_Scientist_v2.ai_scientist.perform_ideation_temp_free import system_prompt, idea_generation_prompt, idea_reflection_prompt, tools_dict, tool_names_str
 
 
+def _ask_llm(
+    prompt_text: str,
+    client: Any,
+    model: str,
+    msg_history: List[Dict],
+    llm_router: Optional[LLMRouter],
+    structured_output: bool,
+    stream: Optional[IdeaStream] = None,
+):
+    """One ideation round-trip, routed, JSON-constrained and/or streamed when enabled."""
+    action_names = [*tools_dict.keys(), "FinalizeIdea"]
+    on_token = stream.token if stream else None
+
+    def request(route_client: Any, route_model: str):
+        if stream:
+            # Lets subscribers discard partial output of a failed route
+            stream.event("llm_call", model=route_model)
+        if structured_output and supports_structured_output(route_model):
+            return get_structured_response(
+                prompt=prompt_text,
+                client=route_client,
+                model=route_model,
+                system_message=system_prompt,
+                actions=action_names,
+                msg_history=msg_history,
+                on_token=on_token,
+            )
+        if stream and supports_streaming(route_client, route_model):
+            return get_streamed_response(
+                prompt=prompt_text,
+                client=route_client,
+                model=route_model,
+                system_message=system_prompt,
+                on_token=on_token,
+                msg_history=msg_history,
+            )
+        response_text, new_msg_history = get_response_from_llm(
+            prompt=prompt_text,
+            client=route_client,
+            model=route_model,
+            system_message=system_prompt,
+            msg_history=msg_history,
+        )
+        if stream:
+            # Models without streaming support arrive as one frame
+            stream.token(response_text)
+        return response_text, new_msg_history
+
+    if llm_router:
+        # Route through the ordered model list with fallback, and hedging unless
+        # streaming, where two routes would interleave their tokens
+        return llm_router.run(request, hedge=stream is None)
+    return request(client, model)
+
+
 def _generate_temp_free_idea(
     client: Any,
     model: str,
     workshop_description: str,
     max_num_generations: int = 2,
     num_reflections: int = 3,
-    previous_ideas: List[Dict] = [],
+    previous_ideas: Optional[List[Dict]] = None,
+    llm_router: Optional[LLMRouter] = None,
+    structured_output: Optional[bool] = None,
+    max_repairs: Optional[int] = None,
+    duplicate_check: Optional[Callable[[Dict], Optional[str]]] = None,
+    stream: Optional[IdeaStream] = None,
 ) -> List[Dict]:
-    # load ideas from file
+    if structured_output is None:
+        structured_output = settings.IDEATION_STRUCTURED_OUTPUT and supports_structured_output(model)
+    if max_repairs is None:
+        max_repairs = settings.IDEATION_PARSE_REPAIRS
+    action_names = [*tools_dict.keys(), "FinalizeIdea"]
+    # Work on a copy so the caller's list (and the default) is never mutated
+    ideas = normalize_ideas(previous_ideas)
 
     for gen_idx in range(max_num_generations):
         print()
         print(f"Generating proposal {gen_idx + 1}/{max_num_generations}")
         try:
-            prev_ideas_string = "\n\n".join(previous_ideas)
+            prev_ideas_string, _ = build_prev_ideas_section(
+                ideas,
+                max_tokens=settings.IDEATION_PREV_IDEAS_MAX_TOKENS,
+                keep_recent=settings.IDEATION_PREV_IDEAS_KEEP_RECENT,
+                model=model,
+            )
 
             last_tool_results = ""
             idea_finalized = False
             msg_history = []
 
             for reflection_round in range(num_reflections):
+                if stream:
+                    stream.event(
+                        "round", proposal=gen_idx + 1, round=reflection_round + 1, total_rounds=num_reflections
+                    )
                 if reflection_round == 0:
                     # Use the initial idea generation prompt
                     prompt_text = idea_generation_prompt.format(
@@ -63,84 +151,81 @@ def _generate_temp_free_idea(
                         last_tool_results=last_tool_results or "No new results.",
                     )
 
-                response_text, msg_history = get_response_from_llm(
-                    prompt=prompt_text,
-                    client=client,
-                    model=model,
-                    system_message=system_prompt,
-                    msg_history=msg_history,
+                response_text, msg_history = _ask_llm(
+                    prompt_text, client, model, msg_history, llm_router, structured_output, stream
                 )
 
-                # Parse the LLM's response
-                try:
-                    # Use regular expressions to extract the components
-                    action_pattern = r"ACTION:\s*(.*?)\s*ARGUMENTS:"
-                    arguments_pattern = r"ARGUMENTS:\s*(.*?)(?:$|\nTHOUGHT:|\n$)"
+                # Parse the LLM's response, asking the model to repair it before giving up
+                for repair_attempt in range(max_repairs + 1):
+                    try:
+                        action, arguments = parse_action_response(response_text)
+                        print(f"Action: {action}")
+                        print(f"Arguments: {arguments}")
 
-                    action_match = re.search(
-                        action_pattern, response_text, re.DOTALL | re.IGNORECASE
-                    )
-                    arguments_match = re.search(
-                        arguments_pattern, response_text, re.DOTALL | re.IGNORECASE
-                    )
-
-                    if not all([action_match, arguments_match]):
-                        raise ValueError("Failed to parse the LLM response.")
-
-                    action = action_match.group(1).strip()
-                    arguments_text = arguments_match.group(1).strip()
-                    print(f"Action: {action}")
-                    print(f"Arguments: {arguments_text}")
-
-                    # If arguments are wrapped in ```json blocks, extract the content
-                    if arguments_text.startswith("```json"):
-                        arguments_text = re.search(
-                            r"```json\s*(.*?)\s*```", arguments_text, re.DOTALL
-                        ).group(1)
-
-                    # Process the action and arguments
-                    if action in tools_dict:
-                        # It's a tool we have defined
-                        tool = tools_dict[action]
-                        # Parse arguments
-                        try:
-                            arguments_json = json.loads(arguments_text)
-                        except json.JSONDecodeError:
-                            raise ValueError(f"Invalid arguments JSON for {action}.")
-
-                        # Use the tool
-                        try:
-                            # Assuming the arguments match the parameters of the tool
-                            result = tool.use_tool(**arguments_json)
-                            last_tool_results = result
-                        except Exception as e:
-                            last_tool_results = f"Error using tool {action}: {str(e)}"
-                    elif action == "FinalizeIdea":
-                        # Parse arguments
-                        try:
-                            arguments_json = json.loads(arguments_text)
-                            idea = arguments_json.get("idea")
-                            if not idea:
+                        if action in tools_dict:
+                            # It's a tool we have defined
+                            if not isinstance(arguments, dict):
+                                raise ValueError(f"Invalid arguments JSON for {action}.")
+                        elif action == "FinalizeIdea":
+                            if not isinstance(arguments, dict):
+                                raise ValueError("Invalid arguments JSON for FinalizeIdea.")
+                            if not arguments.get("idea"):
                                 raise ValueError("Missing 'idea' in arguments.")
-
-                            # Append the idea to the archive
-                            previous_ideas.append(json.dumps(idea))
-                            print(f"Proposal finalized: {idea}")
-                            idea_finalized = True
+                        else:
+                            raise ValueError(
+                                f"Invalid action {action!r}. Available actions are: {tool_names_str}"
+                            )
+                        if repair_attempt:
+                            LLM_PARSE_FAILURES.labels(model=model, outcome="repaired").inc()
+                        break
+                    except ValueError as e:
+                        LLM_PARSE_FAILURES.labels(model=model, outcome="failed").inc()
+                        print(f"Failed to parse LLM response ({e}). Response text:\n{response_text}")
+                        if repair_attempt == max_repairs:
+                            action = None
                             break
-                        except json.JSONDecodeError:
-                            raise ValueError("Invalid arguments JSON for FinalizeIdea.")
-                    else:
-                        print(
-                            "Invalid action. Please specify one of the available tools."
+                        repair_prompt = REPAIR_PROMPT.format(
+                            error=str(e),
+                            format_instructions=format_instructions(action_names, structured_output),
+                        )
+                        response_text, msg_history = _ask_llm(
+                            repair_prompt, client, model, msg_history, llm_router, structured_output, stream
                         )
-                        print(f"Available actions are: {tool_names_str}")
-                except Exception as e:
-                    print(
-                        f"Failed to parse LLM response. Response text:\n{response_text}"
-                    )
-                    traceback.print_exc()
-                    break  # Exit the loop if parsing fails
+
+                if action is None:
+                    LLM_PARSE_FAILURES.labels(model=model, outcome="abandoned").inc()
+                    break  # Exit the loop if the response could not be repaired
+
+                # Process the action and arguments
+                if action in tools_dict:
+                    # Use the tool
+                    if stream:
+                        stream.event("tool_call", tool=action, arguments=arguments)
+                    try:
+                        # Assuming the arguments match the parameters of the tool
+                        result = tools_dict[action].use_tool(**arguments)
+                        last_tool_results = result
+                    except Exception as e:
+                        last_tool_results = f"Error using tool {action}: {str(e)}"
+                    if stream:
+                        stream.event("tool_result", tool=action, result=str(last_tool_results))
+                else:
+                    # Append the idea to the archive
+                    idea = arguments["idea"]
+                    # Send near-duplicates back for another round instead of accepting them
+                    rejection = duplicate_check(idea) if duplicate_check else None
+                    if rejection:
+                        print(f"Proposal rejected: {rejection}")
+                        if stream:
+                            stream.event("proposal_rejected", reason=rejection)
+                        last_tool_results = rejection
+                        continue
+                    ideas.append(idea)
+                    if stream:
+                        stream.event("proposal", idea=idea)
+                    print(f"Proposal finalized: {idea}")
+                    idea_finalized = True
+                    break
 
             if idea_finalized:
                 continue  # Move to the next idea
@@ -150,9 +235,6 @@ def _generate_temp_free_idea(
             traceback.print_exc()
             continue
 
-    # Save ideas
-    ideas = [json.loads(idea_str) for idea_str in previous_ideas]
-
     return ideas
 
 def download_code_from_r2(code_url: str) -> str:
@@ -0,0 +1,308 @@
+import asyncio
+import csv
+import io
+import json
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import BinaryIO, Dict, Any, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.logging import get_logger
+from ..db.database import get_db
+from ..models.schema import ResearchIdea, ResearchIdeaCreate, IdeaImportBatch, IdeaStatus
+from .ai_scientist_wrapper import ai_scientist
+from .background_tasks import BATCH_PRIORITY
+
+logger = get_logger("idea_import")
+
+# Only the first rejected rows are kept on the batch
+MAX_REPORTED_ERRORS = 100
+
+# How often each worker looks for generating batches whose next idea is due
+PACER_POLL_SECONDS = 1.0
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> str:
+    """Pick the import format from the upload's file extension or content type"""
+    name = (filename or "").lower()
+    if name.endswith((".jsonl", ".ndjson")) or content_type in ("application/x-ndjson", "application/jsonl"):
+        return "jsonl"
+    if name.endswith(".csv") or content_type == "text/csv":
+        return "csv"
+    raise HTTPException(status_code=400, detail="Unsupported file; upload a .jsonl or .csv file")
+
+
+def iter_rows(stream: BinaryIO, file_format: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Yield ``(line_number, row)`` from the upload one row at a time.
+
+    JSONL rows that are not valid JSON are yielded as the ``ValueError``
+    raised while parsing them, so they are reported without stopping the import.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    if file_format == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as e:
+            yield line_number, e
+
+
+def validate_row(row: Any) -> ResearchIdeaCreate:
+    if isinstance(row, Exception):
+        raise ValueError(f"Invalid JSON: {str(row)}")
+    if not isinstance(row, dict):
+        raise ValueError("Row must be an object")
+    # Keywords may be given as a list in JSONL
+    if isinstance(row.get("keywords"), list):
+        row = {**row, "keywords": ", ".join(str(keyword) for keyword in row["keywords"])}
+    idea = ResearchIdeaCreate(**row)
+    for field in ("title", "keywords", "tldr", "abstract"):
+        if not getattr(idea, field).strip():
+            raise ValueError(f"{field} must not be empty")
+    return idea
+
+
+def _format_error(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(loc) for loc in detail['loc'])}: {detail['msg']}" for detail in error.errors()
+        )
+    return str(error)
+
+
+class IdeaImporter:
+    """
+    Bulk-creates research ideas from JSONL/CSV uploads and paces their generation.
+
+    The pace is kept on the batch row (``generation_queued`` and
+    ``next_generation_at``), and every worker's pacer thread queues the ideas
+    that are due. A batch therefore keeps generating when the worker that
+    imported it restarts. Each idea is claimed with a conditional update, so it
+    is queued once however many workers poll.
+    """
+
+    def __init__(self, batch_size: int = 500, generate_rate_per_minute: int = 10):
+        self.batch_size = batch_size
+        self.generate_rate_per_minute = generate_rate_per_minute
+        self._lock = threading.Lock()
+        self._pacer: Optional[threading.Thread] = None
+        self._pacer_stop = threading.Event()
+
+    def import_file(
+        self,
+        stream: BinaryIO,
+        file_format: str,
+        db: Session,
+        generate: bool = False,
+        rate_per_minute: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Validate and insert every row of the upload, then optionally queue generation.
+
+        Rows are validated as they are read and inserted ``batch_size`` at a time
+        with a single executemany each; invalid rows are skipped and reported.
+
+        Returns:
+            The batch handle used to track the import and generation progress
+        """
+        batch = IdeaImportBatch(file_format=file_format, generate=generate, errors=[], idea_ids=[])
+        db.add(batch)
+        db.commit()
+        db.refresh(batch)
+
+        total_rows = 0
+        errors: List[Dict[str, Any]] = []
+        failed_rows = 0
+        idea_ids: List[str] = []
+        pending: List[Dict[str, Any]] = []
+        try:
+            for line_number, row in iter_rows(stream, file_format):
+                total_rows += 1
+                try:
+                    idea = validate_row(row)
+                except (ValidationError, ValueError, TypeError) as e:
+                    failed_rows += 1
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append({"line": line_number, "error": _format_error(e)})
+                    continue
+
+                pending.append({
+                    "id": str(uuid.uuid4()),
+                    "title": idea.title,
+                    "keywords": idea.keywords,
+                    "tldr": idea.tldr,
+                    "abstract": idea.abstract,
+                    "status": IdeaStatus.DRAFT,
+                    "created_at": datetime.now(),
+                })
+                if len(pending) >= self.batch_size:
+                    idea_ids.extend(self._insert(db, pending))
+                    pending = []
+            if pending:
+                idea_ids.extend(self._insert(db, pending))
+        except UnicodeDecodeError as e:
+            batch.error_message = f"File is not valid UTF-8: {str(e)}"
+            batch.status = "failed"
+
+        batch.total_rows = total_rows
+        batch.imported_rows = len(idea_ids)
+        batch.failed_rows = failed_rows
+        batch.errors = errors
+        batch.idea_ids = idea_ids
+        if batch.status != "failed":
+            if generate and idea_ids:
+                batch.status = "generating"
+                rate = rate_per_minute or self.generate_rate_per_minute
+                batch.generate_interval_seconds = 60.0 / max(rate, 1)
+                batch.next_generation_at = datetime.now()
+            else:
+                batch.status = "completed"
+                batch.completed_at = datetime.now()
+        db.commit()
+
+        logger.info(
+            f"Imported {len(idea_ids)} of {total_rows} ideas in batch {batch.id} ({failed_rows} rejected)"
+        )
+
+        return self.get_status(batch.id, db)
+
+    def _insert(self, db: Session, rows: List[Dict[str, Any]]) -> List[str]:
+        """Insert one batch of rows with a single executemany and commit it"""
+        db.execute(insert(ResearchIdea), rows)
+        db.commit()
+        return [row["id"] for row in rows]
+
+    def pace(self) -> int:
+        """
+        Queue generation for the next idea of every generating batch that is due.
+
+        Returns:
+            Number of ideas queued by this call
+        """
+        db = next(get_db())
+        queued = 0
+        try:
+            due = db.query(IdeaImportBatch.id, IdeaImportBatch.generation_queued).filter(
+                IdeaImportBatch.status == "generating",
+                IdeaImportBatch.next_generation_at <= datetime.now(),
+            ).all()
+            for batch_id, index in due:
+                if self._queue_generation(db, batch_id, index):
+                    queued += 1
+        finally:
+            db.close()
+        return queued
+
+    def _queue_generation(self, db: Session, batch_id: str, index: int) -> bool:
+        """Claim the batch's ``index``-th idea and queue its generation; False if another worker claimed it"""
+        try:
+            batch = db.query(IdeaImportBatch).filter(IdeaImportBatch.id == batch_id).first()
+            idea_ids = batch.idea_ids or []
+            now = datetime.now()
+            interval = batch.generate_interval_seconds or 60.0 / max(self.generate_rate_per_minute, 1)
+            values: Dict[str, Any] = {
+                "generation_queued": index + 1,
+                "next_generation_at": now + timedelta(seconds=interval),
+            }
+            finished = index + 1 >= len(idea_ids)
+            if finished:
+                values.update({"status": "completed", "completed_at": now})
+            # Only one worker moves the batch past ``index``
+            claimed = db.query(IdeaImportBatch).filter(
+                IdeaImportBatch.id == batch_id,
+                IdeaImportBatch.status == "generating",
+                IdeaImportBatch.generation_queued == index,
+            ).update(values, synchronize_session=False)
+            db.commit()
+            if not claimed:
+                return False
+
+            if index < len(idea_ids):
+                try:
+                    asyncio.run(ai_scientist.generate_ideas(idea_ids[index], db, priority=BATCH_PRIORITY))
+                except Exception as e:
+                    logger.error(f"Could not queue generation for idea {idea_ids[index]}: {str(e)}")
+            if finished:
+                logger.info(f"Queued generation for {index + 1} ideas of batch {batch_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Error pacing generation for import batch {batch_id}: {str(e)}")
+            db.rollback()
+            db.query(IdeaImportBatch).filter(IdeaImportBatch.id == batch_id).update(
+                {"status": "failed", "error_message": str(e), "completed_at": datetime.now()}
+            )
+            db.commit()
+            return False
+
+    def start_pacer(self, interval_seconds: float = PACER_POLL_SECONDS) -> None:
+        """Periodically queue due generations of imported batches in a daemon thread"""
+        with self._lock:
+            if self._pacer and self._pacer.is_alive():
+                return
+            self._pacer_stop.clear()
+
+            def run():
+                while not self._pacer_stop.wait(interval_seconds):
+                    try:
+                        self.pace()
+                    except Exception as e:
+                        logger.error(f"Error pacing imported idea generation: {str(e)}")
+
+            self._pacer = threading.Thread(target=run, name="import-pacer", daemon=True)
+            self._pacer.start()
+
+    def stop_pacer(self) -> None:
+        self._pacer_stop.set()
+
+    def get_status(self, batch_id: str, db: Session) -> Dict[str, Any]:
+        """Import counts of a batch and the generation status of its ideas."""
+        batch = db.query(IdeaImportBatch).filter(IdeaImportBatch.id == batch_id).first()
+        if not batch:
+            raise HTTPException(status_code=404, detail="Import batch not found")
+
+        idea_statuses: Dict[str, int] = {}
+        idea_ids = batch.idea_ids or []
+        for start in range(0, len(idea_ids), self.batch_size):
+            rows = db.query(ResearchIdea.status, func.count()).filter(
+                ResearchIdea.id.in_(idea_ids[start:start + self.batch_size])
+            ).group_by(ResearchIdea.status).all()
+            for status, count in rows:
+                idea_statuses[status] = idea_statuses.get(status, 0) + count
+
+        return {
+            "batch_id": batch.id,
+            "status": batch.status,
+            "file_format": batch.file_format,
+            "total_rows": batch.total_rows,
+            "imported_rows": batch.imported_rows,
+            "failed_rows": batch.failed_rows,
+            "errors": batch.errors or [],
+            "generate": batch.generate,
+            "generation_queued": batch.generation_queued,
+            "idea_statuses": idea_statuses,
+            "error_message": batch.error_message,
+            "created_at": batch.created_at,
+            "completed_at": batch.completed_at,
+            "idea_ids": idea_ids,
+        }
+
+
+# Create singleton instance
+idea_importer = IdeaImporter(
+    batch_size=settings.BULK_IMPORT_BATCH_SIZE,
+    generate_rate_per_minute=settings.BULK_GENERATE_RATE_PER_MINUTE,
+)
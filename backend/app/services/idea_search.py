@@ -0,0 +1,101 @@
+import re
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import func, literal_column, text
+from sqlalchemy.orm import Session
+
+from ..core.logging import get_logger
+from ..models.schema import ResearchIdea
+
+logger = get_logger("idea_search")
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+# bm25 column weights for the SQLite FTS table (idea_id, title, keywords, tldr, abstract, proposals)
+SQLITE_BM25_WEIGHTS = "0.0, 10.0, 5.0, 5.0, 2.0, 1.0"
+
+
+def search_ideas(db: Session, query: str, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+    """
+    Ranked full-text search over idea titles, keywords, TL;DRs, abstracts and generated proposals.
+
+    Args:
+        db: Database session
+        query: Search terms; on Postgres quoted phrases, ``or`` and ``-term`` are supported
+        limit: Page size
+        offset: Number of hits to skip
+
+    Returns:
+        The total number of matches and the requested page of hits, best first
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        total, hits = _search_sqlite(db, query, limit, offset)
+    else:
+        total, hits = _search_postgres(db, query, limit, offset)
+    return {"query": query, "total": total, "offset": offset, "limit": limit, "results": hits}
+
+
+def _search_postgres(db: Session, query: str, limit: int, offset: int) -> Tuple[int, List[Dict[str, Any]]]:
+    search_vector = literal_column("research_ideas.search_vector")
+    ts_query = func.websearch_to_tsquery("english", query)
+    matches = search_vector.op("@@")(ts_query)
+
+    total = db.query(func.count(ResearchIdea.id)).filter(matches).scalar()
+    rank = func.ts_rank_cd(search_vector, ts_query).label("rank")
+    rows = (
+        db.query(ResearchIdea, rank)
+        .filter(matches)
+        .order_by(rank.desc(), ResearchIdea.created_at.desc())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+
+    # Headlines are costly, so only compute them for the returned page
+    snippets: Dict[str, str] = {}
+    if rows:
+        snippet = func.ts_headline(
+            "english", ResearchIdea.abstract, ts_query, "MaxFragments=2, MaxWords=20, MinWords=5"
+        )
+        snippets = dict(
+            db.query(ResearchIdea.id, snippet).filter(ResearchIdea.id.in_([idea.id for idea, _ in rows])).all()
+        )
+
+    return total, [
+        {"idea": idea, "rank": float(score), "snippet": snippets.get(idea.id)} for idea, score in rows
+    ]
+
+
+def _fts5_query(query: str) -> str:
+    """Quote every term so user input can never be parsed as FTS5 syntax"""
+    return " ".join(f'"{term}"' for term in _TERM_RE.findall(query))
+
+
+def _search_sqlite(db: Session, query: str, limit: int, offset: int) -> Tuple[int, List[Dict[str, Any]]]:
+    match = _fts5_query(query)
+    if not match:
+        return 0, []
+
+    total = db.execute(
+        text("SELECT count(*) FROM research_ideas_fts WHERE research_ideas_fts MATCH :match"),
+        {"match": match},
+    ).scalar()
+    # bm25 is lower for better matches
+    rows = db.execute(
+        text(
+            f"SELECT idea_id, bm25(research_ideas_fts, {SQLITE_BM25_WEIGHTS}) AS rank, "
+            "snippet(research_ideas_fts, 4, '<b>', '</b>', '...', 20) AS snippet "
+            "FROM research_ideas_fts WHERE research_ideas_fts MATCH :match "
+            "ORDER BY rank LIMIT :limit OFFSET :offset"
+        ),
+        {"match": match, "limit": limit, "offset": offset},
+    ).all()
+
+    ideas = {
+        idea.id: idea
+        for idea in db.query(ResearchIdea).filter(ResearchIdea.id.in_([row.idea_id for row in rows])).all()
+    }
+    return total, [
+        {"idea": ideas[row.idea_id], "rank": -float(row.rank), "snippet": row.snippet}
+        for row in rows if row.idea_id in ideas
+    ]
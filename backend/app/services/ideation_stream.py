@@ -0,0 +1,227 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..core.config import settings
+from ..core.logging import get_logger
+
+logger = get_logger("ideation_stream")
+
+# Longest text kept for tool results in stream frames
+MAX_EVENT_TEXT_CHARS = 2000
+
+# Bytes read at a time from the end of a stream file when looking for its last frame
+TAIL_READ_BYTES = 4096
+
+# Age after which a stream that never finished (its worker died) is removed as well
+STALE_STREAM_SECONDS = 24 * 3600
+
+
+def _last_line(f, size: int) -> bytes:
+    """Last non-empty line of a file of ``size`` bytes, reading backwards from its end"""
+    data = b""
+    position = size
+    while position > 0:
+        step = min(TAIL_READ_BYTES, position)
+        position -= step
+        f.seek(position)
+        data = f.read(step) + data
+        stripped = data.rstrip(b"\n")
+        if b"\n" in stripped:
+            return stripped.rsplit(b"\n", 1)[-1]
+    return data.rstrip(b"\n")
+
+
+def _is_done_frame(line: bytes) -> bool:
+    try:
+        return json.loads(line).get("type") == "done"
+    except ValueError:
+        return False
+
+
+class IdeaStream:
+    """
+    Writer of one ideation run's live output.
+
+    Tokens are buffered and written as a single ``tokens`` frame once
+    ``frame_chars`` characters or ``frame_interval_seconds`` have accumulated;
+    any other event flushes pending tokens first so frames stay in order.
+    """
+
+    def __init__(self, path: Path, frame_chars: int = 256, frame_interval_seconds: float = 0.1):
+        self.path = path
+        self.frame_chars = frame_chars
+        self.frame_interval_seconds = frame_interval_seconds
+        self._buffer: List[str] = []
+        self._buffered_chars = 0
+        self._last_flush = time.monotonic()
+        self._seq = 0
+        self._lock = threading.Lock()
+        # A new run replaces the previous run's file; readers notice the new inode
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        self._file = open(tmp_path, "w", encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def _write(self, frame: Dict[str, Any]) -> None:
+        self._file.write(json.dumps({"seq": self._seq, "time": time.time(), **frame}, default=str) + "\n")
+        self._file.flush()
+        self._seq += 1
+
+    def _flush_tokens(self) -> None:
+        if self._buffer:
+            self._write({"type": "tokens", "text": "".join(self._buffer)})
+            self._buffer = []
+            self._buffered_chars = 0
+        self._last_flush = time.monotonic()
+
+    def token(self, text: str) -> None:
+        """Add streamed model output to the current frame"""
+        if not text:
+            return
+        with self._lock:
+            self._buffer.append(text)
+            self._buffered_chars += len(text)
+            if (
+                self._buffered_chars >= self.frame_chars
+                or time.monotonic() - self._last_flush >= self.frame_interval_seconds
+            ):
+                self._flush_tokens()
+
+    def event(self, event_type: str, **data: Any) -> None:
+        """Write a non-token event such as a reflection round or tool call"""
+        for key, value in data.items():
+            if isinstance(value, str) and len(value) > MAX_EVENT_TEXT_CHARS:
+                data[key] = value[:MAX_EVENT_TEXT_CHARS] + "..."
+        with self._lock:
+            self._flush_tokens()
+            self._write({"type": event_type, **data})
+
+    def close(self, status: str = "completed", error: Optional[str] = None) -> None:
+        with self._lock:
+            if self._file.closed:
+                return
+            self._flush_tokens()
+            self._write({"type": "done", "status": status, "error": error})
+            self._file.close()
+
+
+class IdeationStreams:
+    """
+    Per-idea frame files shared by all worker processes.
+
+    The worker running an ideation task writes frames with ``open``; every
+    worker holding WebSocket subscribers for the idea tails the file with
+    ``read``, so subscribers receive frames regardless of which worker they
+    are connected to.
+    """
+
+    def __init__(
+        self,
+        state_dir: str,
+        frame_chars: int = 256,
+        frame_interval_seconds: float = 0.1,
+        retention_seconds: float = 300,
+    ):
+        self.state_dir = Path(state_dir)
+        self.frame_chars = frame_chars
+        self.frame_interval_seconds = frame_interval_seconds
+        self.retention_seconds = retention_seconds
+
+    def _path(self, idea_id: str) -> Path:
+        return self.state_dir / f"{idea_id}.jsonl"
+
+    def open(self, idea_id: str) -> IdeaStream:
+        return IdeaStream(self._path(idea_id), self.frame_chars, self.frame_interval_seconds)
+
+    def start_position(self, idea_id: str) -> Tuple[Optional[int], int]:
+        """
+        Where a new subscriber starts reading: the beginning of a run still in
+        progress, so late subscribers catch up, or the end of a finished one.
+
+        Returns:
+            The file's inode and offset, or ``(None, 0)`` when no run has streamed yet
+        """
+        path = self._path(idea_id)
+        try:
+            with open(path, "rb") as f:
+                inode = os.fstat(f.fileno()).st_ino
+                # Only the last frame tells whether the run finished
+                size = f.seek(0, os.SEEK_END)
+                last = _last_line(f, size)
+        except FileNotFoundError:
+            return None, 0
+        return inode, size if _is_done_frame(last) else 0
+
+    def prune(self) -> int:
+        """
+        Remove stream files of runs that finished more than ``retention_seconds``
+        ago, once every tailer has long read their last frame.
+
+        Returns:
+            Number of files removed
+        """
+        removed = 0
+        now = time.time()
+        try:
+            paths = list(self.state_dir.glob("*.jsonl"))
+        except OSError:
+            return 0
+        for path in paths:
+            try:
+                with open(path, "rb") as f:
+                    age = now - os.fstat(f.fileno()).st_mtime
+                    if age < self.retention_seconds:
+                        continue
+                    if age < STALE_STREAM_SECONDS and not _is_done_frame(_last_line(f, f.seek(0, os.SEEK_END))):
+                        continue
+                path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                logger.warning(f"Could not remove ideation stream {path.name}: {str(e)}")
+        return removed
+
+    def read(self, idea_id: str, inode: Optional[int], offset: int) -> Tuple[List[Dict[str, Any]], Optional[int], int]:
+        """
+        Complete frames written since ``offset``.
+
+        A new run replaces the file; when its inode differs from ``inode`` the
+        new run is read from the beginning.
+
+        Returns:
+            The frames and the inode and offset to continue from
+        """
+        path = self._path(idea_id)
+        try:
+            with open(path, "rb") as f:
+                current_inode = os.fstat(f.fileno()).st_ino
+                if current_inode != inode:
+                    offset = 0
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return [], None, 0
+
+        # Leave a partially written last line for the next read
+        end = data.rfind(b"\n") + 1
+        frames = []
+        for line in data[:end].splitlines():
+            try:
+                frames.append(json.loads(line))
+            except ValueError:
+                logger.warning(f"Skipping malformed stream frame for idea {idea_id}")
+        return frames, current_inode, offset + end
+
+
+# Create singleton instance
+ideation_streams = IdeationStreams(
+    state_dir=settings.IDEATION_STREAM_DIR,
+    frame_chars=settings.IDEATION_STREAM_FRAME_CHARS,
+    frame_interval_seconds=settings.IDEATION_STREAM_FRAME_INTERVAL_SECONDS,
+    retention_seconds=settings.IDEATION_STREAM_RETENTION_SECONDS,
+)
@@ -0,0 +1,142 @@
+import json
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from ..core.logging import get_logger
+
+logger = get_logger("interaction_log")
+
+LOG_FILE_NAME = "token_tracker_interactions.jsonl.gz"
+INDEX_FILE_NAME = "token_tracker_interactions.index.jsonl"
+
+
+class InteractionLogWriter:
+    """
+    Append-only, gzip-compressed JSONL log of LLM interactions.
+
+    Each call to ``append`` writes one self-contained gzip member, so the file is
+    a valid multi-member ``.gz`` that ``zcat`` can read while still being
+    seekable: the sidecar index records the byte offset, length, record range and
+    stage of every member.
+    """
+
+    def __init__(self, output_dir: Path):
+        self.output_dir = Path(output_dir)
+        self.log_path = self.output_dir / LOG_FILE_NAME
+        self.index_path = self.output_dir / INDEX_FILE_NAME
+        self._lock = threading.Lock()
+        self._next_seq = self._load_next_seq()
+
+    def _load_next_seq(self) -> int:
+        """Continue numbering after the last indexed record if the log already exists"""
+        if not self.index_path.exists():
+            return 0
+        next_seq = 0
+        with open(self.index_path, "r") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    next_seq = entry["first_seq"] + entry["count"]
+        return next_seq
+
+    def append(self, records: List[Dict[str, Any]], stage: Optional[str] = None) -> None:
+        """Compress ``records`` into a single gzip member and index it"""
+        if not records:
+            return
+
+        with self._lock:
+            payload = "".join(
+                json.dumps({"seq": self._next_seq + i, **record}, default=str) + "\n"
+                for i, record in enumerate(records)
+            ).encode("utf-8")
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+            member = compressor.compress(payload) + compressor.flush()
+
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.log_path, "ab") as f:
+                offset = f.tell()
+                f.write(member)
+                f.flush()
+                os.fsync(f.fileno())
+
+            entry = {
+                "offset": offset,
+                "length": len(member),
+                "first_seq": self._next_seq,
+                "count": len(records),
+                "stage": stage,
+            }
+            with open(self.index_path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+            self._next_seq += len(records)
+
+
+class InteractionLogReader:
+    """Pages through an interaction log using its index, decompressing only the members it needs"""
+
+    def __init__(self, output_dir: Path):
+        self.output_dir = Path(output_dir)
+        self.log_path = self.output_dir / LOG_FILE_NAME
+        self.index_path = self.output_dir / INDEX_FILE_NAME
+
+    def exists(self) -> bool:
+        return self.log_path.exists() and self.index_path.exists()
+
+    def load_index(self, stage: Optional[str] = None) -> List[Dict[str, Any]]:
+        entries = []
+        with open(self.index_path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if stage is None or entry.get("stage") == stage:
+                    entries.append(entry)
+        return entries
+
+    def stages(self) -> Dict[str, int]:
+        """Number of interactions recorded per stage"""
+        counts: Dict[str, int] = {}
+        for entry in self.load_index():
+            key = entry.get("stage") or "unknown"
+            counts[key] = counts.get(key, 0) + entry["count"]
+        return counts
+
+    def read_page(self, offset: int = 0, limit: int = 50, stage: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Return up to ``limit`` interactions starting at position ``offset``
+        within the (optionally stage-filtered) log.
+        """
+        entries = self.load_index(stage)
+        total = sum(entry["count"] for entry in entries)
+        items: List[Dict[str, Any]] = []
+
+        position = 0
+        with open(self.log_path, "rb") as f:
+            for entry in entries:
+                if len(items) >= limit:
+                    break
+                if position + entry["count"] <= offset:
+                    position += entry["count"]
+                    continue
+
+                f.seek(entry["offset"])
+                member = f.read(entry["length"])
+                lines = zlib.decompress(member, 31).decode("utf-8").splitlines()
+
+                start = max(offset - position, 0)
+                for line in lines[start:]:
+                    if len(items) >= limit:
+                        break
+                    items.append(json.loads(line))
+                position += entry["count"]
+
+        return {
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "items": items,
+        }
@@ -0,0 +1,311 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from ..core.config import settings
+from ..core.logging import get_logger
+from ..core.metrics import LLM_ROUTE_LATENCY
+from .background_tasks import CancellationToken, TaskCancelled, current_cancel_token
+from .AI_Scientist_v2.ai_scientist.llm import create_client
+
+logger = get_logger("llm_router")
+
+# Calls run on a shared pool so a timed-out request can be abandoned while a
+# fallback or hedge proceeds; abandoned calls are cancelled and stop before their next LLM call,
+# but hold their pool thread until the LLM call in progress returns.
+_executor = ThreadPoolExecutor(max_workers=settings.LLM_ROUTER_MAX_WORKERS, thread_name_prefix="llm-route")
+
+# Longest wait between checks for calls leaving the pool queue and for cancellation of the caller
+POLL_SECONDS = 0.5
+
+
+class LLMRoutingError(Exception):
+    """Raised when every route of a request failed or timed out"""
+
+
+class RouteCall:
+    """One routed call: when it left the pool queue, and the flag that abandons it"""
+
+    def __init__(self, model: str, hedged: bool):
+        self.model = model
+        self.hedged = hedged
+        self.started_at: Optional[float] = None
+        self.token = CancellationToken()
+
+
+class _CancellableClient:
+    """
+    Client proxy that refuses new requests once its call is abandoned.
+
+    Routed requests may make several LLM calls (e.g. reviews); every call goes
+    through an attribute of the client, so an abandoned request stops at its next one.
+    """
+
+    def __init__(self, client: Any, token: CancellationToken):
+        self._client = client
+        self._token = token
+
+    def __getattr__(self, name: str) -> Any:
+        self._token.raise_if_cancelled()
+        return getattr(self._client, name)
+
+
+class RouteStats:
+    """Recent latencies and outcome counts of one route"""
+
+    def __init__(self, window: int = 500):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.outcomes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, outcome: str, latency: Optional[float] = None) -> None:
+        with self._lock:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+            if latency is not None:
+                self.latencies.append(latency)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self.latencies)
+            outcomes = dict(self.outcomes)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return latencies[min(int(p * len(latencies)), len(latencies) - 1)]
+
+        return {
+            "outcomes": outcomes,
+            "samples": len(latencies),
+            "p50_seconds": percentile(0.5),
+            "p95_seconds": percentile(0.95),
+            "p99_seconds": percentile(0.99),
+            "max_seconds": latencies[-1] if latencies else None,
+        }
+
+
+class LLMRouter:
+    """
+    Sends an LLM request to an ordered list of models, falling back on errors and timeouts.
+
+    With ``hedge_after_seconds`` set, the next route is also started when the
+    current one has not answered within that time, and whichever finishes
+    first wins. Requests are functions of ``(client, model)``, so both single
+    completions and whole upstream helpers (e.g. reviews) can be routed.
+    """
+
+    def __init__(
+        self,
+        models: List[str],
+        timeout_seconds: Optional[float] = None,
+        hedge_after_seconds: Optional[float] = None,
+    ):
+        if not models:
+            raise ValueError("At least one model is required")
+        self.models = models
+        self.timeout_seconds = timeout_seconds
+        self.hedge_after_seconds = hedge_after_seconds
+        self.stats = {model: RouteStats() for model in models}
+        self._clients: Dict[str, Tuple[Any, str]] = {}
+        self._clients_lock = threading.Lock()
+        # Abandoned calls per route that still occupy a pool thread
+        self._abandoned: Dict[str, int] = {model: 0 for model in models}
+        self._abandoned_lock = threading.Lock()
+
+    @property
+    def primary_model(self) -> str:
+        return self.models[0]
+
+    def _client(self, model: str) -> Tuple[Any, str]:
+        with self._clients_lock:
+            if model not in self._clients:
+                self._clients[model] = create_client(model)
+            return self._clients[model]
+
+    def _submit(self, route_call: RouteCall, request: Callable[[Any, str], Any]) -> Future:
+        def call():
+            # Timeouts count from here, not from the time spent queued for a pool thread
+            route_call.started_at = time.monotonic()
+            route_call.token.raise_if_cancelled()
+            client, client_model = self._client(route_call.model)
+            return request(_CancellableClient(client, route_call.token), client_model)
+
+        # Run with the caller's context so token tracking follows the call
+        return _executor.submit(contextvars.copy_context().run, call)
+
+    def _abandon(self, future: Future, route_call: RouteCall) -> None:
+        """Cancel a call, counting it against its route until its pool thread is free again"""
+        route_call.token.cancel()
+        if future.cancel():
+            return
+        with self._abandoned_lock:
+            self._abandoned[route_call.model] += 1
+
+        def release(_: Future) -> None:
+            with self._abandoned_lock:
+                self._abandoned[route_call.model] -= 1
+
+        future.add_done_callback(release)
+
+    def _saturated(self, model: str) -> bool:
+        """Whether a degraded route already holds as many pool threads as it may"""
+        with self._abandoned_lock:
+            return self._abandoned[model] >= settings.LLM_ROUTER_MAX_ABANDONED_PER_ROUTE
+
+    def _record(self, model: str, outcome: str, latency: float) -> None:
+        self.stats[model].record(outcome, latency if outcome in ("success", "hedge_success") else None)
+        LLM_ROUTE_LATENCY.labels(model=model, outcome=outcome).observe(latency)
+
+    def run(
+        self,
+        request: Callable[[Any, str], Any],
+        timeout_seconds: Optional[float] = None,
+        hedge: bool = True,
+    ) -> Any:
+        """
+        Execute ``request(client, model)`` on the first route that succeeds in time.
+
+        Args:
+            request: Function performing the LLM call with the given client and model
+            timeout_seconds: Per-route timeout counted from when the call leaves the
+                pool queue, defaults to the router's. The whole request, queueing
+                included, is given up after twice the timeout per route.
+            hedge: Whether slow routes may be hedged; disable for expensive multi-call requests
+
+        Returns:
+            The result of the first successful route
+
+        Raises:
+            LLMRoutingError: If every route failed, timed out or was skipped because
+                too many of its abandoned calls are still running
+        """
+        timeout_seconds = timeout_seconds if timeout_seconds is not None else self.timeout_seconds
+        hedge_after_seconds = self.hedge_after_seconds if hedge else None
+        cancel_token = current_cancel_token()
+        # Bounds the time spent queued for a pool thread, which the per-route timeout does not cover
+        overall_timeout = 2 * timeout_seconds * len(self.models) if timeout_seconds else None
+        deadline = time.monotonic() + overall_timeout if overall_timeout else None
+
+        next_route = 0
+        in_flight: Dict[Future, RouteCall] = {}
+        route_calls: List[RouteCall] = []
+        errors: List[str] = []
+
+        def launch(hedged: bool = False) -> None:
+            nonlocal next_route
+            while next_route < len(self.models):
+                model = self.models[next_route]
+                next_route += 1
+                if self._saturated(model):
+                    # Calls to this route keep hanging; more of them would only starve the pool
+                    self.stats[model].record("saturated")
+                    errors.append(f"{model}: too many abandoned calls still running")
+                    logger.warning(f"LLM route {model} skipped, too many abandoned calls still running")
+                    continue
+                route_call = RouteCall(model, hedged)
+                route_calls.append(route_call)
+                in_flight[self._submit(route_call, request)] = route_call
+                return
+
+        def abandon_all() -> None:
+            for route_call in list(route_calls):
+                route_call.token.cancel()
+
+        def abandon(future: Future) -> None:
+            self._abandon(future, in_flight.pop(future))
+
+        # Cancelling the calling task abandons every call still in flight
+        unregister = cancel_token.on_cancel(abandon_all)
+        try:
+            launch()
+            while in_flight:
+                now = time.monotonic()
+                started = [route_call.started_at for route_call in in_flight.values() if route_call.started_at]
+                deadlines = [now + POLL_SECONDS]
+                if deadline:
+                    deadlines.append(deadline)
+                if timeout_seconds:
+                    deadlines.extend(started_at + timeout_seconds for started_at in started)
+                can_hedge = hedge_after_seconds and len(in_flight) == 1 and next_route < len(self.models)
+                if can_hedge:
+                    deadlines.extend(started_at + hedge_after_seconds for started_at in started)
+
+                done, _ = wait(list(in_flight), timeout=max(min(deadlines) - now, 0), return_when=FIRST_COMPLETED)
+                now = time.monotonic()
+                cancel_token.raise_if_cancelled()
+
+                for future in done:
+                    route_call = in_flight.pop(future)
+                    latency = now - (route_call.started_at or now)
+                    try:
+                        result = future.result()
+                    except TaskCancelled:
+                        raise
+                    except Exception as e:
+                        self._record(route_call.model, "error", latency)
+                        errors.append(f"{route_call.model}: {str(e)}")
+                        logger.warning(f"LLM route {route_call.model} failed: {str(e)}")
+                        continue
+                    self._record(route_call.model, "hedge_success" if route_call.hedged else "success", latency)
+                    return result
+
+                if deadline and now >= deadline:
+                    for future, route_call in list(in_flight.items()):
+                        abandon(future)
+                        self._record(route_call.model, "timeout", now - (route_call.started_at or now))
+                    errors.append(f"request not answered within {overall_timeout}s")
+                    logger.warning(f"LLM request to {self.primary_model} gave up after {overall_timeout}s")
+                    break
+
+                if timeout_seconds:
+                    for future, route_call in list(in_flight.items()):
+                        if route_call.started_at and now - route_call.started_at >= timeout_seconds:
+                            abandon(future)
+                            self._record(route_call.model, "timeout", now - route_call.started_at)
+                            errors.append(f"{route_call.model}: timed out after {timeout_seconds}s")
+                            logger.warning(f"LLM route {route_call.model} timed out after {timeout_seconds}s")
+
+                if not in_flight and next_route < len(self.models):
+                    launch()
+                elif can_hedge and len(in_flight) == 1:
+                    route_call = next(iter(in_flight.values()))
+                    if route_call.started_at and now - route_call.started_at >= hedge_after_seconds:
+                        logger.info(f"LLM route {route_call.model} slower than {hedge_after_seconds}s, hedging")
+                        launch(hedged=True)
+        finally:
+            unregister()
+            # Losing calls stop before their next LLM call
+            for future in list(in_flight):
+                abandon(future)
+
+        raise LLMRoutingError(f"All LLM routes failed: {'; '.join(errors)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Latency percentiles and outcome counts per route in this process"""
+        return {model: self.stats[model].summary() for model in self.models}
+
+
+_routers: Dict[Tuple[str, ...], LLMRouter] = {}
+_routers_lock = threading.Lock()
+
+
+def get_router(primary_model: str) -> LLMRouter:
+    """Router for ``primary_model`` followed by the configured fallback models"""
+    models = tuple(dict.fromkeys([primary_model, *settings.LLM_FALLBACK_MODELS]))
+    with _routers_lock:
+        if models not in _routers:
+            _routers[models] = LLMRouter(
+                list(models),
+                timeout_seconds=settings.LLM_ROUTE_TIMEOUT_SECONDS,
+                hedge_after_seconds=settings.LLM_HEDGE_AFTER_SECONDS,
+            )
+        return _routers[models]
+
+
+def get_all_route_stats() -> Dict[str, Any]:
+    with _routers_lock:
+        routers = list(_routers.values())
+    return {" > ".join(router.models): router.get_stats() for router in routers}
@@ -0,0 +1,178 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ..core.logging import get_logger
+from ..core.metrics import PROMPT_TOKENS_SAVED
+
+logger = get_logger("prompt_budget")
+
+try:
+    import tiktoken
+except ImportError:  # Fall back to a character-based estimate
+    tiktoken = None
+
+# Rough characters-per-token ratio used when tiktoken is unavailable
+CHARS_PER_TOKEN = 4
+
+# Fields kept when an idea is compacted into a one-line summary
+SUMMARY_FIELDS = ("Name", "Title", "Short Hypothesis")
+SUMMARY_MAX_CHARS = 300
+# Room left for the summary header and separators
+HEADER_RESERVE_TOKENS = 20
+# Share of the budget ideas kept in full may use; the rest goes to summaries
+FULL_IDEAS_BUDGET_SHARE = 0.75
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_encodings: Dict[str, Any] = {}
+_warned_estimate = False
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Number of tokens in ``text`` for ``model``, estimated when no tokenizer is installed"""
+    if tiktoken is None:
+        global _warned_estimate
+        if not _warned_estimate:
+            _warned_estimate = True
+            logger.warning(
+                f"tiktoken is not installed; prompt budgets assume {CHARS_PER_TOKEN} characters per token"
+            )
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    key = model or ""
+    if key not in _encodings:
+        try:
+            _encodings[key] = tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding("cl100k_base")
+        except KeyError:
+            # Non-OpenAI models: cl100k is close enough for budgeting
+            _encodings[key] = tiktoken.get_encoding("cl100k_base")
+    return len(_encodings[key].encode(text, disallowed_special=()))
+
+
+def normalize_ideas(ideas: List[Any]) -> List[Dict[str, Any]]:
+    """Previous ideas as dicts, whether stored as dicts or JSON strings"""
+    normalized = []
+    for idea in ideas or []:
+        if isinstance(idea, str):
+            try:
+                idea = json.loads(idea)
+            except ValueError:
+                idea = {"Title": idea}
+        if isinstance(idea, dict):
+            normalized.append(idea)
+    return normalized
+
+
+def summarize_idea(idea: Dict[str, Any]) -> str:
+    parts = [f"{field}: {idea[field]}" for field in SUMMARY_FIELDS if idea.get(field)]
+    summary = " | ".join(parts) or json.dumps(idea)
+    if len(summary) > SUMMARY_MAX_CHARS:
+        summary = summary[:SUMMARY_MAX_CHARS - 3] + "..."
+    return f"- {summary}"
+
+
+def _words(idea: Dict[str, Any]) -> Set[str]:
+    return set(_WORD_RE.findall(json.dumps(idea).lower()))
+
+
+def _similarity(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def build_prev_ideas_section(
+    ideas: List[Dict[str, Any]],
+    max_tokens: int,
+    keep_recent: int = 5,
+    model: Optional[str] = None,
+) -> Tuple[str, Dict[str, int]]:
+    """
+    Render previous ideas for the ideation prompt within a token budget.
+
+    The most recent ``keep_recent`` ideas are kept in full, then the remaining
+    ideas least similar to those already chosen, within a share of the budget.
+    Ideas that are not kept in full are compacted to one-line summaries, and the oldest are dropped once
+    even summaries do not fit.
+
+    Args:
+        ideas: Previous ideas, oldest first
+        max_tokens: Token budget of the rendered section
+        keep_recent: Number of most recent ideas preferred in full
+        model: Model whose tokenizer is used for counting
+
+    Returns:
+        The rendered section and token/idea counts of the selection
+    """
+    full_texts = [json.dumps(idea) for idea in ideas]
+    # One extra token per idea for the separator
+    full_tokens = [count_tokens(text, model) + 1 for text in full_texts]
+    original_tokens = max(sum(full_tokens) - 1, 0)
+
+    stats = {
+        "original_tokens": original_tokens,
+        "prompt_tokens": original_tokens,
+        "full": len(ideas),
+        "summarized": 0,
+        "dropped": 0,
+    }
+    if original_tokens <= max_tokens:
+        return "\n\n".join(full_texts), stats
+
+    # Pick ideas to keep in full: most recent first, then the most diverse
+    total_budget = max_tokens - HEADER_RESERVE_TOKENS
+    budget = int(total_budget * FULL_IDEAS_BUDGET_SHARE)
+    full: Set[int] = set()
+    order = list(range(len(ideas) - 1, -1, -1))
+    for index in order[:keep_recent]:
+        if full_tokens[index] <= budget:
+            full.add(index)
+            budget -= full_tokens[index]
+
+    words = [_words(idea) for idea in ideas]
+    candidates = [index for index in order[keep_recent:] if index not in full]
+    while candidates and budget > 0:
+        # Least similar to anything already selected
+        best = min(
+            candidates,
+            key=lambda index: max((_similarity(words[index], words[chosen]) for chosen in full), default=0.0),
+        )
+        candidates.remove(best)
+        if full_tokens[best] <= budget:
+            full.add(best)
+            budget -= full_tokens[best]
+
+    # Summaries for the rest, newest first, until the budget runs out
+    budget += total_budget - int(total_budget * FULL_IDEAS_BUDGET_SHARE)
+    summaries: Dict[int, str] = {}
+    for index in order:
+        if index in full:
+            continue
+        summary = summarize_idea(ideas[index])
+        tokens = count_tokens(summary, model) + 1
+        if tokens > budget:
+            break
+        summaries[index] = summary
+        budget -= tokens
+
+    dropped = len(ideas) - len(full) - len(summaries)
+    sections = []
+    if summaries or dropped:
+        header = "Earlier ideas (summarized):"
+        if dropped:
+            header = f"Earlier ideas (summarized; {dropped} older ideas omitted):"
+        sections.append("\n".join([header, *(summaries[index] for index in sorted(summaries))]))
+    sections.extend(full_texts[index] for index in sorted(full))
+    section = "\n\n".join(sections)
+
+    stats.update(
+        prompt_tokens=count_tokens(section, model),
+        full=len(full),
+        summarized=len(summaries),
+        dropped=dropped,
+    )
+    PROMPT_TOKENS_SAVED.labels(section="prev_ideas").inc(max(original_tokens - stats["prompt_tokens"], 0))
+    logger.info(
+        f"Previous ideas compacted from {original_tokens} to {stats['prompt_tokens']} tokens "
+        f"({stats['full']} full, {stats['summarized']} summarized, {dropped} dropped)"
+    )
+    return section, stats
@@ -0,0 +1,222 @@
+import fcntl
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from ..core.config import settings
+from ..core.logging import get_logger
+from ..core.metrics import SCHEDULER_RESOURCES
+from ..models.settings import AIScientistSettings
+from .background_tasks import CancellationToken
+
+logger = get_logger("resource_scheduler")
+
+
+def _available_cpus() -> List[int]:
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+
+def _total_memory_mb() -> int:
+    try:
+        return int(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / (1024 * 1024))
+    except (ValueError, OSError, AttributeError):
+        return 0
+
+
+class ResourceRequest:
+    """CPU and memory an experiment run needs while it executes"""
+
+    def __init__(self, cpus: int, memory_mb: int):
+        self.cpus = cpus
+        self.memory_mb = memory_mb
+
+
+class ResourceScheduler:
+    """
+    Admits experiment runs only while their CPU and memory reservations fit on the node.
+
+    Reservations are kept in a small JSON file guarded by ``flock`` so that every
+    uvicorn worker process on the node shares the same view of capacity.
+    Reservations held by processes that no longer exist are discarded.
+    """
+
+    def __init__(
+        self,
+        state_dir: str,
+        total_cpus: Optional[int] = None,
+        total_memory_mb: Optional[int] = None,
+        pin_cpus: bool = False,
+        poll_interval: float = 5.0,
+    ):
+        self.state_dir = Path(state_dir)
+        self.state_path = self.state_dir / "reservations.json"
+        self.lock_path = self.state_dir / "reservations.lock"
+        self.available_cpus = _available_cpus()
+        self.total_cpus = total_cpus or len(self.available_cpus)
+        if pin_cpus:
+            # Only CPUs this process may run on can be handed out
+            self.total_cpus = min(self.total_cpus, len(self.available_cpus))
+        self.total_memory_mb = total_memory_mb or _total_memory_mb()
+        self.pin_cpus = pin_cpus
+        self.poll_interval = poll_interval
+
+    def estimate(self, ai_settings: AIScientistSettings) -> ResourceRequest:
+        """Derive a run's reservation from its BFTS parallelism"""
+        workers = max(ai_settings.agent.num_workers, 1)
+        cpus = max(int(round(workers * settings.SCHEDULER_CPUS_PER_WORKER)), 1)
+        memory_mb = workers * settings.SCHEDULER_MEMORY_MB_PER_WORKER
+        # A run larger than the node can still execute, just on its own
+        cpus = min(cpus, self.total_cpus)
+        if self.total_memory_mb:
+            memory_mb = min(memory_mb, self.total_memory_mb)
+        return ResourceRequest(cpus, memory_mb)
+
+    @contextmanager
+    def _locked_state(self):
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                reservations = self._load()
+                yield reservations
+                self._save(reservations)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.state_path.exists():
+            return {}
+        try:
+            with open(self.state_path, "r") as f:
+                reservations = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Drop reservations whose owning process has died
+        return {run_id: r for run_id, r in reservations.items() if self._pid_alive(r.get("pid"))}
+
+    def _save(self, reservations: Dict[str, Dict[str, Any]]) -> None:
+        tmp_path = self.state_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(reservations, f)
+        os.replace(tmp_path, self.state_path)
+        self._update_metrics(reservations)
+
+    @staticmethod
+    def _pid_alive(pid: Optional[int]) -> bool:
+        if not pid:
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def _free_cpus(self, reservations: Dict[str, Dict[str, Any]]) -> List[int]:
+        used = {cpu for r in reservations.values() for cpu in r.get("cpuset") or []}
+        return [cpu for cpu in self.available_cpus if cpu not in used]
+
+    def _try_reserve(
+        self,
+        run_id: str,
+        request: ResourceRequest,
+    ) -> Optional[Dict[str, Any]]:
+        request = ResourceRequest(min(request.cpus, self.total_cpus), request.memory_mb)
+        with self._locked_state() as reservations:
+            used_cpus = sum(r["cpus"] for r in reservations.values())
+            used_memory = sum(r["memory_mb"] for r in reservations.values())
+            if used_cpus + request.cpus > self.total_cpus:
+                return None
+            if self.total_memory_mb and used_memory + request.memory_mb > self.total_memory_mb:
+                return None
+
+            cpuset = None
+            if self.pin_cpus:
+                free = self._free_cpus(reservations)
+                if len(free) < request.cpus:
+                    return None
+                cpuset = free[:request.cpus]
+
+            reservation = {
+                "pid": os.getpid(),
+                "cpus": request.cpus,
+                "memory_mb": request.memory_mb,
+                "cpuset": cpuset,
+                "reserved_at": time.time(),
+            }
+            reservations[run_id] = reservation
+            return reservation
+
+    def release(self, run_id: str) -> None:
+        with self._locked_state() as reservations:
+            reservations.pop(run_id, None)
+
+    @contextmanager
+    def reserve(
+        self,
+        run_id: str,
+        request: ResourceRequest,
+        cancel_token: Optional[CancellationToken] = None,
+    ):
+        """
+        Block until ``request`` fits, hold the reservation for the duration of the block.
+
+        Yields the reservation, whose ``cpuset`` lists the CPUs the run is pinned
+        to when pinning is enabled. Cancelling ``cancel_token`` stops the wait
+        right away.
+        """
+        cancel_token = cancel_token or CancellationToken()
+        logger.info(f"Waiting for {request.cpus} CPUs / {request.memory_mb} MB for run {run_id}")
+        while True:
+            cancel_token.raise_if_cancelled()
+            reservation = self._try_reserve(run_id, request)
+            if reservation:
+                break
+            cancel_token.wait(self.poll_interval)
+
+        logger.info(f"Reserved resources for run {run_id}: {reservation}")
+        try:
+            yield reservation
+        finally:
+            self.release(run_id)
+            logger.info(f"Released resources for run {run_id}")
+
+    def utilization(self) -> Dict[str, Any]:
+        """Reserved and total capacity across all worker processes on this node"""
+        with self._locked_state() as reservations:
+            used_cpus = sum(r["cpus"] for r in reservations.values())
+            used_memory = sum(r["memory_mb"] for r in reservations.values())
+            return {
+                "total_cpus": self.total_cpus,
+                "reserved_cpus": used_cpus,
+                "total_memory_mb": self.total_memory_mb,
+                "reserved_memory_mb": used_memory,
+                "pin_cpus": self.pin_cpus,
+                "runs": {run_id: dict(r) for run_id, r in reservations.items()},
+            }
+
+    def _update_metrics(self, reservations: Dict[str, Dict[str, Any]]) -> None:
+        SCHEDULER_RESOURCES.labels(resource="cpus", state="total").set(self.total_cpus)
+        SCHEDULER_RESOURCES.labels(resource="cpus", state="reserved").set(
+            sum(r["cpus"] for r in reservations.values())
+        )
+        SCHEDULER_RESOURCES.labels(resource="memory_mb", state="total").set(self.total_memory_mb)
+        SCHEDULER_RESOURCES.labels(resource="memory_mb", state="reserved").set(
+            sum(r["memory_mb"] for r in reservations.values())
+        )
+
+
+# Create singleton instance
+resource_scheduler = ResourceScheduler(
+    state_dir=settings.SCHEDULER_STATE_DIR,
+    total_cpus=settings.SCHEDULER_TOTAL_CPUS,
+    total_memory_mb=settings.SCHEDULER_TOTAL_MEMORY_MB,
+    pin_cpus=settings.SCHEDULER_PIN_CPUS,
+)
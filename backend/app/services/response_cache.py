@@ -0,0 +1,220 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.logging import get_logger
+from ..core.metrics import RESPONSE_CACHE_REQUESTS
+from ..models.schema import ExperimentResult, ExperimentRun, ResearchIdea
+
+logger = get_logger("response_cache")
+
+# Clients may keep responses but must revalidate them before every use
+CACHE_CONTROL = "private, no-cache"
+
+Version = Tuple[Any, ...]
+
+
+class ResponseCache:
+    """
+    Per-process LRU of serialized read responses.
+
+    Entries are stored with the version of the resource they were rendered
+    from and are only served while the database still reports that version,
+    so writes made by other worker processes are never masked. Writes made
+    through this process's sessions also drop the affected entries right away.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Version, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, version: Version) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: str, version: Version, body: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (version, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def _aggregates(count_column, time_column, condition) -> list:
+    """Row count and latest timestamp of the matching rows, as correlated scalar subqueries"""
+    return [
+        select(func.count(count_column)).where(condition).scalar_subquery(),
+        select(func.max(time_column)).where(condition).scalar_subquery(),
+    ]
+
+
+def idea_version(db: Session, idea_id: str) -> Optional[Tuple[Version, Optional[datetime]]]:
+    """
+    Version of an idea's response: its own row plus its experiment runs and
+    their results, which change without touching the idea row.
+
+    Returns:
+        The version and the latest modification time, or None if the idea does not exist
+    """
+    run_ids = select(ExperimentRun.id).where(ExperimentRun.research_idea_id == idea_id)
+    row = db.execute(
+        select(
+            ResearchIdea.updated_at,
+            ResearchIdea.status,
+            *_aggregates(ExperimentRun.id, ExperimentRun.updated_at, ExperimentRun.research_idea_id == idea_id),
+            *_aggregates(ExperimentResult.id, ExperimentResult.created_at, ExperimentResult.experiment_id.in_(run_ids)),
+        ).where(ResearchIdea.id == idea_id)
+    ).first()
+    if row is None:
+        return None
+    return tuple(row), _latest(row[0], row[3], row[5])
+
+
+def experiment_version(db: Session, experiment_id: str) -> Optional[Tuple[Version, Optional[datetime]]]:
+    """
+    Version of an experiment run's response: its row plus its results.
+
+    Returns:
+        The version and the latest modification time, or None if the run does not exist
+    """
+    row = db.execute(
+        select(
+            ExperimentRun.updated_at,
+            ExperimentRun.status,
+            *_aggregates(ExperimentResult.id, ExperimentResult.created_at, ExperimentResult.experiment_id == experiment_id),
+        ).where(ExperimentRun.id == experiment_id)
+    ).first()
+    if row is None:
+        return None
+    return tuple(row), _latest(row[0], row[3])
+
+
+def _latest(*times: Optional[datetime]) -> Optional[datetime]:
+    present = [value for value in times if value is not None]
+    return max(present) if present else None
+
+
+def _etag(version: Version) -> str:
+    return '"' + hashlib.blake2b(repr(version).encode(), digest_size=16).hexdigest() + '"'
+
+
+def _http_date(value: datetime) -> str:
+    # Timestamps are stored without a zone, as UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-Modified-Since is ignored when If-None-Match is present
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        modified = last_modified if last_modified.tzinfo else last_modified.replace(tzinfo=timezone.utc)
+        # HTTP dates have one-second resolution
+        return modified.replace(microsecond=0) <= since
+    return False
+
+
+def cached_response(
+    request: Request,
+    resource: str,
+    key: str,
+    version: Version,
+    last_modified: Optional[datetime],
+    render: Callable[[], bytes],
+) -> Response:
+    """
+    Conditional JSON response for a versioned resource.
+
+    Answers 304 when the client's ``If-None-Match`` or ``If-Modified-Since``
+    still matches ``version``; otherwise serves the cached body for that
+    version, rendering and caching it on a miss.
+
+    Args:
+        request: Incoming request carrying the conditional headers
+        resource: Resource kind, used as the metrics label
+        key: Cache key of the resource
+        version: Current version, as read from the database
+        last_modified: Latest modification time of the resource, if known
+        render: Produces the serialized body; only called on a cache miss
+    """
+    etag = _etag(version)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = _http_date(last_modified)
+
+    if _not_modified(request, etag, last_modified):
+        RESPONSE_CACHE_REQUESTS.labels(resource=resource, result="not_modified").inc()
+        return Response(status_code=304, headers=headers)
+
+    body = response_cache.get(key, version)
+    if body is None:
+        RESPONSE_CACHE_REQUESTS.labels(resource=resource, result="miss").inc()
+        # Rendering reads after the version query, so the body is at least as
+        # new as ``version``; a newer body is replaced on the next read
+        body = render()
+        response_cache.put(key, version, body)
+    else:
+        RESPONSE_CACHE_REQUESTS.labels(resource=resource, result="hit").inc()
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def idea_key(idea_id: str) -> str:
+    return f"idea:{idea_id}"
+
+
+def experiment_key(experiment_id: str) -> str:
+    return f"experiment:{experiment_id}"
+
+
+# Create singleton instance
+response_cache = ResponseCache(max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+
+@event.listens_for(ResearchIdea, "after_update")
+@event.listens_for(ResearchIdea, "after_delete")
+def _invalidate_idea(mapper, connection, target) -> None:
+    response_cache.invalidate(idea_key(target.id))
+
+
+@event.listens_for(ExperimentRun, "after_insert")
+@event.listens_for(ExperimentRun, "after_update")
+@event.listens_for(ExperimentRun, "after_delete")
+def _invalidate_experiment(mapper, connection, target) -> None:
+    response_cache.invalidate(experiment_key(target.id))
+    # Ideas embed their experiment runs
+    response_cache.invalidate(idea_key(target.research_idea_id))
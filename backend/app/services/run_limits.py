@@ -0,0 +1,208 @@
+import errno
+import os
+import resource
+import signal
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from ..core.config import settings
+from ..core.logging import get_logger
+
+logger = get_logger("run_limits")
+
+MB = 1024 * 1024
+
+# cpu.max period; the quota is the run's CPU count times this
+CPU_PERIOD_USEC = 100_000
+
+CGROUP_CONTROLLERS = ("cpu", "memory", "pids")
+
+
+def configured_limits() -> Dict[str, Optional[int]]:
+    """Per-run limits from the application settings (None means unlimited)"""
+    return {
+        "memory_bytes": settings.RUN_MEMORY_LIMIT_MB * MB if settings.RUN_MEMORY_LIMIT_MB else None,
+        "cpu_seconds": settings.RUN_CPU_TIME_LIMIT_SECONDS,
+        "open_files": settings.RUN_MAX_OPEN_FILES,
+        "file_size_bytes": settings.RUN_MAX_FILE_SIZE_MB * MB if settings.RUN_MAX_FILE_SIZE_MB else None,
+        "max_processes": settings.RUN_MAX_PROCESSES,
+        "disk_bytes": settings.RUN_DISK_LIMIT_MB * MB if settings.RUN_DISK_LIMIT_MB else None,
+    }
+
+
+def apply_rlimits(limits: Dict[str, Optional[int]], in_cgroup: bool = False) -> None:
+    """
+    Apply limits to the current process; they are inherited by everything it spawns.
+
+    rlimits are per process, so the memory and CPU time limits are only a
+    fallback for when the run is not in its own cgroup. RLIMIT_DATA is used
+    rather than RLIMIT_AS because numerical libraries reserve far more address
+    space than they use.
+    """
+    rlimits = {
+        "open_files": resource.RLIMIT_NOFILE,
+        "file_size_bytes": resource.RLIMIT_FSIZE,
+    }
+    if not in_cgroup:
+        rlimits["memory_bytes"] = resource.RLIMIT_DATA
+        rlimits["cpu_seconds"] = resource.RLIMIT_CPU
+
+    for key, rlimit in rlimits.items():
+        value = limits.get(key)
+        if not value:
+            continue
+        try:
+            _, hard = resource.getrlimit(rlimit)
+            if hard != resource.RLIM_INFINITY:
+                value = min(value, hard)
+            resource.setrlimit(rlimit, (value, hard))
+        except (ValueError, OSError) as e:
+            logger.warning(f"Could not apply {key} limit: {str(e)}")
+
+
+def process_usage() -> Dict[str, Any]:
+    """Peak RSS and CPU time of the current process and its reaped children"""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        # ru_maxrss is reported in kilobytes on Linux
+        "peak_rss_bytes": max(own.ru_maxrss, children.ru_maxrss) * 1024,
+        "cpu_seconds": own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime,
+    }
+
+
+def directory_size(path: Path) -> int:
+    """Total size in bytes of the files below ``path``"""
+    total = 0
+    stack = [str(path)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            total += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return total
+
+
+class RunCgroup:
+    """
+    A cgroup v2 group holding one run's process tree.
+
+    Only used when ``RUN_CGROUP_ROOT`` points at a delegated, writable cgroup
+    directory; otherwise ``create`` returns None and rlimits are used alone.
+    The group caps memory, processes and CPU bandwidth (``cpu.max``, from the
+    run's reserved CPUs); the CPU time budget covers the whole tree and is
+    enforced by the parent watching ``cpu.stat`` (see ``cpu_seconds``).
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    @staticmethod
+    def _enable_controllers(root: Path) -> None:
+        """Delegate the controllers the run groups need from ``root`` to its children"""
+        try:
+            available = (root / "cgroup.controllers").read_text().split()
+            enabled = (root / "cgroup.subtree_control").read_text().split()
+        except OSError:
+            return
+        for controller in CGROUP_CONTROLLERS:
+            if controller not in available or controller in enabled:
+                continue
+            try:
+                with open(root / "cgroup.subtree_control", "w") as f:
+                    f.write(f"+{controller}")
+            except OSError as e:
+                logger.warning(f"Could not enable the {controller} controller in {root}: {str(e)}")
+
+    @classmethod
+    def create(cls, run_id: str, limits: Dict[str, Optional[int]]) -> Optional["RunCgroup"]:
+        root = settings.RUN_CGROUP_ROOT
+        if not root or not os.access(root, os.W_OK):
+            return None
+        cls._enable_controllers(Path(root))
+        path = Path(root) / f"run-{run_id}"
+        cgroup = cls(path)
+        try:
+            path.mkdir(exist_ok=True)
+            if limits.get("memory_bytes"):
+                cgroup._write("memory.max", str(limits["memory_bytes"]))
+                cgroup._write("memory.swap.max", "0")
+            if limits.get("max_processes"):
+                cgroup._write("pids.max", str(limits["max_processes"]))
+            if limits.get("cpus"):
+                cgroup._write("cpu.max", f"{int(limits['cpus'] * CPU_PERIOD_USEC)} {CPU_PERIOD_USEC}")
+            return cgroup
+        except OSError as e:
+            logger.warning(f"Could not create cgroup for run {run_id}: {str(e)}")
+            cgroup.remove()
+            return None
+
+    def _write(self, name: str, value: str) -> None:
+        with open(self.path / name, "w") as f:
+            f.write(value)
+
+    def _read(self, name: str) -> Optional[str]:
+        try:
+            with open(self.path / name, "r") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def attach(self, pid: int) -> None:
+        self._write("cgroup.procs", str(pid))
+
+    def cpu_seconds(self) -> Optional[float]:
+        """CPU time used so far by every process of the group"""
+        return self.usage().get("cpu_seconds")
+
+    def kill(self) -> None:
+        """SIGKILL every process in the group"""
+        try:
+            self._write("cgroup.kill", "1")
+        except OSError:
+            # Kernels before 5.14 have no cgroup.kill
+            for pid in (self._read("cgroup.procs") or "").split():
+                try:
+                    os.kill(int(pid), signal.SIGKILL)
+                except (OSError, ValueError):
+                    continue
+
+    def usage(self) -> Dict[str, Any]:
+        """Peak memory and CPU time of the whole group, where the kernel reports them"""
+        usage: Dict[str, Any] = {}
+        peak = self._read("memory.peak")
+        if peak and peak.strip().isdigit():
+            usage["peak_rss_bytes"] = int(peak)
+        cpu_stat = self._read("cpu.stat")
+        if cpu_stat:
+            for line in cpu_stat.splitlines():
+                key, _, value = line.partition(" ")
+                if key == "usage_usec":
+                    usage["cpu_seconds"] = int(value) / 1_000_000
+        return usage
+
+    def remove(self, timeout: float = 5.0) -> None:
+        """Remove the group, killing processes left in it first"""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                self.path.rmdir()
+                return
+            except FileNotFoundError:
+                return
+            except OSError as e:
+                if e.errno != errno.EBUSY or time.monotonic() >= deadline:
+                    logger.warning(f"Could not remove cgroup {self.path}: {str(e)}")
+                    return
+            self.kill()
+            time.sleep(0.1)
@@ -0,0 +1,98 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import orjson
+
+from ..core.config import settings
+from ..core.logging import get_logger
+from ..models.schema import (
+    ExperimentResultBase, ExperimentRun, ExperimentRunBase, ExperimentStatus, ResearchIdea, ResearchIdeaBase
+)
+
+logger = get_logger("serialization")
+
+# Fields of the response models, in their declared order; nested lists are appended separately
+IDEA_FIELDS = [name for name in ResearchIdeaBase.model_fields if name != "experiments"]
+RUN_FIELDS = [name for name in ExperimentRunBase.model_fields if name != "results"]
+RESULT_FIELDS = list(ExperimentResultBase.model_fields)
+
+# Runs in these states are no longer written by the pipeline
+FINISHED_STATUSES = {
+    ExperimentStatus.COMPLETED.value, ExperimentStatus.FAILED.value, ExperimentStatus.CANCELLED.value
+}
+
+
+def dumps(value: Any) -> bytes:
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _row(obj: Any, fields: List[str]) -> Dict[str, Any]:
+    return {name: getattr(obj, name) for name in fields}
+
+
+class ResponseSerializer:
+    """
+    JSON bodies for ideas and experiment runs, built straight from ORM rows.
+
+    Produces the same documents as ``ResearchIdeaResponse`` and
+    ``ExperimentRunResponse`` without validating data that was just loaded
+    from the database, and serializes them with orjson. Finished runs no
+    longer change, so their serialized form is kept per process (keyed by
+    ``updated_at``, which any later write bumps) and spliced into the
+    bodies of the ideas embedding them.
+    """
+
+    def __init__(self, max_cached_runs: int = 4096):
+        self.max_cached_runs = max_cached_runs
+        self._runs: "OrderedDict[str, Tuple[Any, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached_run(self, run: ExperimentRun) -> Tuple[Optional[Tuple[Any, ...]], Optional[bytes]]:
+        status = getattr(run.status, "value", run.status)
+        if self.max_cached_runs <= 0 or status not in FINISHED_STATUSES or run.updated_at is None:
+            return None, None
+        version = (run.updated_at, len(run.results))
+        with self._lock:
+            entry = self._runs.get(run.id)
+            if entry is not None and entry[0] == version:
+                self._runs.move_to_end(run.id)
+                return version, entry[1]
+        return version, None
+
+    def experiment(self, run: ExperimentRun) -> bytes:
+        """Serialized ``ExperimentRunResponse`` of a run"""
+        version, body = self._cached_run(run)
+        if body is not None:
+            return body
+        payload = _row(run, RUN_FIELDS)
+        payload["results"] = [_row(result, RESULT_FIELDS) for result in run.results]
+        body = dumps(payload)
+        if version is not None:
+            with self._lock:
+                self._runs[run.id] = (version, body)
+                self._runs.move_to_end(run.id)
+                while len(self._runs) > self.max_cached_runs:
+                    self._runs.popitem(last=False)
+        return body
+
+    def idea(self, idea: ResearchIdea) -> bytes:
+        """Serialized ``ResearchIdeaResponse`` of an idea with its experiment runs"""
+        head = dumps(_row(idea, IDEA_FIELDS))
+        runs = b",".join(self.experiment(run) for run in idea.experiments)
+        # Close the idea object after its experiments, the last declared field
+        return head[:-1] + b',"experiments":[' + runs + b"]}"
+
+    def ideas(self, ideas: Iterable[ResearchIdea]) -> bytes:
+        return b"[" + b",".join(self.idea(idea) for idea in ideas) + b"]"
+
+    def experiments(self, runs: Iterable[ExperimentRun]) -> bytes:
+        return b"[" + b",".join(self.experiment(run) for run in runs) + b"]"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._runs.clear()
+
+
+# Create singleton instance
+response_serializer = ResponseSerializer(max_cached_runs=settings.SERIALIZED_RUNS_CACHE_MAX_ENTRIES)
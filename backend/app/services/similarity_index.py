@@ -0,0 +1,227 @@
+import math
+import re
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.logging import get_logger
+from ..models.schema import ResearchIdea
+
+logger = get_logger("similarity_index")
+
+# Proposal fields that describe an idea's content
+TEXT_FIELDS = ("Title", "Short Hypothesis", "Abstract", "Experiments")
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def proposal_text(proposal: Dict[str, Any]) -> str:
+    parts = []
+    for field in TEXT_FIELDS:
+        value = proposal.get(field)
+        if isinstance(value, list):
+            value = " ".join(str(item) for item in value)
+        if value:
+            parts.append(str(value))
+    return " ".join(parts)
+
+
+def embed(texts: List[str], dimensions: int) -> np.ndarray:
+    """
+    Hashed bag-of-words embeddings of ``texts``, one L2-normalised row each.
+
+    Unigrams and bigrams are hashed into ``dimensions`` signed buckets with
+    sublinear term frequency, so no vocabulary has to be fitted or stored.
+    """
+    rows: List[int] = []
+    columns: List[int] = []
+    weights: List[float] = []
+    for row, text in enumerate(texts):
+        words = _WORD_RE.findall(text.lower())
+        counts: Dict[str, int] = {}
+        for term in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            counts[term] = counts.get(term, 0) + 1
+        for term, count in counts.items():
+            digest = zlib.crc32(term.encode())
+            rows.append(row)
+            columns.append(digest % dimensions)
+            weights.append((1.0 + math.log(count)) * (1.0 if digest & 0x80000000 else -1.0))
+
+    # Accumulate all buckets at once; colliding terms add up
+    vectors = np.zeros((len(texts), dimensions), dtype=np.float32)
+    np.add.at(vectors, (np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)), np.array(weights, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class SimilarityIndex:
+    """
+    In-memory cosine similarity index over the generated proposals of all ideas.
+
+    Vectors live in one contiguous float32 matrix so a lookup is a single
+    matrix product. Each worker process builds its own index from the
+    database and refreshes it incrementally from ``updated_at``.
+    """
+
+    def __init__(self, dimensions: int = 512, refresh_interval_seconds: float = 30):
+        self.dimensions = dimensions
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self._matrix = np.zeros((0, dimensions), dtype=np.float32)
+        self._keys: List[Tuple[str, int]] = []
+        self._titles: List[str] = []
+        self._rows: Dict[Tuple[str, int], int] = {}
+        self._counts: Dict[str, int] = {}
+        self._versions: Dict[str, Any] = {}
+        self._last_refresh = 0.0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _grow(self, needed: int) -> None:
+        if needed <= self._matrix.shape[0]:
+            return
+        capacity = max(needed, 2 * self._matrix.shape[0], 1024)
+        matrix = np.zeros((capacity, self.dimensions), dtype=np.float32)
+        matrix[:len(self._keys)] = self._matrix[:len(self._keys)]
+        self._matrix = matrix
+
+    def _remove_idea(self, idea_id: str) -> None:
+        for index in range(self._counts.pop(idea_id, 0)):
+            row = self._rows.pop((idea_id, index))
+            last = len(self._keys) - 1
+            if row != last:
+                # Move the last row into the hole to keep the matrix dense
+                self._matrix[row] = self._matrix[last]
+                self._keys[row] = self._keys[last]
+                self._titles[row] = self._titles[last]
+                self._rows[self._keys[row]] = row
+            self._keys.pop()
+            self._titles.pop()
+
+    def update_idea(self, idea_id: str, proposals: List[Dict[str, Any]], version: Any = None) -> None:
+        """Replace the indexed proposals of ``idea_id``"""
+        self.update_ideas([(idea_id, proposals, version)])
+
+    def update_ideas(self, entries: List[Tuple[str, List[Dict[str, Any]], Any]]) -> None:
+        """Replace the indexed proposals of several ideas, embedding them in one batch"""
+        entries = [
+            (idea_id, [proposal for proposal in proposals or [] if isinstance(proposal, dict)], version)
+            for idea_id, proposals, version in entries
+        ]
+        vectors = embed(
+            [proposal_text(proposal) for _, proposals, _ in entries for proposal in proposals], self.dimensions
+        )
+        with self._lock:
+            for idea_id, _, _ in entries:
+                self._remove_idea(idea_id)
+            self._grow(len(self._keys) + len(vectors))
+            start = len(self._keys)
+            self._matrix[start:start + len(vectors)] = vectors
+            for idea_id, proposals, version in entries:
+                for index, proposal in enumerate(proposals):
+                    self._rows[(idea_id, index)] = len(self._keys)
+                    self._keys.append((idea_id, index))
+                    self._titles.append(str(proposal.get("Title") or proposal.get("Name") or ""))
+                self._counts[idea_id] = len(proposals)
+                self._versions[idea_id] = version
+
+    def refresh(self, db: Session, force: bool = False) -> None:
+        """Index ideas changed since the last refresh and drop deleted ones"""
+        with self._lock:
+            if not force and time.monotonic() - self._last_refresh < self.refresh_interval_seconds:
+                return
+            versions = dict(db.query(ResearchIdea.id, ResearchIdea.updated_at).all())
+            for idea_id in [idea_id for idea_id in self._versions if idea_id not in versions]:
+                self._remove_idea(idea_id)
+                del self._versions[idea_id]
+
+            changed = [
+                idea_id for idea_id, updated_at in versions.items()
+                if idea_id not in self._versions or self._versions[idea_id] != updated_at
+            ]
+            # Load generated proposals in chunks to bound memory on the first build
+            for start in range(0, len(changed), 1000):
+                rows = db.query(ResearchIdea.id, ResearchIdea.generated_ideas, ResearchIdea.updated_at).filter(
+                    ResearchIdea.id.in_(changed[start:start + 1000])
+                ).all()
+                self.update_ideas([
+                    (idea_id, (generated_ideas or {}).get("ideas", []), updated_at)
+                    for idea_id, generated_ideas, updated_at in rows
+                ])
+            if changed:
+                logger.info(f"Similarity index refreshed {len(changed)} ideas ({len(self._keys)} proposals indexed)")
+            self._last_refresh = time.monotonic()
+
+    def search(
+        self,
+        texts: List[str],
+        limit: int = 10,
+        threshold: float = 0.0,
+        exclude: Optional[List[Tuple[str, int]]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Most similar indexed proposals for each of ``texts``.
+
+        All queries are scored in one matrix product against the index.
+
+        Args:
+            texts: Query texts
+            limit: Maximum matches per query
+            threshold: Minimum cosine similarity of a match
+            exclude: Proposals never returned as matches, e.g. the query itself
+
+        Returns:
+            Matches per query, most similar first
+        """
+        queries = embed(texts, self.dimensions)
+        excluded = set(exclude or [])
+        with self._lock:
+            count = len(self._keys)
+            if not count or not texts:
+                return [[] for _ in texts]
+            scores = queries @ self._matrix[:count].T
+
+            results = []
+            wanted = min(limit + len(excluded), count)
+            for row_scores in scores:
+                # Partial sort: only the top candidates are ordered
+                top = np.argpartition(-row_scores, wanted - 1)[:wanted]
+                matches = []
+                for row in top[np.argsort(-row_scores[top])]:
+                    similarity = float(row_scores[row])
+                    if similarity < threshold or len(matches) >= limit:
+                        break
+                    if self._keys[row] in excluded:
+                        continue
+                    matches.append({
+                        "idea_id": self._keys[row][0],
+                        "proposal_index": self._keys[row][1],
+                        "title": self._titles[row],
+                        "similarity": round(similarity, 4),
+                    })
+                results.append(matches)
+        return results
+
+    def find_duplicates(
+        self,
+        proposal: Dict[str, Any],
+        threshold: float,
+        exclude: Optional[List[Tuple[str, int]]] = None,
+        limit: int = 5,
+    ) -> List[Dict[str, Any]]:
+        """Indexed proposals at least ``threshold`` similar to ``proposal``"""
+        return self.search([proposal_text(proposal)], limit=limit, threshold=threshold, exclude=exclude)[0]
+
+
+# Create singleton instance
+similarity_index = SimilarityIndex(
+    dimensions=settings.SIMILARITY_DIMENSIONS,
+    refresh_interval_seconds=settings.SIMILARITY_REFRESH_SECONDS,
+)
@@ -0,0 +1,112 @@
+import fcntl
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from ..core.config import settings
+from ..core.logging import get_logger
+
+logger = get_logger("single_flight")
+
+
+class SingleFlight:
+    """
+    Per-key in-flight registry and idempotency-key store shared by all worker processes.
+
+    ``lock`` serialises requests for the same key across processes with
+    ``flock``. While holding it, a request either attaches to the task
+    registered by ``begin`` or starts a new one. Entries whose owning process
+    has died are treated as finished, so a crashed worker never blocks a key.
+    """
+
+    def __init__(self, state_dir: str, idempotency_ttl_seconds: int = 86400):
+        self.state_dir = Path(state_dir)
+        self.idempotency_ttl_seconds = idempotency_ttl_seconds
+
+    def _path(self, kind: str, key: str, suffix: str = ".json") -> Path:
+        directory = self.state_dir / kind
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory / f"{hashlib.sha256(key.encode()).hexdigest()}{suffix}"
+
+    @staticmethod
+    def _read(path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write(path: Path, data: Dict[str, Any]) -> None:
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, default=str)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _pid_alive(pid: Optional[int]) -> bool:
+        if not pid:
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    @contextmanager
+    def lock(self, key: str):
+        """Hold the cross-process lock for ``key`` for the duration of the block"""
+        with open(self._path("locks", key, ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def in_flight(self, key: str) -> Optional[Dict[str, Any]]:
+        """The task currently registered for ``key``, if its owner is still alive"""
+        path = self._path("inflight", key)
+        entry = self._read(path)
+        if entry is None:
+            return None
+        if not self._pid_alive(entry.get("pid")):
+            logger.warning(f"Discarding in-flight entry for {key} left by dead process {entry.get('pid')}")
+            path.unlink(missing_ok=True)
+            return None
+        return entry
+
+    def begin(self, key: str, info: Dict[str, Any]) -> None:
+        """Register the task now running for ``key``; call while holding ``lock(key)``"""
+        self._write(self._path("inflight", key), {**info, "pid": os.getpid(), "started_at": time.time()})
+
+    def finish(self, key: str) -> None:
+        """Clear ``key`` once its task has completed, failed or been cancelled"""
+        with self.lock(key):
+            self._path("inflight", key).unlink(missing_ok=True)
+
+    def get_response(self, idempotency_key: str) -> Optional[Dict[str, Any]]:
+        """The response recorded for ``idempotency_key``, unless it has expired"""
+        path = self._path("idempotency", idempotency_key)
+        entry = self._read(path)
+        if entry is None:
+            return None
+        if time.time() - entry.get("saved_at", 0) > self.idempotency_ttl_seconds:
+            path.unlink(missing_ok=True)
+            return None
+        return entry["response"]
+
+    def save_response(self, idempotency_key: str, response: Dict[str, Any]) -> None:
+        self._write(self._path("idempotency", idempotency_key), {"response": response, "saved_at": time.time()})
+
+
+# Create singleton instance
+single_flight = SingleFlight(
+    state_dir=settings.SINGLE_FLIGHT_DIR,
+    idempotency_ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+)
@@ -7,6 +7,8 @@ import aiofiles
 import uuid
 import shutil
 
+from ..core.metrics import STORAGE_LATENCY
+
 logger = logging.getLogger(__name__)
 
 class R2Storage:
@@ -27,7 +29,8 @@ class R2Storage:
     async def upload_file(self, file_path: str, key: str) -> str:
         """Upload a file to R2 storage"""
         try:
-            self.s3_client.upload_file(file_path, self.bucket_name, key)
+            with STORAGE_LATENCY.labels(operation="upload").time():
+                self.s3_client.upload_file(file_path, self.bucket_name, key)
             return f"{self.endpoint_url}/{self.bucket_name}/{key}"
         except Exception as e:
             logger.error(f"Error uploading file to R2: {str(e)}")
@@ -48,7 +51,8 @@ class R2Storage:
             key = f"{folder}/{uuid.uuid4()}_{file.filename}"
             
             # Upload to R2
-            self.s3_client.upload_file(temp_file_path, self.bucket_name, key)
+            with STORAGE_LATENCY.labels(operation="upload").time():
+                self.s3_client.upload_file(temp_file_path, self.bucket_name, key)
             
             # Return the file URL and key
             url = f"{self.endpoint_url}/{self.bucket_name}/{key}"
@@ -72,7 +76,8 @@ class R2Storage:
                     relative_path = os.path.relpath(file_path, directory_path)
                     key = f"{base_key}/{relative_path}"
                     
-                    self.s3_client.upload_file(file_path, self.bucket_name, key)
+                    with STORAGE_LATENCY.labels(operation="upload").time():
+                        self.s3_client.upload_file(file_path, self.bucket_name, key)
                     url = f"{self.endpoint_url}/{self.bucket_name}/{key}"
                     uploaded_files[relative_path] = url
             
@@ -81,10 +86,19 @@ class R2Storage:
             logger.error(f"Error uploading directory to R2: {str(e)}")
             raise e
     
+    def presigned_url(self, key: str, expires_in: int = 300) -> str:
+        """Short-lived URL granting read access to ``key`` without credentials"""
+        return self.s3_client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket_name, 'Key': key},
+            ExpiresIn=expires_in
+        )
+
     def download_file(self, key: str, destination_path: str) -> bool:
         """Download a file from R2 storage"""
         try:
-            self.s3_client.download_file(self.bucket_name, key, destination_path)
+            with STORAGE_LATENCY.labels(operation="download").time():
+                self.s3_client.download_file(self.bucket_name, key, destination_path)
             return True
         except Exception as e:
             logger.error(f"Error downloading file from R2: {str(e)}")
@@ -0,0 +1,190 @@
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..core.logging import get_logger
+from .token_accounting import token_tracker
+
+logger = get_logger("structured_output")
+
+# Model families whose chat completions API accepts ``response_format``
+JSON_MODE_PREFIXES = ("gpt-4o", "gpt-4.1", "gpt-4-turbo", "gpt-3.5-turbo")
+
+# Replaces the THOUGHT/ACTION/ARGUMENTS text format the upstream prompts ask for
+STRUCTURED_INSTRUCTIONS = """
+Response format: the THOUGHT/ACTION/ARGUMENTS sections described above and in
+later messages must be returned as the fields of a single JSON object instead.
+Respond with that JSON object and nothing else, in the form:
+{"thought": "<your reasoning>", "action": "<one of: {actions}>", "arguments": {<the action's arguments>}}
+"""
+
+REPAIR_PROMPT = """Your previous response could not be used: {error}
+
+Respond again with the same content, strictly following the required format:
+{format_instructions}"""
+
+TEXT_FORMAT_INSTRUCTIONS = """THOUGHT:
+<your reasoning>
+
+ACTION:
+<one of: {actions}>
+
+ARGUMENTS:
+<the action's arguments as a JSON object>"""
+
+
+def supports_structured_output(model: str) -> bool:
+    """Whether ``model`` can be asked for JSON-only responses"""
+    return model.startswith(JSON_MODE_PREFIXES)
+
+
+def format_instructions(actions: List[str], structured: bool) -> str:
+    template = STRUCTURED_INSTRUCTIONS if structured else TEXT_FORMAT_INSTRUCTIONS
+    return template.replace("{actions}", ", ".join(actions)).strip()
+
+
+def supports_streaming(client: Any, model: str) -> bool:
+    """Whether responses of ``model`` can be streamed token by token through ``client``"""
+    return hasattr(client, "chat") and supports_structured_output(model)
+
+
+def _chat_completion(
+    prompt: str,
+    client: Any,
+    model: str,
+    system_message: str,
+    msg_history: Optional[List[Dict[str, Any]]],
+    temperature: float,
+    response_format: Optional[Dict[str, Any]] = None,
+    on_token: Optional[Callable[[str], None]] = None,
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Chat completion for OpenAI-compatible clients, optionally streamed.
+
+    Mirrors ``get_response_from_llm`` (same history format and token accounting).
+    With ``on_token`` the response is streamed and every content delta is passed
+    to it as it arrives.
+    """
+    msg_history = msg_history or []
+    new_msg_history = msg_history + [{"role": "user", "content": prompt}]
+    kwargs: Dict[str, Any] = {}
+    if response_format:
+        kwargs["response_format"] = response_format
+    if on_token:
+        kwargs.update(stream=True, stream_options={"include_usage": True})
+
+    response = client.chat.completions.create(
+        model=model,
+        messages=[{"role": "system", "content": system_message}, *new_msg_history],
+        temperature=temperature,
+        max_tokens=4096,
+        n=1,
+        **kwargs,
+    )
+
+    if on_token:
+        parts = []
+        usage = None
+        created = None
+        for chunk in response:
+            created = created or getattr(chunk, "created", None)
+            if getattr(chunk, "usage", None) is not None:
+                usage = chunk.usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+                on_token(chunk.choices[0].delta.content)
+        content = "".join(parts)
+    else:
+        content = response.choices[0].message.content
+        usage = getattr(response, "usage", None)
+        created = getattr(response, "created", None)
+    new_msg_history = new_msg_history + [{"role": "assistant", "content": content}]
+
+    if usage is not None:
+        token_tracker.add_tokens(model, usage.prompt_tokens, usage.completion_tokens)
+    token_tracker.add_interaction(model, system_message, prompt, content, created)
+
+    return content, new_msg_history
+
+
+def get_structured_response(
+    prompt: str,
+    client: Any,
+    model: str,
+    system_message: str,
+    actions: List[str],
+    msg_history: Optional[List[Dict[str, Any]]] = None,
+    temperature: float = 0.75,
+    on_token: Optional[Callable[[str], None]] = None,
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Chat completion constrained to a JSON object describing the next action.
+
+    Adds ``response_format`` and the JSON instructions to the system message.
+    """
+    return _chat_completion(
+        prompt,
+        client,
+        model,
+        f"{system_message}\n\n{format_instructions(actions, True)}",
+        msg_history,
+        temperature,
+        response_format={"type": "json_object"},
+        on_token=on_token,
+    )
+
+
+def get_streamed_response(
+    prompt: str,
+    client: Any,
+    model: str,
+    system_message: str,
+    on_token: Callable[[str], None],
+    msg_history: Optional[List[Dict[str, Any]]] = None,
+    temperature: float = 0.75,
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """Free-form chat completion streamed to ``on_token``"""
+    return _chat_completion(
+        prompt, client, model, system_message, msg_history, temperature, on_token=on_token
+    )
+
+
+def _extract_json(text: str) -> Any:
+    text = text.strip()
+    fenced = re.search(r"```(?:json)?\s*(.*?)\s*```", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+    return json.loads(text)
+
+
+def parse_action_response(response_text: str) -> Tuple[str, Any]:
+    """
+    Extract the action and its arguments from an ideation response.
+
+    Accepts the JSON object produced in structured mode as well as the
+    ``ACTION:``/``ARGUMENTS:`` text format. Arguments are returned parsed when
+    they are valid JSON, otherwise as the raw text.
+
+    Raises:
+        ValueError: if no action can be found
+    """
+    try:
+        data = _extract_json(response_text)
+        if isinstance(data, dict) and data.get("action"):
+            return str(data["action"]).strip(), data.get("arguments", {})
+    except ValueError:
+        pass
+
+    action_match = re.search(r"ACTION:\s*(.*?)\s*ARGUMENTS:", response_text, re.DOTALL | re.IGNORECASE)
+    arguments_match = re.search(
+        r"ARGUMENTS:\s*(.*?)(?:$|\nTHOUGHT:|\n$)", response_text, re.DOTALL | re.IGNORECASE
+    )
+    if not action_match or not arguments_match:
+        raise ValueError("Could not find ACTION and ARGUMENTS in the response.")
+
+    action = action_match.group(1).strip()
+    arguments_text = arguments_match.group(1).strip()
+    try:
+        return action, _extract_json(arguments_text)
+    except ValueError:
+        return action, arguments_text
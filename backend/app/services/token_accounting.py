@@ -0,0 +1,239 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from ..core.logging import get_logger
+from ..core.metrics import LLM_LATENCY, LLM_TOKENS
+from .interaction_log import InteractionLogWriter
+from .AI_Scientist_v2.ai_scientist.utils import token_tracker as token_tracker_module
+
+logger = get_logger("token_accounting")
+
+# Tracker bound to the task currently executing in this thread/context
+_current_tracker: ContextVar[Optional["RunTokenTracker"]] = ContextVar("current_token_tracker", default=None)
+
+# Prices come from the upstream tracker so both stay in sync
+_upstream_tracker = token_tracker_module.token_tracker
+MODEL_PRICES: Dict[str, Dict[str, Any]] = getattr(_upstream_tracker, "MODEL_PRICES", {})
+
+
+class RunTokenTracker:
+    """
+    Token, cost and latency accounting for a single background task.
+
+    Implements the interface AI-Scientist-v2 expects from its ``token_tracker``
+    (``add_tokens``, ``add_interaction``, ``get_summary``, ``get_interactions``)
+    but keeps interactions in a bounded buffer that is flushed to a compressed
+    interaction log once it fills up (or the pipeline stage changes) instead of
+    accumulating for the lifetime of the process.
+    """
+
+    def __init__(self, run_id: str, output_dir: Optional[Path] = None, buffer_size: int = 50):
+        self.run_id = run_id
+        self.log_writer = InteractionLogWriter(output_dir) if output_dir else None
+        self.buffer_size = buffer_size
+        self.stage: Optional[str] = None
+        self.token_counts: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"prompt": 0, "completion": 0, "reasoning": 0, "cached": 0}
+        )
+        self.call_counts: Dict[str, int] = defaultdict(int)
+        self.latencies: Dict[str, float] = defaultdict(float)
+        self.num_interactions = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add_tokens(
+        self,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        reasoning_tokens: int = 0,
+        cached_tokens: int = 0,
+    ) -> None:
+        with self._lock:
+            counts = self.token_counts[model]
+            counts["prompt"] += prompt_tokens or 0
+            counts["completion"] += completion_tokens or 0
+            counts["reasoning"] += reasoning_tokens or 0
+            counts["cached"] += cached_tokens or 0
+            self.call_counts[model] += 1
+        LLM_TOKENS.labels(model=model, type="prompt").inc(prompt_tokens or 0)
+        LLM_TOKENS.labels(model=model, type="completion").inc(completion_tokens or 0)
+
+    def add_interaction(
+        self,
+        model: str,
+        system_message: str,
+        prompt: Any,
+        response: str,
+        timestamp: Any,
+    ) -> None:
+        # ``timestamp`` is the provider's creation time of the completion, so the
+        # difference to now approximates the request latency.
+        latency = None
+        if isinstance(timestamp, (int, float)) and timestamp > 0:
+            latency = max(time.time() - timestamp, 0.0)
+            LLM_LATENCY.labels(model=model).observe(latency)
+
+        interaction = {
+            "model": model,
+            "system_message": system_message,
+            "prompt": prompt,
+            "response": response,
+            "timestamp": timestamp,
+            "latency": latency,
+            "stage": self.stage,
+        }
+
+        with self._lock:
+            if latency is not None:
+                self.latencies[model] += latency
+            self._buffer.append(interaction)
+            self.num_interactions += 1
+            if len(self._buffer) >= self.buffer_size:
+                self._flush_locked()
+
+    def set_output_dir(self, output_dir: Path) -> None:
+        """Start persisting interactions once the run's output directory is known"""
+        with self._lock:
+            self.log_writer = InteractionLogWriter(output_dir)
+
+    def set_stage(self, stage: Optional[str]) -> None:
+        """Tag subsequent interactions with a pipeline stage, flushing the previous one"""
+        with self._lock:
+            if stage != self.stage:
+                self._flush_locked()
+                self.stage = stage
+
+    def flush(self) -> None:
+        """Write buffered interactions to disk (or drop them if there is no output path)"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._buffer:
+            return
+        if self.log_writer is not None:
+            try:
+                self.log_writer.append(self._buffer, stage=self.stage)
+            except Exception as e:
+                logger.error(f"Error flushing token interactions for {self.run_id}: {str(e)}")
+        self._buffer = []
+
+    def get_interactions(self, model: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return interactions that have not been flushed yet"""
+        with self._lock:
+            if model:
+                return [i for i in self._buffer if i["model"] == model]
+            return list(self._buffer)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.token_counts.clear()
+            self.call_counts.clear()
+            self.latencies.clear()
+            self.num_interactions = 0
+            self._buffer = []
+
+    def calculate_cost(self, model: str) -> float:
+        prices = MODEL_PRICES.get(model)
+        if not prices:
+            return 0.0
+        tokens = self.token_counts[model]
+        prompt_cost = float(tokens["prompt"]) * float(prices.get("prompt", 0))
+        completion_cost = float(tokens["completion"]) * float(prices.get("completion", 0))
+        if "cached" in prices:
+            prompt_cost -= float(tokens["cached"]) * (float(prices.get("prompt", 0)) - float(prices["cached"]))
+        return prompt_cost + completion_cost
+
+    def get_summary(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            models = list(self.token_counts.keys())
+        return {
+            model: {
+                "tokens": dict(self.token_counts[model]),
+                "cost": self.calculate_cost(model),
+                "calls": self.call_counts[model],
+                "latency_seconds": self.latencies[model],
+            }
+            for model in models
+        }
+
+    def export_counts(self) -> Dict[str, Any]:
+        """Raw counters, used to hand usage from a child process back to its parent"""
+        with self._lock:
+            return {
+                "token_counts": {model: dict(counts) for model, counts in self.token_counts.items()},
+                "call_counts": dict(self.call_counts),
+                "latencies": dict(self.latencies),
+                "num_interactions": self.num_interactions,
+            }
+
+    def merge_counts(self, counts: Dict[str, Any]) -> None:
+        """Add counters produced by ``export_counts`` in another process"""
+        with self._lock:
+            for model, tokens in counts.get("token_counts", {}).items():
+                for key, value in tokens.items():
+                    self.token_counts[model][key] += value
+            for model, calls in counts.get("call_counts", {}).items():
+                self.call_counts[model] += calls
+            for model, latency in counts.get("latencies", {}).items():
+                self.latencies[model] += latency
+            self.num_interactions += counts.get("num_interactions", 0)
+
+    def get_totals(self) -> Dict[str, Any]:
+        """Aggregate totals across all models, as persisted on the experiment run"""
+        summary = self.get_summary()
+        return {
+            "total_cost": sum(s["cost"] for s in summary.values()),
+            "prompt_tokens": sum(s["tokens"]["prompt"] for s in summary.values()),
+            "completion_tokens": sum(s["tokens"]["completion"] for s in summary.values()),
+            "llm_calls": sum(s["calls"] for s in summary.values()),
+            "llm_latency_seconds": sum(s["latency_seconds"] for s in summary.values()),
+        }
+
+
+class ContextualTokenTracker:
+    """
+    Stand-in for the upstream ``token_tracker`` singleton.
+
+    Every attribute access is forwarded to the tracker bound to the current
+    context, or to a process-level tracker that only keeps bounded totals when
+    no task is active.
+    """
+
+    def __init__(self):
+        self._fallback = RunTokenTracker("process")
+
+    def current(self) -> RunTokenTracker:
+        return _current_tracker.get() or self._fallback
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.current(), name)
+
+
+token_tracker = ContextualTokenTracker()
+
+# Route the submodule's usage tracking through the per-context proxy
+token_tracker_module.token_tracker = token_tracker
+
+
+@contextmanager
+def track_run(run_id: str, output_dir: Optional[Path] = None, buffer_size: int = 50):
+    """
+    Bind a fresh RunTokenTracker to the current context for the duration of a task.
+
+    If ``output_dir`` is given, interactions are appended to the run's
+    compressed interaction log in that directory as the buffer fills.
+    """
+    tracker = RunTokenTracker(run_id, output_dir=output_dir, buffer_size=buffer_size)
+    reset_token = _current_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        tracker.flush()
+        _current_tracker.reset(reset_token)
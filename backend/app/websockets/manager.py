@@ -1,8 +1,13 @@
 from fastapi import WebSocket
-from typing import Dict, Set
+from typing import Dict, Set, List, Any
+import asyncio
 import json
 import logging
 
+from app.core.config import settings
+from app.core.metrics import WEBSOCKET_CONNECTIONS
+from app.services.ideation_stream import ideation_streams
+
 logger = logging.getLogger(__name__)
 
 class ConnectionManager:
@@ -13,15 +18,19 @@ class ConnectionManager:
         self.idea_subscriptions: Dict[str, Set[str]] = {}
         # Store experiment subscriptions by experiment ID
         self.experiment_subscriptions: Dict[str, Set[str]] = {}
+        # Tailers forwarding ideation stream frames, one per subscribed idea
+        self.stream_tasks: Dict[str, asyncio.Task] = {}
 
     async def connect(self, websocket: WebSocket, client_id: str):
         await websocket.accept()
         self.active_connections[client_id] = websocket
+        WEBSOCKET_CONNECTIONS.inc()
         logger.info(f"Client {client_id} connected")
 
     def disconnect(self, client_id: str):
         if client_id in self.active_connections:
             del self.active_connections[client_id]
+            WEBSOCKET_CONNECTIONS.dec()
             # Clean up subscriptions
             for idea_id in self.idea_subscriptions:
                 self.idea_subscriptions[idea_id].discard(client_id)
@@ -34,6 +43,23 @@ class ConnectionManager:
             self.idea_subscriptions[idea_id] = set()
         self.idea_subscriptions[idea_id].add(client_id)
         logger.info(f"Client {client_id} subscribed to idea {idea_id}")
+        if idea_id not in self.stream_tasks:
+            self.stream_tasks[idea_id] = asyncio.create_task(self._tail_idea_stream(idea_id))
+
+    async def _tail_idea_stream(self, idea_id: str):
+        """Forward ideation stream frames to the idea's subscribers until none are left"""
+        # File reads run in a thread so a slow disk does not stall the event loop
+        inode, offset = await asyncio.to_thread(ideation_streams.start_position, idea_id)
+        try:
+            while self.idea_subscriptions.get(idea_id):
+                frames, inode, offset = await asyncio.to_thread(ideation_streams.read, idea_id, inode, offset)
+                if frames:
+                    await self.broadcast_idea_stream(idea_id, frames)
+                await asyncio.sleep(settings.IDEATION_STREAM_POLL_SECONDS)
+        except Exception as e:
+            logger.error(f"Error streaming ideation output for idea {idea_id}: {str(e)}")
+        finally:
+            self.stream_tasks.pop(idea_id, None)
 
     def unsubscribe_from_idea(self, client_id: str, idea_id: str):
         if idea_id in self.idea_subscriptions:
@@ -64,6 +90,21 @@ class ConnectionManager:
                     except Exception as e:
                         logger.error(f"Error sending message to client {client_id}: {str(e)}")
 
+    async def broadcast_idea_stream(self, idea_id: str, frames: List[Dict[str, Any]]):
+        # Everything read in one poll goes out as a single message
+        if idea_id in self.idea_subscriptions:
+            message = json.dumps({
+                "type": "idea_stream",
+                "idea_id": idea_id,
+                "frames": frames
+            })
+            for client_id in list(self.idea_subscriptions[idea_id]):
+                if client_id in self.active_connections:
+                    try:
+                        await self.active_connections[client_id].send_text(message)
+                    except Exception as e:
+                        logger.error(f"Error sending message to client {client_id}: {str(e)}")
+
     async def broadcast_experiment_update(self, experiment_id: str, data: dict):
         if experiment_id in self.experiment_subscriptions:
             message = json.dumps({
@@ -0,0 +1,73 @@
+"""
+Per-node overhead of the BFTS node script execution backends.
+
+Runs the same small script, which imports the usual scientific stack, through
+the upstream ``Interpreter`` and through ``ForkServerInterpreter`` and reports
+wall-clock time per node.
+
+Usage (from backend/):
+    python -m benchmarks.fork_interpreter_benchmark --nodes 20
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+from app.services.fork_interpreter import ForkServerInterpreter, DEFAULT_PRELOAD
+from app.services.AI_Scientist_v2.ai_scientist.treesearch.interpreter import Interpreter
+
+NODE_SCRIPT = """
+import importlib
+for name in {modules!r}:
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        pass
+print("ok")
+"""
+
+
+def benchmark(interpreter, code: str, nodes: int):
+    timings = []
+    for _ in range(nodes):
+        started_at = time.perf_counter()
+        result = interpreter.run(code, reset_session=True)
+        timings.append(time.perf_counter() - started_at)
+        if result.exc_type:
+            raise RuntimeError(f"Node script failed: {''.join(result.term_out)}")
+    interpreter.cleanup_session()
+    return timings
+
+
+def report(name: str, timings):
+    print(
+        f"{name:<12} first={timings[0] * 1000:8.1f} ms  "
+        f"median={statistics.median(timings) * 1000:8.1f} ms  "
+        f"mean={statistics.mean(timings) * 1000:8.1f} ms  "
+        f"total={sum(timings):7.2f} s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=20, help="Node scripts to run per backend")
+    parser.add_argument("--modules", nargs="*", default=DEFAULT_PRELOAD, help="Modules each script imports")
+    args = parser.parse_args()
+
+    code = NODE_SCRIPT.format(modules=args.modules)
+    with tempfile.TemporaryDirectory() as working_dir:
+        subprocess_timings = benchmark(Interpreter(working_dir, timeout=600), code, args.nodes)
+        forkserver_timings = benchmark(
+            ForkServerInterpreter(working_dir, timeout=600, preload=args.modules), code, args.nodes
+        )
+
+    print(f"{args.nodes} nodes importing {', '.join(args.modules)}")
+    report("subprocess", subprocess_timings)
+    # The first fork-server run includes starting the server and preloading
+    report("forkserver", forkserver_timings)
+    speedup = statistics.median(subprocess_timings) / statistics.median(forkserver_timings)
+    print(f"median per-node speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
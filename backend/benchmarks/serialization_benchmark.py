@@ -0,0 +1,154 @@
+"""
+Serialization time of large idea lists.
+
+Builds ideas with generated proposals, experiment runs and results in memory
+and times turning them into a JSON body through FastAPI's ``response_model``
+path (validation, ``jsonable_encoder``, stdlib ``json``) and through
+``ResponseSerializer``, cold and with finished runs already serialized.
+
+Usage (from backend/):
+    python -m benchmarks.serialization_benchmark --ideas 500 --runs 4
+"""
+import argparse
+import json
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.models.schema import ExperimentResult, ExperimentRun, ResearchIdea, ResearchIdeaResponse
+from app.services.serialization import ResponseSerializer
+
+STATUSES = ["completed", "completed", "failed", "running"]
+
+
+def build_ideas(count: int, runs: int, proposals: int, results: int) -> List[ResearchIdea]:
+    now = datetime(2026, 1, 1, 12, 0, 0, 123456)
+    ideas = []
+    for i in range(count):
+        idea_id = str(uuid.uuid4())
+        generated = [
+            {
+                "Name": f"proposal_{i}_{p}",
+                "Title": f"Proposal {p} for idea {i}",
+                "Short Hypothesis": "Sparse attention recovers dense accuracy at a fraction of the cost. " * 3,
+                "Abstract": "We study whether structured sparsity in attention layers preserves accuracy. " * 8,
+                "Experiments": [f"Ablation {k}: vary sparsity and measure perplexity" for k in range(5)],
+                "Risk Factors and Limitations": ["Limited compute", "Small datasets"],
+            }
+            for p in range(proposals)
+        ]
+        experiments = []
+        for r in range(runs):
+            run_id = str(uuid.uuid4())
+            experiments.append(ExperimentRun(
+                id=run_id,
+                research_idea_id=idea_id,
+                status=STATUSES[r % len(STATUSES)],
+                log_folder_path=f"experiments/{run_id}",
+                started_at=now,
+                completed_at=now + timedelta(hours=3),
+                updated_at=now + timedelta(hours=3),
+                is_successful=True,
+                experiment_config={"model": "gpt-4o", "num_workers": 4, "steps": 21},
+                token_usage={"gpt-4o": {"prompt_tokens": 120000, "completion_tokens": 30000, "cost": 1.25}},
+                total_cost=1.25,
+                llm_calls=310,
+                llm_latency_seconds=842.5,
+                peak_rss_bytes=2_147_483_648,
+                cpu_seconds=5400.0,
+                disk_bytes=734_003_200,
+                fingerprint=uuid.uuid4().hex * 2,
+                proposal_index=r % max(proposals, 1),
+                results=[
+                    ExperimentResult(
+                        id=str(uuid.uuid4()),
+                        experiment_id=run_id,
+                        metric_name=f"metric_{m}",
+                        metric_value=str(0.5 + m / 100),
+                        metric_type="float",
+                        created_at=now,
+                    )
+                    for m in range(results)
+                ],
+            ))
+        ideas.append(ResearchIdea(
+            id=idea_id,
+            title=f"Idea {i}",
+            keywords="attention, sparsity, efficiency",
+            tldr="Cheaper attention through structured sparsity",
+            abstract="Transformers spend most of their compute in attention. " * 10,
+            status="generated",
+            generated_ideas={"ideas": generated, "metadata": {"generated_at": now.isoformat(), "num_ideas": proposals}},
+            created_at=now,
+            updated_at=now,
+            experiments=experiments,
+        ))
+    return ideas
+
+
+def response_model_body(adapter: TypeAdapter, ideas) -> bytes:
+    """What a ``response_model=List[ResearchIdeaResponse]`` endpoint does with the returned ORM objects"""
+    value = adapter.validate_python(ideas, from_attributes=True)
+    content = jsonable_encoder(adapter.dump_python(value, mode="json"))
+    return JSONResponse(content).body
+
+
+def benchmark(fn, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        body = fn()
+        timings.append(time.perf_counter() - started_at)
+    return timings, body
+
+
+def report(name: str, timings, body: bytes):
+    print(
+        f"{name:<18} median={statistics.median(timings) * 1000:8.1f} ms  "
+        f"min={min(timings) * 1000:8.1f} ms  size={len(body) / 1024:8.0f} KiB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ideas", type=int, default=500, help="Ideas in the list")
+    parser.add_argument("--runs", type=int, default=4, help="Experiment runs per idea")
+    parser.add_argument("--proposals", type=int, default=5, help="Generated proposals per idea")
+    parser.add_argument("--results", type=int, default=10, help="Results per experiment run")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed repetitions per path")
+    args = parser.parse_args()
+
+    ideas = build_ideas(args.ideas, args.runs, args.proposals, args.results)
+    adapter = TypeAdapter(List[ResearchIdeaResponse])
+
+    baseline_timings, baseline = benchmark(lambda: response_model_body(adapter, ideas), args.repeat)
+    cold_timings, body = benchmark(lambda: ResponseSerializer(max_cached_runs=0).ideas(ideas), args.repeat)
+    serializer = ResponseSerializer()
+    serializer.ideas(ideas)
+    warm_timings, _ = benchmark(lambda: serializer.ideas(ideas), args.repeat)
+
+    if json.loads(body) != json.loads(baseline):
+        raise RuntimeError("Serializer output differs from the response_model output")
+
+    print(
+        f"{args.ideas} ideas x {args.runs} runs x {args.results} results, "
+        f"{args.proposals} proposals each, {args.repeat} repetitions"
+    )
+    report("response_model", baseline_timings, baseline)
+    report("orjson", cold_timings, body)
+    # Finished runs come from the per-process cache of serialized runs
+    report("orjson + cached", warm_timings, body)
+    print(
+        f"median speedup: {statistics.median(baseline_timings) / statistics.median(cold_timings):.1f}x cold, "
+        f"{statistics.median(baseline_timings) / statistics.median(warm_timings):.1f}x with cached runs"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""add experiment artifact uploaded flag
+
+Revision ID: add_artifact_uploaded
+Revises: add_experiment_updated_at
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_artifact_uploaded'
+down_revision = 'add_experiment_updated_at'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column(
+        'experiment_artifacts',
+        sa.Column('uploaded', sa.Boolean(), server_default=sa.text('false'), nullable=False)
+    )
+
+def downgrade():
+    op.drop_column('experiment_artifacts', 'uploaded')
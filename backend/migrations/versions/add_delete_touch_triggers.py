@@ -0,0 +1,37 @@
+"""bump parent updated_at when runs or results are deleted
+
+Revision ID: add_delete_touch_triggers
+Revises: add_artifact_uploaded
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'add_delete_touch_triggers'
+down_revision = 'add_artifact_uploaded'
+branch_labels = None
+depends_on = None
+
+# (child table, trigger and function name, parent table, foreign key column)
+TRIGGERS = [
+    ('experiment_runs', 'experiment_runs_touch_idea', 'research_ideas', 'research_idea_id'),
+    ('experiment_results', 'experiment_results_touch_run', 'experiment_runs', 'experiment_id'),
+]
+
+def upgrade():
+    # Deletions otherwise leave the parent's Last-Modified unchanged
+    for table, name, parent, column in TRIGGERS:
+        op.execute(f"""
+            CREATE FUNCTION {name}() RETURNS trigger AS $$
+            BEGIN
+                UPDATE {parent} SET updated_at = now() WHERE id = OLD.{column};
+                RETURN NULL;
+            END $$ LANGUAGE plpgsql
+        """)
+        op.execute(f"CREATE TRIGGER {name} AFTER DELETE ON {table} FOR EACH ROW EXECUTE FUNCTION {name}()")
+
+def downgrade():
+    for table, name, _, _ in TRIGGERS:
+        op.execute(f"DROP TRIGGER {name} ON {table}")
+        op.execute(f"DROP FUNCTION {name}()")
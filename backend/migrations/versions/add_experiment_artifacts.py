@@ -0,0 +1,36 @@
+"""add experiment artifacts
+
+Revision ID: add_experiment_artifacts
+Revises: add_idea_search
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_experiment_artifacts'
+down_revision = 'add_idea_search'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'experiment_artifacts',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('experiment_id', sa.String(), nullable=False),
+        sa.Column('path', sa.String(), nullable=False),
+        sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('artifact_type', sa.String(), nullable=False),
+        sa.Column('stage', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['experiment_id'], ['experiment_runs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('experiment_id', 'path', name='uq_experiment_artifacts_path')
+    )
+    op.create_index('ix_experiment_artifacts_experiment_id', 'experiment_artifacts', ['experiment_id'])
+
+def downgrade():
+    op.drop_index('ix_experiment_artifacts_experiment_id', table_name='experiment_artifacts')
+    op.drop_table('experiment_artifacts')
@@ -0,0 +1,33 @@
+"""add experiment sweeps and run proposal index
+
+Revision ID: add_experiment_sweeps
+Revises: add_run_fingerprint
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_experiment_sweeps'
+down_revision = 'add_run_fingerprint'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('experiment_runs', sa.Column('proposal_index', sa.Integer(), nullable=False, server_default='0'))
+    op.create_table(
+        'experiment_sweeps',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('research_idea_id', sa.String(), nullable=False),
+        sa.Column('proposals', sa.JSON(), nullable=False),
+        sa.Column('max_concurrency', sa.Integer(), nullable=False),
+        sa.Column('experiment_ids', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['research_idea_id'], ['research_ideas.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+def downgrade():
+    op.drop_table('experiment_sweeps')
+    op.drop_column('experiment_runs', 'proposal_index')
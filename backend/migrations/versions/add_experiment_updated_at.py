@@ -0,0 +1,24 @@
+"""add experiment run updated_at
+
+Revision ID: add_experiment_updated_at
+Revises: add_experiment_artifacts
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_experiment_updated_at'
+down_revision = 'add_experiment_artifacts'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column(
+        'experiment_runs',
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True)
+    )
+
+def downgrade():
+    op.drop_column('experiment_runs', 'updated_at')
@@ -0,0 +1,37 @@
+"""add idea import batches
+
+Revision ID: add_idea_import_batches
+Revises: add_experiment_sweeps
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_idea_import_batches'
+down_revision = 'add_experiment_sweeps'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'idea_import_batches',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('file_format', sa.String(), nullable=False),
+        sa.Column('total_rows', sa.Integer(), nullable=False),
+        sa.Column('imported_rows', sa.Integer(), nullable=False),
+        sa.Column('failed_rows', sa.Integer(), nullable=False),
+        sa.Column('errors', sa.JSON(), nullable=True),
+        sa.Column('idea_ids', sa.JSON(), nullable=True),
+        sa.Column('generate', sa.Boolean(), nullable=False),
+        sa.Column('generation_queued', sa.Integer(), nullable=False),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+def downgrade():
+    op.drop_table('idea_import_batches')
@@ -0,0 +1,34 @@
+"""add idea full-text search
+
+Revision ID: add_idea_search
+Revises: add_idea_import_batches
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_idea_search'
+down_revision = 'add_idea_import_batches'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Generated column, so the vector is maintained by Postgres on every write
+    op.execute("""
+        ALTER TABLE research_ideas ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(keywords, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(tldr, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(abstract, '')), 'C') ||
+            setweight(jsonb_to_tsvector('english', coalesce(generated_ideas, '{}'::jsonb), '["string"]'), 'D')
+        ) STORED
+    """)
+    op.create_index(
+        'ix_research_ideas_search_vector', 'research_ideas', ['search_vector'], postgresql_using='gin'
+    )
+
+def downgrade():
+    op.drop_index('ix_research_ideas_search_vector', table_name='research_ideas')
+    op.drop_column('research_ideas', 'search_vector')
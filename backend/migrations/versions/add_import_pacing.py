@@ -0,0 +1,27 @@
+"""persist the generation pace of idea import batches
+
+Revision ID: add_import_pacing
+Revises: add_delete_touch_triggers
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_import_pacing'
+down_revision = 'add_delete_touch_triggers'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('idea_import_batches', sa.Column('generate_interval_seconds', sa.Float(), nullable=True))
+    op.add_column('idea_import_batches', sa.Column('next_generation_at', sa.DateTime(), nullable=True))
+    # Batches left generating by the in-process timers resume right away
+    op.execute(
+        "UPDATE idea_import_batches SET next_generation_at = now() WHERE status = 'generating'"
+    )
+
+def downgrade():
+    op.drop_column('idea_import_batches', 'next_generation_at')
+    op.drop_column('idea_import_batches', 'generate_interval_seconds')
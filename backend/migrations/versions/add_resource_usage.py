@@ -0,0 +1,25 @@
+"""add per-run resource usage fields
+
+Revision ID: add_resource_usage
+Revises: add_token_usage
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_resource_usage'
+down_revision = 'add_token_usage'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('experiment_runs', sa.Column('peak_rss_bytes', sa.BigInteger(), nullable=True))
+    op.add_column('experiment_runs', sa.Column('cpu_seconds', sa.Float(), nullable=True))
+    op.add_column('experiment_runs', sa.Column('disk_bytes', sa.BigInteger(), nullable=True))
+
+def downgrade():
+    op.drop_column('experiment_runs', 'disk_bytes')
+    op.drop_column('experiment_runs', 'cpu_seconds')
+    op.drop_column('experiment_runs', 'peak_rss_bytes')
@@ -0,0 +1,23 @@
+"""add experiment run fingerprint
+
+Revision ID: add_run_fingerprint
+Revises: add_resource_usage
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_run_fingerprint'
+down_revision = 'add_resource_usage'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('experiment_runs', sa.Column('fingerprint', sa.String(length=64), nullable=True))
+    op.create_index('ix_experiment_runs_fingerprint', 'experiment_runs', ['fingerprint'])
+
+def downgrade():
+    op.drop_index('ix_experiment_runs_fingerprint', table_name='experiment_runs')
+    op.drop_column('experiment_runs', 'fingerprint')
@@ -0,0 +1,27 @@
+"""add per-run token usage fields
+
+Revision ID: add_token_usage
+Revises: add_code_url
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_token_usage'
+down_revision = 'add_code_url'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('experiment_runs', sa.Column('token_usage', sa.JSON(), nullable=True))
+    op.add_column('experiment_runs', sa.Column('total_cost', sa.Float(), nullable=True))
+    op.add_column('experiment_runs', sa.Column('llm_calls', sa.Integer(), nullable=True))
+    op.add_column('experiment_runs', sa.Column('llm_latency_seconds', sa.Float(), nullable=True))
+
+def downgrade():
+    op.drop_column('experiment_runs', 'llm_latency_seconds')
+    op.drop_column('experiment_runs', 'llm_calls')
+    op.drop_column('experiment_runs', 'total_cost')
+    op.drop_column('experiment_runs', 'token_usage')
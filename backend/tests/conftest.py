@@ -0,0 +1,22 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Settings requires these; tests never connect to Postgres or R2
+for _name in (
+    "POSTGRES_USER", "POSTGRES_PASSWORD", "POSTGRES_SERVER", "POSTGRES_DB",
+    "SECRET_KEY", "R2_ENDPOINT", "R2_ACCESS_KEY_ID", "R2_SECRET_ACCESS_KEY",
+):
+    os.environ.setdefault(_name, "test")
+os.environ.setdefault("POSTGRES_PORT", "5432")
+
+# Keep the file-based registries shared by worker processes out of the source tree
+_state_dir = tempfile.mkdtemp(prefix="ai-scientist-tests-")
+for _name in (
+    "SINGLE_FLIGHT_DIR", "SCHEDULER_STATE_DIR", "TASK_RESULTS_DIR", "TASK_CANCEL_DIR",
+    "IDEATION_STREAM_DIR", "DATA_CACHE_DIR",
+):
+    os.environ.setdefault(_name, os.path.join(_state_dir, _name.lower()))
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+
+import pytest
+
+from app.services.background_tasks import (
+    BATCH_PRIORITY, INTERACTIVE_PRIORITY, BackgroundTaskManager, current_cancel_token
+)
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached in time"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """Two managers standing in for two worker processes sharing the cancel directory"""
+    def manager():
+        return BackgroundTaskManager(
+            lanes={"experiment": 1}, results_dir=str(tmp_path / "results"), cancel_dir=str(tmp_path / "cancel")
+        )
+    return manager(), manager()
+
+
+def test_cancel_through_another_worker_stops_running_task(workers):
+    owner, other = workers
+    started = threading.Event()
+
+    def run():
+        started.set()
+        current_cancel_token().wait(10)
+        current_cancel_token().raise_if_cancelled()
+
+    task_id = owner.create_task(run)
+    assert started.wait(5)
+
+    assert other.cancel_task(task_id) is True
+    assert owner.poll_cancellations() == 1
+    _wait_for(lambda: owner.get_task_status(task_id)["status"] == "cancelled")
+
+
+def test_cancel_of_unknown_task_raises(workers):
+    _, other = workers
+    with pytest.raises(ValueError):
+        other.cancel_task("missing")
+
+
+def test_interactive_tasks_start_ahead_of_queued_batch_tasks(workers):
+    manager, _ = workers
+    release = threading.Event()
+    order = []
+    manager.create_task(release.wait, 5)
+    for name, priority in (("batch-1", BATCH_PRIORITY), ("batch-2", BATCH_PRIORITY), ("interactive", INTERACTIVE_PRIORITY)):
+        manager.create_task(order.append, name, priority=priority)
+
+    release.set()
+    _wait_for(lambda: len(order) == 3)
+    assert order == ["interactive", "batch-1", "batch-2"]
+
+
+def test_results_live_on_disk_until_the_task_is_reaped(workers):
+    manager, _ = workers
+    task_id = manager.create_task(lambda: {"ideas": ["a", "b"]})
+    _wait_for(lambda: manager.get_task_status(task_id)["status"] == "completed")
+
+    listed = manager.list_tasks("completed")
+    assert [task["id"] for task in listed] == [task_id]
+    assert "result" not in listed[0]
+    ref = listed[0]["result_ref"]
+    assert manager.get_task_status(task_id)["result"] == {"ideas": ["a", "b"]}
+
+    assert manager.cleanup_completed_tasks(max_age_seconds=0) == 1
+    assert manager.list_tasks() == []
+    assert not os.path.exists(ref)
+
+
+def test_cleanup_keeps_only_the_newest_finished_tasks(workers):
+    manager, _ = workers
+    task_ids = [manager.create_task(int, n) for n in range(3)]
+    _wait_for(lambda: len(manager.list_tasks("completed")) == 3)
+
+    assert manager.cleanup_completed_tasks(max_finished=1) == 2
+    assert [task["id"] for task in manager.list_tasks()] == task_ids[-1:]
+
+
+def test_group_limit_holds_back_tasks_without_blocking_the_lane(tmp_path):
+    manager = BackgroundTaskManager(
+        lanes={"experiment": 3}, results_dir=str(tmp_path / "results"), cancel_dir=str(tmp_path / "cancel")
+    )
+    release = threading.Event()
+    started = []
+
+    def run(name):
+        started.append(name)
+        release.wait(5)
+
+    for name in ("sweep-1", "sweep-2"):
+        manager.create_task(run, name, lane="experiment", group="sweep", group_limit=1)
+    manager.create_task(run, "other", lane="experiment")
+
+    _wait_for(lambda: len(started) == 2)
+    assert sorted(started) == ["other", "sweep-1"]
+    release.set()
+    _wait_for(lambda: len(started) == 3)
+    assert started[-1] == "sweep-2"
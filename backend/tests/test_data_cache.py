@@ -0,0 +1,65 @@
+import os
+
+from app.services.data_cache import PreprocessedDataCache
+
+
+def _dataset(path, content):
+    path.mkdir()
+    (path / "train.csv").write_text(content)
+    return path
+
+
+def _build(scratch):
+    (scratch / "train.csv").write_text((scratch / "train.csv").read_text().upper())
+
+
+def test_evict_skips_pinned_entries(tmp_path):
+    cache = PreprocessedDataCache(str(tmp_path / "cache"), max_bytes=1)
+    first, _ = cache.get_or_build(_dataset(tmp_path / "a", "a" * 100), _build, pin="run-1")
+    second, _ = cache.get_or_build(_dataset(tmp_path / "b", "b" * 100), _build)
+
+    # The pinned entry survives the eviction triggered by the second build
+    assert (first / "train.csv").read_text() == "A" * 100
+    assert second.exists()
+
+    cache.release("run-1")
+    cache.evict(keep=second.name)
+    assert not first.exists()
+
+
+def test_pins_of_dead_processes_are_ignored(tmp_path):
+    cache = PreprocessedDataCache(str(tmp_path / "cache"), max_bytes=1)
+    entry, _ = cache.get_or_build(_dataset(tmp_path / "a", "a" * 100), _build, pin="run-1")
+    (entry / ".pins" / "run-1").write_text(str(2 ** 22 + 1))
+    assert not os.path.exists(f"/proc/{2 ** 22 + 1}")
+
+    cache.evict()
+    assert not entry.exists()
+
+
+def test_key_hashes_contents_only_when_the_manifest_changes(tmp_path, monkeypatch):
+    from app.services import data_cache as module
+
+    cache = PreprocessedDataCache(str(tmp_path / "cache"))
+    data_dir = _dataset(tmp_path / "a", "a" * 100)
+    calls = []
+    hash_directory = module.hash_directory
+    monkeypatch.setattr(module, "hash_directory", lambda path: calls.append(path) or hash_directory(path))
+
+    key = cache.key(data_dir, {})
+    assert cache.key(data_dir, {}) == key
+    assert len(calls) == 1
+
+    (data_dir / "train.csv").write_text("b" * 101)
+    assert cache.key(data_dir, {}) != key
+    assert len(calls) == 2
+
+
+def test_manifests_are_evicted_with_their_entries(tmp_path):
+    cache = PreprocessedDataCache(str(tmp_path / "cache"), max_bytes=1)
+    first, _ = cache.get_or_build(_dataset(tmp_path / "a", "a" * 100), _build)
+    second, _ = cache.get_or_build(_dataset(tmp_path / "b", "b" * 100), _build)
+
+    assert not first.exists()
+    manifests = list((tmp_path / "cache" / ".manifests").iterdir())
+    assert [known.read_text() for known in manifests] == [(second / ".content_hash").read_text()]
@@ -0,0 +1,48 @@
+import multiprocessing
+
+import pytest
+
+from app.services import fork_interpreter
+from app.services.fork_interpreter import ForkServerInterpreter
+
+
+@pytest.fixture
+def interpreter(tmp_path, monkeypatch):
+    # Plain fork, so the node scripts' child sees this test's patches
+    monkeypatch.setattr(fork_interpreter, "_mp_context", multiprocessing.get_context("fork"))
+    monkeypatch.setattr(
+        fork_interpreter,
+        "exception_summary",
+        lambda e, working_dir, file_name, format_tb_ipython: (f"{type(e).__name__}: {e}\n", type(e).__name__, {}, []),
+    )
+    return ForkServerInterpreter(tmp_path, timeout=1, preload=[])
+
+
+def test_script_runs_as_main_in_the_working_directory(interpreter, tmp_path):
+    result = interpreter.run("import os\nif __name__ == '__main__':\n    print(os.getcwd())\n")
+
+    assert result.exc_type is None
+    assert "".join(result.term_out).startswith(f"{tmp_path.resolve()}\n")
+    assert (tmp_path / "runfile.py").exists()
+
+
+def test_exceptions_are_reported(interpreter):
+    result = interpreter.run("print('before')\n1 / 0\n")
+
+    assert result.exc_type == "ZeroDivisionError"
+    assert result.term_out[:2] == ["before", "\n"]
+    assert "ZeroDivisionError: division by zero\n" in result.term_out
+
+
+def test_script_over_the_time_limit_is_killed(interpreter):
+    result = interpreter.run("import time\ntime.sleep(30)\n")
+
+    assert result.exc_type == "TimeoutError"
+    assert interpreter.process is None
+
+
+def test_script_that_dies_without_reporting(interpreter):
+    result = interpreter.run("import os\nos._exit(3)\n")
+
+    assert result.exc_type == "ProcessExitError"
+    assert result.exc_info == {"exitcode": 3}
@@ -0,0 +1,44 @@
+import io
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.idea_import import detect_format, iter_rows, validate_row
+
+
+def _rows(text, file_format):
+    return list(iter_rows(io.BytesIO(text.encode()), file_format))
+
+
+def test_format_comes_from_the_extension_or_content_type():
+    assert detect_format("ideas.ndjson", None) == "jsonl"
+    assert detect_format("upload", "text/csv") == "csv"
+    with pytest.raises(HTTPException) as error:
+        detect_format("ideas.xlsx", "application/octet-stream")
+    assert error.value.status_code == 400
+
+
+def test_invalid_json_lines_are_yielded_as_errors():
+    rows = _rows('{"title": "A"}\n\nnot json\n{"title": "B"}\n', "jsonl")
+
+    assert [line for line, _ in rows] == [1, 3, 4]
+    assert isinstance(rows[1][1], ValueError)
+    with pytest.raises(ValueError, match="Invalid JSON"):
+        validate_row(rows[1][1])
+
+
+def test_csv_rows_keep_their_line_numbers():
+    rows = _rows('title,keywords,tldr,abstract\nA,"k1, k2",t,"multi\nline"\nB,k,t,a\n', "csv")
+
+    assert [line for line, _ in rows] == [3, 4]
+    assert rows[0][1]["abstract"] == "multi\nline"
+
+
+def test_validate_row_joins_keyword_lists_and_rejects_blank_fields():
+    idea = validate_row({"title": "A", "keywords": ["x", "y"], "tldr": "t", "abstract": "a"})
+    assert idea.keywords == "x, y"
+
+    with pytest.raises(ValueError, match="tldr must not be empty"):
+        validate_row({"title": "A", "keywords": "k", "tldr": "  ", "abstract": "a"})
+    with pytest.raises(ValueError, match="Row must be an object"):
+        validate_row(["A", "k", "t", "a"])
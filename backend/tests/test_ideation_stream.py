@@ -0,0 +1,34 @@
+import os
+import time
+
+from app.services import ideation_stream
+from app.services.ideation_stream import IdeationStreams
+
+
+def test_start_position_of_running_and_finished_runs(tmp_path, monkeypatch):
+    # Frames longer than a read so the last one spans several reads
+    monkeypatch.setattr(ideation_stream, "TAIL_READ_BYTES", 16)
+    streams = IdeationStreams(str(tmp_path), frame_chars=1)
+    assert streams.start_position("idea") == (None, 0)
+
+    stream = streams.open("idea")
+    stream.token("First proposal")
+    inode, offset = streams.start_position("idea")
+    assert offset == 0
+
+    stream.close(error="x" * 100)
+    assert streams.start_position("idea") == (inode, streams._path("idea").stat().st_size)
+
+
+def test_prune_removes_only_finished_streams_past_retention(tmp_path):
+    streams = IdeationStreams(str(tmp_path), retention_seconds=60)
+    finished, running, recent = streams.open("finished"), streams.open("running"), streams.open("recent")
+    finished.close()
+    recent.close()
+    running.token("still thinking")
+    old = time.time() - 120
+    for idea_id in ("finished", "running"):
+        os.utime(streams._path(idea_id), (old, old))
+
+    assert streams.prune() == 1
+    assert sorted(path.stem for path in tmp_path.glob("*.jsonl")) == ["recent", "running"]
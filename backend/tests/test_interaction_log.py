@@ -0,0 +1,42 @@
+import gzip
+
+from app.services.interaction_log import LOG_FILE_NAME, InteractionLogReader, InteractionLogWriter
+
+
+def _records(start, count):
+    return [{"model": "gpt-4o", "prompt": f"prompt {n}"} for n in range(start, start + count)]
+
+
+def test_pages_span_members_and_filter_by_stage(tmp_path):
+    writer = InteractionLogWriter(tmp_path)
+    writer.append(_records(0, 3), stage="ideation")
+    writer.append(_records(3, 2), stage="bfts")
+    writer.append(_records(5, 3), stage="ideation")
+
+    reader = InteractionLogReader(tmp_path)
+    page = reader.read_page(offset=2, limit=3)
+    assert page["total"] == 8
+    assert [item["seq"] for item in page["items"]] == [2, 3, 4]
+
+    ideation = reader.read_page(offset=2, limit=10, stage="ideation")
+    assert ideation["total"] == 6
+    assert [item["seq"] for item in ideation["items"]] == [2, 5, 6, 7]
+    assert reader.stages() == {"ideation": 6, "bfts": 2}
+
+
+def test_log_is_a_plain_gzip_file(tmp_path):
+    writer = InteractionLogWriter(tmp_path)
+    writer.append(_records(0, 2))
+    writer.append(_records(2, 1))
+
+    with gzip.open(tmp_path / LOG_FILE_NAME, "rt") as f:
+        assert len(f.read().splitlines()) == 3
+
+
+def test_new_writer_continues_the_sequence(tmp_path):
+    InteractionLogWriter(tmp_path).append(_records(0, 2))
+    # e.g. the BFTS child process appending to the parent's log
+    InteractionLogWriter(tmp_path).append(_records(2, 2))
+
+    items = InteractionLogReader(tmp_path).read_page(limit=10)["items"]
+    assert [item["seq"] for item in items] == [0, 1, 2, 3]
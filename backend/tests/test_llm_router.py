@@ -0,0 +1,86 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import llm_router
+from app.core.config import settings
+from app.services.llm_router import LLMRouter, LLMRoutingError
+
+
+@pytest.fixture
+def router(monkeypatch):
+    router = LLMRouter(["slow", "fast"])
+    monkeypatch.setattr(router, "_client", lambda model: (SimpleNamespace(chat="completion"), model))
+    return router
+
+
+def test_timed_out_call_stops_at_its_next_llm_call(router):
+    slow_calls = []
+
+    def request(client, model):
+        if model == "fast":
+            return client.chat
+        while True:
+            slow_calls.append(client.chat)
+            time.sleep(0.05)
+
+    assert router.run(request, timeout_seconds=0.2) == "completion"
+    time.sleep(0.2)
+    calls = len(slow_calls)
+    time.sleep(0.2)
+    assert len(slow_calls) == calls
+    assert router.get_stats()["slow"]["outcomes"] == {"timeout": 1}
+
+
+def test_timeout_counts_from_call_start(router, monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(llm_router, "_executor", executor)
+    busy = threading.Event()
+    executor.submit(lambda: busy.wait(0.5))
+
+    def request(client, model):
+        time.sleep(0.1)
+        return model
+
+    # Queued behind the busy pool thread for longer than the timeout, but answers in time once started
+    assert router.run(request, timeout_seconds=0.3) == "slow"
+    executor.shutdown()
+
+
+def test_request_gives_up_while_queued_behind_a_full_pool(router, monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(llm_router, "_executor", executor)
+    busy = threading.Event()
+    executor.submit(busy.wait)
+
+    started = time.monotonic()
+    with pytest.raises(LLMRoutingError):
+        router.run(lambda client, model: model, timeout_seconds=0.1)
+    # Two routes, each allowed its timeout queued and its timeout running
+    assert time.monotonic() - started < 1
+    busy.set()
+    executor.shutdown()
+
+
+def test_route_with_too_many_hanging_calls_is_skipped(router, monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=4)
+    monkeypatch.setattr(llm_router, "_executor", executor)
+    monkeypatch.setattr(settings, "LLM_ROUTER_MAX_ABANDONED_PER_ROUTE", 1)
+    release = threading.Event()
+
+    def request(client, model):
+        if model == "slow":
+            # An in-flight LLM call the client proxy cannot interrupt
+            release.wait()
+        return model
+
+    assert router.run(request, timeout_seconds=0.1) == "fast"
+    # The first call still holds its thread, so the next request goes straight to the fallback
+    assert router.run(request, timeout_seconds=0.1) == "fast"
+    assert router.get_stats()["slow"]["outcomes"] == {"timeout": 1, "saturated": 1}
+    release.set()
+    executor.shutdown()
+    assert not router._saturated("slow")
@@ -0,0 +1,32 @@
+from prometheus_client import REGISTRY
+
+from app.core import metrics
+from app.core.metrics import StageTimer, render_metrics
+
+
+def _stage_count(stage):
+    return REGISTRY.get_sample_value("ai_scientist_stage_duration_seconds_count", {"stage": stage}) or 0
+
+
+def test_stage_timer_records_each_finished_stage(monkeypatch):
+    now = iter([100.0, 130.0, 190.0])
+    monkeypatch.setattr(metrics.time, "monotonic", lambda: next(now))
+    before = {stage: _stage_count(stage) for stage in ("ideation", "bfts")}
+    bfts_sum = REGISTRY.get_sample_value("ai_scientist_stage_duration_seconds_sum", {"stage": "bfts"}) or 0
+
+    timer = StageTimer()
+    timer.start("ideation")
+    timer.start("bfts")
+    timer.stop()
+
+    assert _stage_count("ideation") == before["ideation"] + 1
+    assert _stage_count("bfts") == before["bfts"] + 1
+    assert REGISTRY.get_sample_value("ai_scientist_stage_duration_seconds_sum", {"stage": "bfts"}) == bfts_sum + 60
+    assert timer.stage is None
+
+
+def test_render_metrics_exposes_the_app_metrics():
+    metrics.LLM_TOKENS.labels(model="gpt-4o", type="prompt").inc(5)
+    body = render_metrics().decode()
+    assert 'ai_scientist_llm_tokens_total{model="gpt-4o",type="prompt"}' in body
+    assert "ai_scientist_tasks" in body
@@ -0,0 +1,47 @@
+import json
+
+from app.services.prompt_budget import build_prev_ideas_section, count_tokens, normalize_ideas
+
+
+def _idea(n, topic="attention"):
+    return {
+        "Name": f"idea_{n}",
+        "Title": f"Idea {n} on {topic}",
+        "Short Hypothesis": f"Hypothesis {n}",
+        "Abstract": f"{topic} " * 60,
+    }
+
+
+def test_section_within_budget_is_left_alone():
+    ideas = [_idea(n) for n in range(2)]
+    section, stats = build_prev_ideas_section(ideas, max_tokens=10000)
+
+    assert section == "\n\n".join(json.dumps(idea) for idea in ideas)
+    assert stats["summarized"] == stats["dropped"] == 0
+
+
+def test_large_history_fits_the_budget():
+    ideas = [_idea(n) for n in range(40)]
+    section, stats = build_prev_ideas_section(ideas, max_tokens=1000, keep_recent=2)
+
+    assert count_tokens(section) <= 1000
+    assert stats["original_tokens"] > 1000
+    assert stats["full"] >= 2
+    assert stats["full"] + stats["summarized"] + stats["dropped"] == 40
+    # The most recent ideas are kept in full, older ones are summarized or dropped
+    assert json.dumps(ideas[-1]) in section
+    assert json.dumps(ideas[-2]) in section
+    assert section.startswith(f"Earlier ideas (summarized; {stats['dropped']} older ideas omitted):\n- Name: idea_")
+    assert "idea_0" not in section
+
+
+def test_diverse_ideas_are_preferred_over_near_duplicates():
+    ideas = [_idea(0, "protein folding"), *(_idea(n) for n in range(1, 10))]
+    section, stats = build_prev_ideas_section(ideas, max_tokens=700, keep_recent=1)
+
+    assert 1 < stats["full"] < 10
+    assert json.dumps(ideas[0]) in section
+
+
+def test_ideas_stored_as_json_strings_are_normalized():
+    assert normalize_ideas([json.dumps({"Name": "a"}), "plain title", 3]) == [{"Name": "a"}, {"Title": "plain title"}]
@@ -0,0 +1,429 @@
+import json
+import time
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, delete
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.endpoints import research
+from app.db.database import get_db
+from app.models.schema import (
+    Base, ExperimentArtifact, ExperimentResult, ExperimentRun, IdeaStatus, ResearchIdea
+)
+from app.services import artifact_server, idea_import
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+@pytest.fixture
+def client():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(research.router, prefix="/api")
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as test_client:
+        yield test_client, Session
+
+
+@pytest.fixture
+def idea_id(client):
+    _, Session = client
+    with Session() as db:
+        idea = ResearchIdea(
+            title="Sparse attention",
+            keywords="attention, sparsity",
+            tldr="Cheaper attention",
+            abstract="Structured sparsity in attention layers.",
+            status=IdeaStatus.GENERATED,
+            generated_ideas={"ideas": [{"Title": "First"}, {"Title": "Second"}], "metadata": {}},
+        )
+        db.add(idea)
+        db.commit()
+        return idea.id
+
+
+def test_sweep_with_out_of_range_proposal_returns_400(client, idea_id):
+    test_client, _ = client
+    response = test_client.post(f"/api/ideas/{idea_id}/sweeps", json={"proposals": [0, 5]})
+    assert response.status_code == 400
+    assert "Proposals must be between 0 and 1" in response.json()["detail"]
+
+
+def test_experiment_with_out_of_range_proposal_returns_400(client, idea_id):
+    test_client, _ = client
+    response = test_client.post(f"/api/ideas/{idea_id}/experiments", params={"proposal_index": 5})
+    assert response.status_code == 400
+
+
+def test_experiment_for_unknown_idea_returns_404(client):
+    test_client, _ = client
+    response = test_client.post("/api/ideas/missing/experiments")
+    assert response.status_code == 404
+
+
+@pytest.fixture
+def removed_run(client, idea_id):
+    """A finished run whose directory is gone, with one uploaded and one local-only artifact"""
+    _, Session = client
+    with Session() as db:
+        run = ExperimentRun(research_idea_id=idea_id, status="completed", log_folder_path=None)
+        db.add(run)
+        db.flush()
+        for path, uploaded in (("paper.pdf", True), ("logs/run.log", False)):
+            db.add(ExperimentArtifact(
+                experiment_id=run.id, path=path, size_bytes=1, sha256="0" * 64,
+                artifact_type="other", stage="finalize", uploaded=uploaded,
+            ))
+        db.commit()
+        return run.id
+
+
+def test_artifact_not_uploaded_returns_404(client, removed_run):
+    test_client, _ = client
+    response = test_client.get(f"/api/experiments/{removed_run}/artifacts/logs/run.log", follow_redirects=False)
+    assert response.status_code == 404
+
+
+def test_uploaded_artifact_redirects_to_r2(client, removed_run, monkeypatch):
+    test_client, _ = client
+    monkeypatch.setattr(artifact_server.r2_storage, "presigned_url", lambda key, expires: f"https://r2.test/{key}")
+    response = test_client.get(f"/api/experiments/{removed_run}/artifacts/paper.pdf", follow_redirects=False)
+    assert response.status_code == 307
+    assert response.headers["location"].endswith(f"/{removed_run}/paper.pdf")
+
+
+def test_cancelled_run_drops_its_artifacts(client, idea_id, tmp_path, monkeypatch):
+    from app.services import ai_scientist_wrapper
+
+    test_client, Session = client
+    experiment_dir = tmp_path / "run"
+    experiment_dir.mkdir()
+    (experiment_dir / "partial.log").write_text("step 1")
+    with Session() as db:
+        run = ExperimentRun(research_idea_id=idea_id, status="running", log_folder_path=str(experiment_dir))
+        db.add(run)
+        db.flush()
+        db.add(ExperimentArtifact(
+            experiment_id=run.id, path="partial.log", size_bytes=6, sha256="0" * 64,
+            artifact_type="log", stage="experiment",
+        ))
+        db.commit()
+        run_id = run.id
+
+    monkeypatch.setattr(ai_scientist_wrapper, "get_db", lambda: iter([Session()]))
+    ai_scientist_wrapper.ai_scientist._mark_experiment_cancelled(run_id, experiment_dir=experiment_dir)
+
+    assert not experiment_dir.exists()
+    response = test_client.get(f"/api/experiments/{run_id}/artifacts")
+    assert response.status_code == 200
+    assert response.json()["total"] == 0
+    assert test_client.get(f"/api/experiments/{run_id}/artifacts/partial.log").status_code == 404
+
+
+@pytest.mark.parametrize("resource", ["ideas", "experiments"])
+def test_deleting_a_result_changes_last_modified(client, idea_id, resource):
+    test_client, Session = client
+    long_ago = datetime(2026, 1, 1)
+    with Session() as db:
+        db.query(ResearchIdea).update({"updated_at": long_ago})
+        run = ExperimentRun(research_idea_id=idea_id, status="completed", updated_at=long_ago)
+        db.add(run)
+        db.flush()
+        db.add(ExperimentResult(
+            experiment_id=run.id, metric_name="accuracy", metric_value="0.9", metric_type="float", created_at=long_ago
+        ))
+        db.commit()
+        url = f"/api/{resource}/{idea_id if resource == 'ideas' else run.id}"
+
+    last_modified = test_client.get(url).headers["last-modified"]
+    assert test_client.get(url, headers={"If-Modified-Since": last_modified}).status_code == 304
+
+    with Session() as db:
+        db.execute(delete(ExperimentResult))
+        db.commit()
+    assert test_client.get(url, headers={"If-Modified-Since": last_modified}).status_code == 200
+
+
+def test_import_generation_survives_a_worker_restart(client, monkeypatch):
+    test_client, Session = client
+    queued = []
+
+    async def generate_ideas(idea_id, db, priority=None):
+        queued.append(idea_id)
+
+    monkeypatch.setattr(idea_import.ai_scientist, "generate_ideas", generate_ideas)
+    monkeypatch.setattr(idea_import, "get_db", lambda: iter([Session()]))
+    rows = "\n".join(
+        json.dumps({"title": f"Idea {i}", "keywords": "k", "tldr": "t", "abstract": "a"}) for i in range(3)
+    )
+    response = test_client.post(
+        "/api/ideas/imports",
+        files={"file": ("ideas.jsonl", rows, "application/jsonl")},
+        data={"generate": "true", "rate_per_minute": "6000"},
+    )
+    batch = response.json()
+    assert batch["status"] == "generating"
+
+    # The importing worker is gone; its replacement and another worker share the batch
+    workers = [idea_import.IdeaImporter(), idea_import.IdeaImporter()]
+    deadline = time.monotonic() + 5
+    while len(queued) < 3:
+        assert time.monotonic() < deadline
+        for worker in workers:
+            worker.pace()
+        time.sleep(0.02)
+
+    assert queued == batch["idea_ids"]
+    status = test_client.get(f"/api/ideas/imports/{batch['batch_id']}").json()
+    assert status["status"] == "completed"
+    assert status["generation_queued"] == 3
+
+
+@pytest.fixture
+def started_tasks(tmp_path, monkeypatch):
+    """Experiment tasks queued by the endpoints, without running them"""
+    from app.services import ai_scientist_wrapper
+
+    tasks = []
+    monkeypatch.setattr(ai_scientist_wrapper.single_flight, "state_dir", tmp_path / "single_flight")
+    monkeypatch.setattr(
+        ai_scientist_wrapper.task_manager, "create_task",
+        lambda func, **kwargs: tasks.append(kwargs) or f"task-{len(tasks)}",
+    )
+    return tasks
+
+
+def test_identical_experiment_reuses_the_completed_run(client, idea_id, started_tasks):
+    from app.services.ai_scientist_wrapper import ai_scientist
+    from app.services.settings_service import settings_service
+
+    test_client, Session = client
+    with Session() as db:
+        idea = db.get(ResearchIdea, idea_id)
+        run = ExperimentRun(
+            research_idea_id=idea_id, status="completed", proposal_index=0,
+            fingerprint=ai_scientist._run_fingerprint(idea, settings_service.get_settings(), 0),
+        )
+        db.add(run)
+        db.commit()
+        run_id = run.id
+
+    response = test_client.post(f"/api/ideas/{idea_id}/experiments").json()
+    assert response["reused"] is True
+    assert response["experiment_id"] == run_id
+    assert response["task_id"] is None
+    assert started_tasks == []
+
+    # Another proposal of the same idea has a different fingerprint
+    other = test_client.post(f"/api/ideas/{idea_id}/experiments", params={"proposal_index": 1}).json()
+    assert other["reused"] is False
+    assert len(started_tasks) == 1
+
+
+def test_forced_experiment_runs_again(client, idea_id, started_tasks):
+    from app.services.ai_scientist_wrapper import ai_scientist
+    from app.services.settings_service import settings_service
+
+    test_client, Session = client
+    with Session() as db:
+        idea = db.get(ResearchIdea, idea_id)
+        fingerprint = ai_scientist._run_fingerprint(idea, settings_service.get_settings(), 0)
+        db.add(ExperimentRun(research_idea_id=idea_id, status="completed", fingerprint=fingerprint))
+        db.commit()
+
+    response = test_client.post(f"/api/ideas/{idea_id}/experiments", params={"force": "true"}).json()
+    assert response["reused"] is False
+    assert response["task_id"] == "task-1"
+    with Session() as db:
+        new_run = db.get(ExperimentRun, response["experiment_id"])
+        assert new_run.fingerprint == fingerprint
+        assert new_run.status == "pending"
+
+
+def test_concurrent_experiment_requests_share_one_run(client, idea_id, started_tasks):
+    test_client, _ = client
+    first = test_client.post(f"/api/ideas/{idea_id}/experiments").json()
+    second = test_client.post(f"/api/ideas/{idea_id}/experiments").json()
+
+    assert second["experiment_id"] == first["experiment_id"]
+    assert second["task_id"] == first["task_id"]
+    assert len(started_tasks) == 1
+
+
+def test_repeated_idempotency_key_replays_the_response(client, idea_id, started_tasks):
+    from app.services.ai_scientist_wrapper import single_flight
+
+    test_client, _ = client
+    url = f"/api/ideas/{idea_id}/experiments"
+    first = test_client.post(url, headers={"Idempotency-Key": "retry-1"}).json()
+    # Even after the run finished, the retry gets the original response
+    single_flight.finish(f"experiment:{idea_id}:0")
+    assert test_client.post(url, headers={"Idempotency-Key": "retry-1"}).json() == first
+    assert len(started_tasks) == 1
+
+    assert test_client.post(url, headers={"Idempotency-Key": "retry-2"}).json()["task_id"] == "task-2"
+
+
+def test_sweep_queues_its_runs_as_one_limited_batch(client, idea_id, started_tasks):
+    from app.services.background_tasks import BATCH_PRIORITY
+
+    test_client, Session = client
+    sweep = test_client.post(f"/api/ideas/{idea_id}/sweeps", json={"max_concurrency": 1}).json()
+
+    assert [experiment["proposal_index"] for experiment in sweep["experiments"]] == [0, 1]
+    assert {task["group"] for task in started_tasks} == {sweep["sweep_id"]}
+    assert {task["group_limit"] for task in started_tasks} == {1}
+    assert {task["priority"] for task in started_tasks} == {BATCH_PRIORITY}
+
+    with Session() as db:
+        run = db.get(ExperimentRun, sweep["experiments"][0]["experiment_id"])
+        run.status = "completed"
+        run.is_successful = True
+        run.total_cost = 1.5
+        db.commit()
+
+    status = test_client.get(f"/api/sweeps/{sweep['sweep_id']}").json()
+    assert status["total"] == 2
+    assert status["finished"] == 1
+    assert status["progress"] == 0.5
+    assert status["results"]["successful"] == 1
+    assert status["results"]["total_cost"] == 1.5
+    assert [experiment["title"] for experiment in status["experiments"]] == ["First", "Second"]
+
+
+def test_import_inserts_valid_rows_and_reports_the_rest(client, monkeypatch):
+    test_client, Session = client
+    monkeypatch.setattr(research.idea_importer, "batch_size", 2)
+    rows = [json.dumps({"title": f"Idea {i}", "keywords": "k", "tldr": "t", "abstract": "a"}) for i in range(5)]
+    rows.insert(2, "{broken")
+    rows.insert(4, json.dumps({"title": "No abstract", "keywords": "k", "tldr": "t"}))
+
+    response = test_client.post(
+        "/api/ideas/imports", files={"file": ("ideas.jsonl", "\n".join(rows), "application/jsonl")}
+    )
+    batch = response.json()
+
+    assert batch["status"] == "completed"
+    assert (batch["total_rows"], batch["imported_rows"], batch["failed_rows"]) == (7, 5, 2)
+    assert [error["line"] for error in batch["errors"]] == [3, 5]
+    with Session() as db:
+        titles = {idea.title for idea in db.query(ResearchIdea).filter(ResearchIdea.id.in_(batch["idea_ids"]))}
+    assert titles == {f"Idea {i}" for i in range(5)}
+
+
+def test_similar_ideas_come_from_other_ideas_and_track_deletes(client, idea_id, monkeypatch):
+    from app.services.similarity_index import SimilarityIndex
+
+    test_client, Session = client
+    monkeypatch.setattr(research, "similarity_index", SimilarityIndex(dimensions=64, refresh_interval_seconds=0))
+    with Session() as db:
+        other = ResearchIdea(
+            title="Other", keywords="k", tldr="t", abstract="a", status=IdeaStatus.GENERATED,
+            generated_ideas={"ideas": [{"Title": "First"}]},
+        )
+        db.add(other)
+        db.commit()
+        other_id = other.id
+
+    response = test_client.get(f"/api/ideas/{idea_id}/similar", params={"proposal_index": 0, "threshold": 0.5})
+    body = response.json()
+    assert body["indexed_proposals"] == 3
+    assert [(match["idea_id"], match["similarity"]) for match in body["results"][0]["matches"]] == [(other_id, 1.0)]
+
+    with Session() as db:
+        db.delete(db.get(ResearchIdea, other_id))
+        db.commit()
+    body = test_client.get(f"/api/ideas/{idea_id}/similar", params={"proposal_index": 0}).json()
+    assert body["indexed_proposals"] == 2
+    assert body["results"][0]["matches"] == []
+
+
+def test_search_ranks_title_matches_first_and_follows_updates(client, idea_id):
+    test_client, Session = client
+    with Session() as db:
+        db.add_all([
+            ResearchIdea(
+                title="Curriculum learning", keywords="training", tldr="Order examples",
+                abstract="Sorting examples by difficulty, unlike sparse attention.",
+            ),
+            ResearchIdea(title="Sparse mixture of experts", keywords="routing", tldr="t", abstract="a"),
+        ])
+        db.commit()
+
+    body = test_client.get("/api/ideas/search", params={"q": "sparse"}).json()
+    assert body["total"] == 3
+    assert body["results"][-1]["idea"]["title"] == "Curriculum learning"
+    assert "<b>sparse</b>" in body["results"][-1]["snippet"]
+
+    # FTS5 operators in user input are matched literally instead of failing
+    assert test_client.get("/api/ideas/search", params={"q": 'sparse" -* ('}).json()["total"] == 3
+
+    with Session() as db:
+        db.get(ResearchIdea, idea_id).generated_ideas = {"ideas": [{"Title": "Quantized kernels"}]}
+        db.commit()
+    body = test_client.get("/api/ideas/search", params={"q": "quantized"}).json()
+    assert [hit["idea"]["id"] for hit in body["results"]] == [idea_id]
+    page = test_client.get("/api/ideas/search", params={"q": "sparse", "limit": 1, "offset": 1}).json()
+    assert (page["total"], len(page["results"])) == (3, 1)
+
+
+def test_artifact_manifest_records_changes_per_stage(client, idea_id, tmp_path, monkeypatch):
+    from app.services import artifact_manifest
+    from app.services.artifact_manifest import ArtifactManifest
+
+    test_client, Session = client
+    hashed = []
+    file_sha256 = artifact_manifest.file_sha256
+    monkeypatch.setattr(artifact_manifest, "file_sha256", lambda path: hashed.append(path.name) or file_sha256(path))
+    run_dir = tmp_path / "run"
+    (run_dir / "data").mkdir(parents=True)
+    (run_dir / "data" / "train.csv").write_text("inputs")
+    (run_dir / "logs").mkdir()
+    (run_dir / "logs" / "stage1.log").write_text("step 1")
+    (run_dir / "idea.json").write_text("{}")
+    with Session() as db:
+        run = ExperimentRun(research_idea_id=idea_id, status="running", log_folder_path=str(run_dir))
+        db.add(run)
+        db.commit()
+        run_id = run.id
+
+        manifest = ArtifactManifest(run_id, run_dir)
+        assert manifest.update("experiment", db) == 2
+        (run_dir / "logs" / "stage1.log").write_text("step 1, step 2")
+        (run_dir / "paper.pdf").write_bytes(b"%PDF")
+        (run_dir / "idea.json").unlink()
+        hashed.clear()
+        assert manifest.update("writeup", db) == 3
+        assert sorted(hashed) == ["paper.pdf", "stage1.log"]
+
+        # A later task picks the manifest up without hashing unchanged files again
+        hashed.clear()
+        reloaded = ArtifactManifest.load(run_id, run_dir, db)
+        assert reloaded.update("review", db) == 0
+        assert hashed == []
+        assert reloaded.find("pdf") == ["paper.pdf"]
+        assert reloaded.find(name="stage1.log") == ["logs/stage1.log"]
+
+    artifacts = test_client.get(f"/api/experiments/{run_id}/artifacts").json()
+    assert artifacts["total"] == 2
+    stages = {artifact["path"]: artifact["stage"] for artifact in artifacts["artifacts"]}
+    assert stages == {"logs/stage1.log": "writeup", "paper.pdf": "writeup"}
@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+from app.services.background_tasks import (
+    BackgroundTaskManager, CancellationToken, TaskCancelled, current_cancel_token
+)
+from app.services.resource_scheduler import ResourceRequest, ResourceScheduler
+
+
+@pytest.fixture
+def scheduler(tmp_path):
+    return ResourceScheduler(str(tmp_path / "scheduler"), total_cpus=1, total_memory_mb=1024, poll_interval=60)
+
+
+def test_cancel_stops_waiting_for_resources(scheduler, tmp_path):
+    manager = BackgroundTaskManager(
+        lanes={"experiment": 2}, results_dir=str(tmp_path / "results"), cancel_dir=str(tmp_path / "cancel")
+    )
+    release = threading.Event()
+    reserved = threading.Event()
+
+    def run(run_id):
+        manager.set_current_task_status("waiting_for_resources")
+        with scheduler.reserve(run_id, ResourceRequest(1, 512), current_cancel_token()):
+            manager.set_current_task_status("running")
+            reserved.set()
+            release.wait(5)
+
+    holder = manager.create_task(run, "run-1")
+    assert reserved.wait(5)
+    waiter = manager.create_task(run, "run-2")
+    deadline = time.monotonic() + 5
+    while manager.get_task_status(waiter)["status"] != "waiting_for_resources":
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert manager.get_task_status(holder)["status"] == "running"
+
+    # Wakes up long before the next poll
+    started = time.monotonic()
+    assert manager.cancel_task(waiter) is True
+    while manager.get_task_status(waiter)["status"] != "cancelled":
+        assert time.monotonic() - started < 5
+        time.sleep(0.01)
+    release.set()
+
+
+def test_reserve_raises_when_cancelled_before_capacity_frees_up(scheduler):
+    token = CancellationToken()
+    with scheduler.reserve("run-1", ResourceRequest(1, 512)):
+        threading.Timer(0.1, token.cancel).start()
+        with pytest.raises(TaskCancelled):
+            with scheduler.reserve("run-2", ResourceRequest(1, 512), token):
+                pass
+    assert "run-2" not in scheduler.utilization()["runs"]
+
+
+def test_reservations_are_shared_between_workers(tmp_path):
+    first = ResourceScheduler(str(tmp_path / "scheduler"), total_cpus=2, total_memory_mb=1024, poll_interval=0.05)
+    second = ResourceScheduler(str(tmp_path / "scheduler"), total_cpus=2, total_memory_mb=1024, poll_interval=0.05)
+    admitted = threading.Event()
+
+    def wait_for_memory():
+        with second.reserve("run-2", ResourceRequest(1, 768)):
+            admitted.set()
+
+    with first.reserve("run-1", ResourceRequest(1, 512)):
+        waiter = threading.Thread(target=wait_for_memory)
+        waiter.start()
+        # One CPU is still free, but the memory is not
+        assert not admitted.wait(0.3)
+        assert second.utilization()["reserved_memory_mb"] == 512
+    assert admitted.wait(5)
+    waiter.join(5)
+    assert first.utilization()["runs"] == {}
+
+
+def test_reservations_of_dead_processes_are_dropped(scheduler):
+    scheduler._try_reserve("run-1", ResourceRequest(1, 512))
+    with scheduler._locked_state() as reservations:
+        reservations["run-1"]["pid"] = 2 ** 22 + 1
+
+    with scheduler.reserve("run-2", ResourceRequest(1, 512), CancellationToken()) as reservation:
+        assert reservation["cpus"] == 1
+        assert list(scheduler.utilization()["runs"]) == ["run-2"]
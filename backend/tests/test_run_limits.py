@@ -0,0 +1,88 @@
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services import experiment_process
+from app.services.background_tasks import CancellationToken, TaskCancelled
+from app.services.run_limits import RunCgroup
+from app.services.token_accounting import RunTokenTracker
+
+
+@pytest.fixture
+def cgroup_root(tmp_path, monkeypatch):
+    (tmp_path / "cgroup.controllers").write_text("cpu io memory pids\n")
+    (tmp_path / "cgroup.subtree_control").write_text("")
+    monkeypatch.setattr(settings, "RUN_CGROUP_ROOT", str(tmp_path))
+    return tmp_path
+
+
+def test_cpu_bandwidth_follows_reserved_cpus(cgroup_root):
+    cgroup = RunCgroup.create("run-1", {"cpus": 2})
+    assert (cgroup.path / "cpu.max").read_text() == "200000 100000"
+
+
+def test_cgroup_is_removed_when_the_child_fails_to_start(cgroup_root, tmp_path, monkeypatch):
+    class FailingProcess:
+        def __init__(self, **kwargs):
+            pass
+
+        def start(self):
+            raise OSError("cannot spawn")
+
+    monkeypatch.setattr(experiment_process._mp_context, "Process", FailingProcess)
+    monkeypatch.setattr(experiment_process, "configured_limits", lambda: {})
+    with pytest.raises(OSError):
+        experiment_process.run_bfts_process(
+            "config.yaml", "run-2", tmp_path, RunTokenTracker("run-2"), CancellationToken()
+        )
+    assert not (cgroup_root / "run-run-2").exists()
+
+
+class SleepingProcess:
+    """Stands in for the BFTS child; never calls setsid, like one whose interpreter is still starting"""
+
+    spawn = experiment_process._mp_context.Process
+
+    def __init__(self, name, **kwargs):
+        self._process = self.spawn(target=time.sleep, args=(60,), name=name)
+
+    def __getattr__(self, name):
+        return getattr(self._process, name)
+
+    def start(self):
+        self._process.start()
+
+
+def test_cancel_before_the_child_leads_its_group(tmp_path, monkeypatch):
+    token = CancellationToken()
+
+    class SlowStartingProcess(SleepingProcess):
+        def start(self):
+            super().start()
+            token.cancel()
+
+    monkeypatch.setattr(experiment_process._mp_context, "Process", SlowStartingProcess)
+    monkeypatch.setattr(experiment_process, "configured_limits", lambda: {})
+    monkeypatch.setattr(settings, "RUN_CGROUP_ROOT", str(tmp_path / "no-cgroups"))
+    started = time.monotonic()
+    with pytest.raises(TaskCancelled):
+        experiment_process.run_bfts_process(
+            "config.yaml", "run-3", tmp_path, RunTokenTracker("run-3"), token, grace_period=0.5
+        )
+    assert time.monotonic() - started < 10
+
+
+def test_run_over_its_disk_limit_is_killed(tmp_path, monkeypatch):
+    monkeypatch.setattr(experiment_process._mp_context, "Process", SleepingProcess)
+    monkeypatch.setattr(experiment_process, "configured_limits", lambda: {"disk_bytes": 1024})
+    monkeypatch.setattr(experiment_process, "LIMIT_POLL_SECONDS", 0.05)
+    monkeypatch.setattr(settings, "RUN_CGROUP_ROOT", str(tmp_path / "no-cgroups"))
+    (tmp_path / "checkpoint.pt").write_bytes(b"0" * 4096)
+
+    started = time.monotonic()
+    with pytest.raises(RuntimeError, match="disk limit"):
+        experiment_process.run_bfts_process(
+            "config.yaml", "run-4", tmp_path, RunTokenTracker("run-4"), CancellationToken()
+        )
+    assert time.monotonic() - started < 10
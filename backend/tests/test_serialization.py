@@ -0,0 +1,93 @@
+import json
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.models.schema import (
+    ExperimentResult, ExperimentRun, ExperimentRunResponse, ResearchIdea, ResearchIdeaResponse
+)
+from app.services.serialization import ResponseSerializer
+
+NOW = datetime(2026, 1, 1, 12, 0, 0, 123456)
+
+
+def _run(run_id, status, **fields):
+    return ExperimentRun(
+        id=run_id,
+        research_idea_id="idea-1",
+        status=status,
+        proposal_index=0,
+        started_at=NOW,
+        updated_at=NOW,
+        results=[
+            ExperimentResult(
+                id=f"{run_id}-{m}", experiment_id=run_id, metric_name=f"metric_{m}",
+                metric_value=str(m / 3), metric_type="float", created_at=NOW,
+            )
+            for m in range(2)
+        ],
+        **fields,
+    )
+
+
+def _idea():
+    return ResearchIdea(
+        id="idea-1",
+        title="Sparse attention",
+        keywords="attention, sparsity",
+        tldr="Cheaper attention",
+        abstract="Structured sparsity in attention layers. é—\U0001f600",
+        status="generated",
+        generated_ideas={"ideas": [{"Title": "First", "Experiments": ["a", "b"]}], "metadata": {"num_ideas": 1}},
+        created_at=NOW,
+        updated_at=NOW,
+        experiments=[
+            _run(
+                "run-1", "completed", completed_at=NOW + timedelta(hours=3), is_successful=True,
+                token_usage={"gpt-4o": {"prompt_tokens": 10, "cost": 0.25}}, total_cost=0.25,
+                peak_rss_bytes=2 ** 31, cpu_seconds=12.5,
+            ),
+            _run("run-2", "running"),
+        ],
+    )
+
+
+def _response_model_body(value, model):
+    return jsonable_encoder(TypeAdapter(model).validate_python(value, from_attributes=True))
+
+
+def test_documents_match_the_response_models():
+    idea = _idea()
+    serializer = ResponseSerializer()
+
+    assert json.loads(serializer.idea(idea)) == _response_model_body(idea, ResearchIdeaResponse)
+    assert json.loads(serializer.ideas([idea, idea])) == _response_model_body([idea, idea], List[ResearchIdeaResponse])
+    run = idea.experiments[1]
+    assert json.loads(serializer.experiment(run)) == _response_model_body(run, ExperimentRunResponse)
+    assert json.loads(serializer.experiments([])) == []
+
+
+def test_only_finished_runs_are_cached_until_they_change():
+    idea = _idea()
+    serializer = ResponseSerializer()
+    serializer.idea(idea)
+    assert list(serializer._runs) == ["run-1"]
+
+    finished, running = idea.experiments
+    running.status = "failed"
+    finished.updated_at = NOW + timedelta(days=1)
+    finished.error_message = "rerun"
+    body = json.loads(serializer.idea(idea))
+
+    assert [run["status"] for run in body["experiments"]] == ["completed", "failed"]
+    assert body["experiments"][0]["error_message"] == "rerun"
+    assert sorted(serializer._runs) == ["run-1", "run-2"]
+
+
+def test_cache_is_bounded():
+    serializer = ResponseSerializer(max_cached_runs=1)
+    first, second = _run("run-1", "completed"), _run("run-2", "cancelled")
+    serializer.experiments([first, second])
+    assert list(serializer._runs) == ["run-2"]
@@ -0,0 +1,46 @@
+from app.services.similarity_index import SimilarityIndex
+
+SPARSE = {
+    "Title": "Block-sparse attention for long documents",
+    "Abstract": "We prune attention heads with learned block sparsity to speed up long document transformers.",
+}
+FOLDING = {
+    "Title": "Protein folding with diffusion models",
+    "Abstract": "Diffusion models generate protein backbones conditioned on sequence motifs.",
+}
+VISION = {
+    "Title": "Self-supervised depth estimation",
+    "Abstract": "Monocular depth estimation trained from video without labels.",
+}
+
+
+def test_near_duplicates_rank_first_and_exclusions_are_skipped():
+    index = SimilarityIndex(dimensions=256)
+    index.update_ideas([("a", [SPARSE, FOLDING], None), ("b", [VISION], None)])
+
+    query = {**SPARSE, "Title": "Block-sparse attention for long documents and code"}
+    matches = index.find_duplicates(query, threshold=0.5)
+    assert [(match["idea_id"], match["proposal_index"]) for match in matches] == [("a", 0)]
+    assert matches[0]["title"] == SPARSE["Title"]
+    assert index.find_duplicates(query, threshold=0.5, exclude=[("a", 0)]) == []
+
+
+def test_updating_an_idea_replaces_its_rows():
+    index = SimilarityIndex(dimensions=256)
+    index.update_ideas([("a", [SPARSE, FOLDING], None), ("b", [VISION], None)])
+    index.update_idea("a", [VISION])
+
+    assert len(index) == 2
+    matches = index.search([VISION["Abstract"]], limit=5, threshold=0.2)[0]
+    assert sorted(match["idea_id"] for match in matches) == ["a", "b"]
+    assert index.find_duplicates(SPARSE, threshold=0.5) == []
+
+
+def test_index_grows_past_its_initial_capacity():
+    index = SimilarityIndex(dimensions=64)
+    index.update_ideas([(f"idea-{n}", [{"Title": f"topic {n} word{n}"}], None) for n in range(1500)])
+    index.update_idea("idea-3", [])
+
+    assert len(index) == 1499
+    match = index.search(["topic 1200 word1200"], limit=1)[0][0]
+    assert match["idea_id"] == "idea-1200"
@@ -0,0 +1,32 @@
+import time
+
+from app.services.single_flight import SingleFlight
+
+
+def test_entries_of_dead_processes_are_discarded(tmp_path):
+    flights = SingleFlight(str(tmp_path))
+    with flights.lock("experiment:idea-1"):
+        flights.begin("experiment:idea-1", {"task_id": "task-1"})
+    assert flights.in_flight("experiment:idea-1")["task_id"] == "task-1"
+
+    path = flights._path("inflight", "experiment:idea-1")
+    flights._write(path, {**flights._read(path), "pid": 2 ** 22 + 1})
+    assert flights.in_flight("experiment:idea-1") is None
+    assert not path.exists()
+
+
+def test_finish_clears_the_entry(tmp_path):
+    flights = SingleFlight(str(tmp_path))
+    flights.begin("generate:idea-1", {"task_id": "task-1"})
+    flights.finish("generate:idea-1")
+    assert flights.in_flight("generate:idea-1") is None
+
+
+def test_idempotent_responses_expire(tmp_path, monkeypatch):
+    flights = SingleFlight(str(tmp_path), idempotency_ttl_seconds=60)
+    flights.save_response("generate:idea-1:key", {"task_id": "task-1"})
+    assert flights.get_response("generate:idea-1:key") == {"task_id": "task-1"}
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert flights.get_response("generate:idea-1:key") is None
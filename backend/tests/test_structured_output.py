@@ -0,0 +1,64 @@
+import pytest
+from prometheus_client import REGISTRY
+
+from app.services import idea_generator
+from app.services.structured_output import format_instructions, parse_action_response
+
+FINALIZE = '{"action": "FinalizeIdea", "arguments": {"idea": {"Name": "sparse_attention"}}}'
+
+
+def test_parses_json_and_text_responses():
+    assert parse_action_response(FINALIZE) == ("FinalizeIdea", {"idea": {"Name": "sparse_attention"}})
+    assert parse_action_response(f"```json\n{FINALIZE}\n```")[0] == "FinalizeIdea"
+
+    text = 'THOUGHT:\nSearch first.\n\nACTION:\nSearchSemanticScholar\n\nARGUMENTS:\n{"query": "sparse attention"}'
+    assert parse_action_response(text) == ("SearchSemanticScholar", {"query": "sparse attention"})
+    with pytest.raises(ValueError):
+        parse_action_response("I think this idea is great.")
+
+
+def test_structured_instructions_replace_the_text_format():
+    instructions = format_instructions(["SearchSemanticScholar", "FinalizeIdea"], structured=True)
+    assert "instead" in instructions
+    assert "one of: SearchSemanticScholar, FinalizeIdea" in instructions
+    assert "{actions}" not in format_instructions(["FinalizeIdea"], structured=False)
+
+
+def _generate(monkeypatch, responses, max_repairs):
+    prompts = []
+
+    def ask_llm(prompt_text, client, model, msg_history, llm_router, structured_output, stream):
+        prompts.append(prompt_text)
+        return responses.pop(0), msg_history
+
+    monkeypatch.setattr(idea_generator, "_ask_llm", ask_llm)
+    monkeypatch.setattr(idea_generator, "tools_dict", {})
+    ideas = idea_generator._generate_temp_free_idea(
+        None, "gpt-4o", "workshop", max_num_generations=1, num_reflections=1,
+        structured_output=True, max_repairs=max_repairs,
+    )
+    return ideas, prompts
+
+
+def _parse_failures(outcome):
+    return REGISTRY.get_sample_value(
+        "ai_scientist_llm_parse_failures_total", {"model": "gpt-4o", "outcome": outcome}
+    ) or 0
+
+
+def test_unparseable_response_is_repaired(monkeypatch):
+    repaired = _parse_failures("repaired")
+    ideas, prompts = _generate(monkeypatch, ["Here is my idea!", FINALIZE], max_repairs=1)
+
+    assert ideas == [{"Name": "sparse_attention"}]
+    assert prompts[1].startswith("Your previous response could not be used: Could not find ACTION")
+    assert _parse_failures("repaired") == repaired + 1
+
+
+def test_proposal_is_abandoned_after_the_last_repair(monkeypatch):
+    abandoned = _parse_failures("abandoned")
+    ideas, prompts = _generate(monkeypatch, ["Here is my idea!", '{"action": "Dance"}'], max_repairs=1)
+
+    assert ideas == []
+    assert len(prompts) == 2
+    assert _parse_failures("abandoned") == abandoned + 1
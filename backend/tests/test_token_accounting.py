@@ -0,0 +1,53 @@
+import threading
+
+from app.services.token_accounting import RunTokenTracker, token_tracker, track_run
+
+
+def test_concurrent_runs_are_accounted_separately():
+    results = {}
+    barrier = threading.Barrier(2)
+
+    def run(run_id, prompt_tokens):
+        with track_run(run_id) as tracker:
+            barrier.wait()
+            for _ in range(10):
+                # Goes through the proxy the submodule uses
+                token_tracker.add_tokens("gpt-4o", prompt_tokens, 1)
+            results[run_id] = tracker.get_totals()
+
+    threads = [threading.Thread(target=run, args=(f"run-{n}", n)) for n in (1, 2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results["run-1"]["prompt_tokens"] == 10
+    assert results["run-2"]["prompt_tokens"] == 20
+    assert results["run-1"]["llm_calls"] == results["run-2"]["llm_calls"] == 10
+    # Nothing leaked into the process-level tracker
+    assert "gpt-4o" not in token_tracker.current().get_summary()
+
+
+def test_exported_counts_merge_into_the_parent():
+    child = RunTokenTracker("child")
+    child.add_tokens("gpt-4o", 100, 50, cached_tokens=10)
+    child.add_interaction("gpt-4o", "system", "prompt", "response", timestamp=None)
+
+    parent = RunTokenTracker("parent")
+    parent.add_tokens("gpt-4o", 1, 1)
+    parent.merge_counts(child.export_counts())
+
+    tokens = parent.get_summary()["gpt-4o"]["tokens"]
+    assert tokens == {"prompt": 101, "completion": 51, "reasoning": 0, "cached": 10}
+    assert parent.get_totals()["llm_calls"] == 2
+    assert parent.num_interactions == 1
+
+
+def test_full_buffer_is_flushed_to_the_interaction_log(tmp_path):
+    tracker = RunTokenTracker("run", output_dir=tmp_path, buffer_size=2)
+    for n in range(3):
+        tracker.add_interaction("gpt-4o", "system", f"prompt {n}", "response", timestamp=None)
+
+    # Two interactions went to disk, the third is still buffered
+    assert len(tracker.get_interactions()) == 1
+    assert (tmp_path / "token_tracker_interactions.jsonl.gz").exists()
@@ -0,0 +1,64 @@
+import logging
+import os
+
+from app.core.config import settings
+from app.services.workspace import provision_workspace
+
+
+def test_provision_copies_files_without_touching_the_source(tmp_path):
+    source = tmp_path / "data"
+    (source / "train").mkdir(parents=True)
+    (source / "train" / "x.csv").write_text("1,2\n")
+    mode = os.stat(source / "train" / "x.csv").st_mode
+
+    info = provision_workspace(source, tmp_path / "run" / "data")
+
+    copied = tmp_path / "run" / "data" / "train" / "x.csv"
+    assert info["files"] == 1
+    assert copied.read_text() == "1,2\n"
+    copied.write_text("changed\n")
+    assert (source / "train" / "x.csv").read_text() == "1,2\n"
+    assert os.stat(source / "train" / "x.csv").st_mode == mode
+
+
+def test_provision_keeps_symlinked_directories(tmp_path):
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    (shared / "labels.txt").write_text("cat\ndog\n")
+    source = tmp_path / "data"
+    source.mkdir()
+    os.symlink(shared, source / "labels")
+    os.symlink("labels/labels.txt", source / "labels.txt")
+
+    provision_workspace(source, tmp_path / "run" / "data")
+
+    linked = tmp_path / "run" / "data" / "labels"
+    assert linked.is_symlink()
+    assert os.readlink(linked) == str(shared)
+    assert (linked / "labels.txt").read_text() == "cat\ndog\n"
+    assert (tmp_path / "run" / "data" / "labels.txt").read_text() == "cat\ndog\n"
+
+
+def test_large_copy_is_logged_as_a_warning(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "WORKSPACE_COPY_WARN_MB", 0)
+    source = tmp_path / "data"
+    source.mkdir()
+    (source / "x.csv").write_text("1,2\n")
+
+    with caplog.at_level(logging.WARNING):
+        provision_workspace(source, tmp_path / "run" / "data", strategy="copy")
+
+    assert "cannot reflink" in caplog.text
+
+
+def test_provision_leaves_out_excluded_top_level_names(tmp_path):
+    source = tmp_path / "entry"
+    (source / ".pins").mkdir(parents=True)
+    (source / ".pins" / "run-1").write_text("1")
+    (source / ".last_used").write_text("")
+    (source / "x.csv").write_text("1,2\n")
+
+    info = provision_workspace(source, tmp_path / "run" / "data", exclude=(".pins", ".last_used"))
+
+    assert info["files"] == 1
+    assert sorted(os.listdir(tmp_path / "run" / "data")) == ["x.csv"]
@@ -0,0 +1,137 @@
+import React, { useEffect, useRef, useState } from 'react';
+import { Box, Paper, Typography } from '@mui/material';
+import { IdeaStreamFrame, IdeaStreamMessage } from '../../types';
+
+// Longest model output kept on screen; older text is dropped from the top
+const MAX_OUTPUT_CHARS = 20000;
+
+interface IdeationStreamViewProps {
+  ideaId: string;
+  onDone?: (status: string) => void;
+}
+
+interface StreamLine {
+  kind: 'text' | 'event';
+  text: string;
+}
+
+function websocketUrl(): string {
+  const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+  return `${apiUrl.replace(/^http/, 'ws').replace(/\/$/, '')}/ws`;
+}
+
+function describeEvent(frame: IdeaStreamFrame): string | null {
+  switch (frame.type) {
+    case 'round':
+      return `Proposal ${frame.proposal}, reflection round ${frame.round} of ${frame.total_rounds}`;
+    case 'tool_call':
+      return `Calling ${frame.tool}`;
+    case 'tool_result':
+      return `${frame.tool} returned`;
+    case 'proposal':
+      return `Proposal finalized: ${frame.idea?.Title || frame.idea?.Name || 'untitled'}`;
+    case 'proposal_rejected':
+      return `Proposal rejected: ${frame.reason}`;
+    case 'done':
+      return frame.error ? `Generation ${frame.status}: ${frame.error}` : `Generation ${frame.status}`;
+    default:
+      return null;
+  }
+}
+
+function appendFrames(lines: StreamLine[], frames: IdeaStreamFrame[]): StreamLine[] {
+  const next = [...lines];
+  for (const frame of frames) {
+    if (frame.type === 'tokens') {
+      const last = next[next.length - 1];
+      if (last && last.kind === 'text') {
+        next[next.length - 1] = { kind: 'text', text: last.text + frame.text };
+      } else {
+        next.push({ kind: 'text', text: frame.text });
+      }
+      continue;
+    }
+    const text = describeEvent(frame);
+    if (text) {
+      next.push({ kind: 'event', text });
+    }
+  }
+
+  let chars = next.reduce((total, line) => total + line.text.length, 0);
+  while (chars > MAX_OUTPUT_CHARS && next.length > 1) {
+    chars -= next.shift()!.text.length;
+  }
+  return next;
+}
+
+export default function IdeationStreamView({ ideaId, onDone }: IdeationStreamViewProps) {
+  const [lines, setLines] = useState<StreamLine[]>([]);
+  const outputRef = useRef<HTMLDivElement>(null);
+  const onDoneRef = useRef(onDone);
+  onDoneRef.current = onDone;
+
+  useEffect(() => {
+    const socket = new WebSocket(websocketUrl());
+
+    socket.onopen = () => {
+      socket.send(JSON.stringify({ type: 'subscribe:idea', idea_id: ideaId }));
+    };
+
+    socket.onmessage = (event) => {
+      let message: IdeaStreamMessage;
+      try {
+        message = JSON.parse(event.data);
+      } catch {
+        return;
+      }
+      if (message.type !== 'idea_stream' || message.idea_id !== ideaId) return;
+
+      setLines((current) => appendFrames(current, message.frames));
+      const done = message.frames.find((frame) => frame.type === 'done');
+      if (done) {
+        onDoneRef.current?.(done.status);
+      }
+    };
+
+    socket.onerror = (error) => {
+      console.error('Ideation stream error:', error);
+    };
+
+    return () => {
+      if (socket.readyState === WebSocket.OPEN) {
+        socket.send(JSON.stringify({ type: 'unsubscribe:idea', idea_id: ideaId }));
+      }
+      socket.close();
+    };
+  }, [ideaId]);
+
+  useEffect(() => {
+    if (outputRef.current) {
+      outputRef.current.scrollTop = outputRef.current.scrollHeight;
+    }
+  }, [lines]);
+
+  if (lines.length === 0) {
+    return null;
+  }
+
+  return (
+    <Paper
+      variant="outlined"
+      ref={outputRef}
+      sx={{ p: 2, maxHeight: 400, overflowY: 'auto', fontFamily: 'monospace', fontSize: '0.85rem' }}
+    >
+      {lines.map((line, index) =>
+        line.kind === 'event' ? (
+          <Typography key={index} variant="subtitle2" color="primary" sx={{ my: 1 }}>
+            {line.text}
+          </Typography>
+        ) : (
+          <Box key={index} component="pre" sx={{ m: 0, whiteSpace: 'pre-wrap', fontFamily: 'inherit' }}>
+            {line.text}
+          </Box>
+        )
+      )}
+    </Paper>
+  );
+}
@@ -28,6 +28,7 @@ import DescriptionIcon from '@mui/icons-material/Description';
 import AddIcon from '@mui/icons-material/Add';
 import { ResearchIdea, ExperimentRun } from '../../types/models';
 import StatusBadge from '../../components/common/StatusBadge';
+import IdeationStreamView from '../../components/ideas/IdeationStreamView';
 import Link from 'next/link';
 
 interface TabPanelProps {
@@ -104,7 +105,8 @@ export default function IdeaDetailPage() {
     setOpenGenerateDialog(false);
     
     try {
-      await ideasApi.generateIdeas(id as string);
+      // Stream model output to the page while generation runs
+      await ideasApi.generateIdeas(id as string, true);
       enqueueSnackbar('Generation process started successfully!', { variant: 'success' });
       
       // Refresh the idea to get updated status
@@ -258,12 +260,15 @@ export default function IdeaDetailPage() {
             )}
             
             {idea.status === 'generating' && (
-              <Box sx={{ display: 'flex', alignItems: 'center', my: 4 }}>
-                <CircularProgress size={24} sx={{ mr: 2 }} />
-                <Typography>
-                  Generating ideas and resources... This may take a few minutes.
-                </Typography>
-              </Box>
+              <>
+                <Box sx={{ display: 'flex', alignItems: 'center', my: 4 }}>
+                  <CircularProgress size={24} sx={{ mr: 2 }} />
+                  <Typography>
+                    Generating ideas and resources... This may take a few minutes.
+                  </Typography>
+                </Box>
+                <IdeationStreamView ideaId={idea.id} onDone={() => fetchIdeaDetails()} />
+              </>
             )}
             
             {idea.status === 'generated' && idea.markdown_url && (
@@ -39,8 +39,8 @@ export const ideasApi = {
   },
   
   // Generate hypotheses for an idea
-  generateIdeas: async (ideaId: string): Promise<any> => {
-    const response = await api.post(`/research/ideas/${ideaId}/generate`);
+  generateIdeas: async (ideaId: string, stream?: boolean): Promise<any> => {
+    const response = await api.post(`/research/ideas/${ideaId}/generate`, null, { params: { stream } });
     return response.data;
   },
 };
@@ -30,6 +30,20 @@ export interface GenerateIdeasResponse {
   generated_ideas: any | null;
 }
 
+// Frames of a streamed ideation run, delivered in "idea_stream" WebSocket messages
+export interface IdeaStreamFrame {
+  seq: number;
+  time: number;
+  type: 'round' | 'llm_call' | 'tokens' | 'tool_call' | 'tool_result' | 'proposal' | 'proposal_rejected' | 'done';
+  [key: string]: any;
+}
+
+export interface IdeaStreamMessage {
+  type: 'idea_stream';
+  idea_id: string;
+  frames: IdeaStreamFrame[];
+}
+
 export interface ExperimentRun {
   id: string;
   research_idea_id: string;
@@ -39,9 +53,11 @@ export interface ExperimentRun {
   results_url: string | null;
   started_at: string;
   completed_at: string | null;
+  updated_at?: string | null;
   is_successful: boolean | null;
   error_message: string | null;
   experiment_config: any | null;
+  proposal_index?: number;
   results: ExperimentResult[];
 }
 
@@ -60,6 +76,98 @@ export interface CreateExperimentResponse {
   status: string;
   error_message: string | null;
   started_at: string;
+  task_id?: string | null;
+  reused?: boolean;
+}
+
+export interface SweepExperiment {
+  proposal_index: number;
+  experiment_id: string;
+  task_id: string | null;
+  status: string;
+  reused: boolean;
+}
+
+export interface CreateSweepResponse {
+  sweep_id: string;
+  idea_id: string;
+  max_concurrency: number;
+  experiments: SweepExperiment[];
+}
+
+export interface SweepStatusResponse {
+  sweep_id: string;
+  idea_id: string;
+  max_concurrency: number;
+  created_at: string;
+  total: number;
+  finished: number;
+  progress: number;
+  status_counts: Record<string, number>;
+  results: {
+    completed: number;
+    successful: number;
+    total_cost: number;
+    llm_calls: number;
+    cpu_seconds: number;
+  };
+  experiments: {
+    proposal_index: number;
+    title: string | null;
+    experiment_id: string;
+    status: string;
+    is_successful: boolean | null;
+    total_cost: number | null;
+    results_url: string | null;
+    error_message: string | null;
+  }[];
+}
+
+export interface IdeaSearchResponse {
+  query: string;
+  total: number;
+  offset: number;
+  limit: number;
+  results: {
+    idea: ResearchIdea;
+    rank: number;
+    snippet: string | null;
+  }[];
+}
+
+export interface SimilarIdeaMatch {
+  idea_id: string;
+  proposal_index: number;
+  title: string;
+  similarity: number;
+}
+
+export interface SimilarIdeasResponse {
+  idea_id: string;
+  indexed_proposals: number;
+  results: {
+    proposal_index: number | null;
+    matches: SimilarIdeaMatch[];
+  }[];
+}
+
+export interface ExperimentArtifact {
+  id: string;
+  experiment_id: string;
+  path: string;
+  size_bytes: number;
+  sha256: string;
+  artifact_type: string;
+  stage: string;
+  created_at: string | null;
+}
+
+export interface ArtifactListResponse {
+  experiment_id: string;
+  total: number;
+  offset: number;
+  limit: number;
+  artifacts: ExperimentArtifact[];
 }
 
 export interface ExperimentStatusResponse {
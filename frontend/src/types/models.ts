@@ -10,6 +10,7 @@ export enum ExperimentStatus {
   RUNNING = "running",
   COMPLETED = "completed",
   FAILED = "failed",
+  CANCELLED = "cancelled",
 }
 
 export interface ResearchIdea {
@@ -43,6 +44,7 @@ export interface ExperimentRun {
   is_successful?: boolean;
   error_message?: string;
   experiment_config?: Record<string, any>;
+  fingerprint?: string;
   results?: ExperimentResult[];
 }
 
@@ -61,6 +63,9 @@ export interface ExperimentResult {
 export interface TaskStatus {
   id: string;
   status: 'pending' | 'running' | 'completed' | 'failed' | 'cancelled';
+  lane?: string;
+  priority?: number;
+  queue_position?: number | null;
   created_at: number;
   started_at?: number;
   completed_at?: number;
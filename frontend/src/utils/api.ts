@@ -5,7 +5,12 @@ import {
   GenerateIdeasResponse,
   ExperimentRun,
   CreateExperimentResponse,
-  ExperimentStatusResponse
+  ExperimentStatusResponse,
+  CreateSweepResponse,
+  SweepStatusResponse,
+  SimilarIdeasResponse,
+  IdeaSearchResponse,
+  ArtifactListResponse
 } from '../types';
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL;
@@ -33,19 +38,24 @@ export const researchApi = {
     return response.data;
   },
 
+  async searchIdeas(q: string, limit = 20, offset = 0): Promise<IdeaSearchResponse> {
+    const response = await api.get('/research/ideas/search', { params: { q, limit, offset } });
+    return response.data;
+  },
+
   async getIdea(id: string): Promise<ResearchIdea> {
     const response = await api.get(`/research/ideas/${id}`);
     return response.data;
   },
 
-  async generateIdeas(id: string): Promise<GenerateIdeasResponse> {
-    const response = await api.post(`/research/ideas/${id}/generate`);
+  async generateIdeas(id: string, stream?: boolean): Promise<GenerateIdeasResponse> {
+    const response = await api.post(`/research/ideas/${id}/generate`, null, { params: { stream } });
     return response.data;
   },
 
   // Experiments
-  async runExperiment(ideaId: string): Promise<CreateExperimentResponse> {
-    const response = await api.post(`/research/ideas/${ideaId}/experiments`);
+  async runExperiment(ideaId: string, force = false): Promise<CreateExperimentResponse> {
+    const response = await api.post(`/research/ideas/${ideaId}/experiments`, null, { params: { force } });
     return response.data;
   },
 
@@ -58,6 +68,43 @@ export const researchApi = {
     const response = await api.get(`/research/experiments/${id}`);
     return response.data;
   },
+
+  async listArtifacts(
+    experimentId: string,
+    options: { artifact_type?: string; stage?: string; prefix?: string; offset?: number; limit?: number } = {}
+  ): Promise<ArtifactListResponse> {
+    const response = await api.get(`/research/experiments/${experimentId}/artifacts`, { params: options });
+    return response.data;
+  },
+
+  // Served with Range/ETag support; use directly as a link, iframe or PDF viewer source
+  artifactUrl(experimentId: string, path: string): string {
+    const encodedPath = path.split('/').map(encodeURIComponent).join('/');
+    return `${API_URL}/research/experiments/${experimentId}/artifacts/${encodedPath}`;
+  },
+
+  // Sweeps
+  async runSweep(
+    ideaId: string,
+    options: { proposals?: number[]; max_concurrency?: number; force?: boolean } = {}
+  ): Promise<CreateSweepResponse> {
+    const response = await api.post(`/research/ideas/${ideaId}/sweeps`, options);
+    return response.data;
+  },
+
+  async getSweep(id: string): Promise<SweepStatusResponse> {
+    const response = await api.get(`/research/sweeps/${id}`);
+    return response.data;
+  },
+
+  // Similarity
+  async getSimilarIdeas(
+    ideaId: string,
+    options: { proposal_index?: number; limit?: number; threshold?: number } = {}
+  ): Promise<SimilarIdeasResponse> {
+    const response = await api.get(`/research/ideas/${ideaId}/similar`, { params: options });
+    return response.data;
+  },
 };
 
 export default api; 
\ No newline at end of file